@@ -66,15 +66,22 @@ def install_aria_extensions():
     extension.init()
 
 
-def application_model_storage(api, api_kwargs=None, initiator=None, initiator_kwargs=None):
+def application_model_storage(api, api_kwargs=None, initiator=None, initiator_kwargs=None,
+                              profile=None):
     """
     Initiate model storage.
+
+    :param profile: SQLite profile of the built-in initiator (see
+     :data:`~aria.storage.sql_mapi.SQLITE_PROFILES`)
     """
+    initiator_kwargs = dict(initiator_kwargs or {})
+    if profile is not None:
+        initiator_kwargs['profile'] = profile
     return storage.ModelStorage(api_cls=api,
                                 api_kwargs=api_kwargs,
                                 items=modeling.models.models_to_register,
                                 initiator=initiator,
-                                initiator_kwargs=initiator_kwargs or {})
+                                initiator_kwargs=initiator_kwargs)
 
 
 def application_resource_storage(api, api_kwargs=None, initiator=None, initiator_kwargs=None):
@@ -84,6 +91,6 @@ def application_resource_storage(api, api_kwargs=None, initiator=None, initiator
 
     return storage.ResourceStorage(api_cls=api,
                                    api_kwargs=api_kwargs,
-                                   items=['service_template', 'service', 'plugin'],
+                                   items=['service_template', 'service', 'plugin', 'execution'],
                                    initiator=initiator,
                                    initiator_kwargs=initiator_kwargs)
@@ -26,5 +26,6 @@ from . import (
     reset,
     service_templates,
     services,
+    storage,
     workflows
 )
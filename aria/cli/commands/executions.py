@@ -25,14 +25,22 @@ from .. import utils
 from .. import logger as cli_logger
 from .. import execution_logging
 from ..core import aria
+from ..env import env
 from ...modeling.models import Execution
-from ...orchestrator.workflow_runner import WorkflowRunner
+from ...orchestrator import (
+    log_bus,
+    statistics
+)
+from ...orchestrator.workflow_runner import WorkflowRunner, create_task_graph
+from ...orchestrator.workflows.core import graph_compiler
 from ...orchestrator.workflows.executor.dry import DryExecutor
 from ...utils import formatting
 from ...utils import threading
 
 EXECUTION_COLUMNS = ('id', 'workflow_name', 'status', 'service_name',
                      'created_at', 'error')
+# relationships of the columns
+EXECUTION_LOAD = ('service', )
 
 
 @aria.group(name='executions')
@@ -57,7 +65,7 @@ def show(execution_id, model_storage, logger):
     EXECUTION_ID is the unique ID of the execution.
     """
     logger.info('Showing execution {0}'.format(execution_id))
-    execution = model_storage.execution.get(execution_id)
+    execution = model_storage.execution.get(execution_id, load=EXECUTION_LOAD + ('inputs', ))
 
     table.print_data(EXECUTION_COLUMNS, execution, 'Execution:', col_max_width=50)
 
@@ -78,12 +86,16 @@ def show(execution_id, model_storage, logger):
 @aria.options.service_name(required=False)
 @aria.options.sort_by()
 @aria.options.descending
+@aria.options.page_size
+@aria.options.cursor
 @aria.options.verbose()
 @aria.pass_model_storage
 @aria.pass_logger
 def list(service_name,
          sort_by,
          descending,
+         page_size,
+         cursor,
          model_storage,
          logger):
     """
@@ -103,9 +115,12 @@ def list(service_name,
 
     executions_list = model_storage.execution.list(
         filters=filters,
-        sort=utils.storage_sort_param(sort_by, descending)).items
+        sort=utils.storage_sort_param(sort_by, descending),
+        pagination=utils.storage_pagination_param(page_size, cursor),
+        load=EXECUTION_LOAD)
 
     table.print_data(EXECUTION_COLUMNS, executions_list, 'Executions:')
+    utils.log_next_page(executions_list)
 
 
 @executions.command(name='start',
@@ -154,6 +169,52 @@ def start(workflow_name,
     _run_execution(workflow_runner, logger, model_storage, dry, mark_pattern)
 
 
+@executions.command(name='estimate',
+                    short_help='Estimate the duration of a workflow on a service')
+@aria.argument('workflow-name')
+@aria.options.service_name(required=True)
+@aria.options.inputs(help=helptexts.EXECUTION_INPUTS)
+@aria.options.estimate_percentile()
+@aria.options.verbose()
+@aria.pass_model_storage
+@aria.pass_resource_storage
+@aria.pass_logger
+def estimate(workflow_name,
+             service_name,
+             inputs,
+             percentile,
+             model_storage,
+             resource_storage,
+             logger):
+    """
+    Estimate the duration of a workflow on a service
+
+    The workflow's tasks are listed without executing or storing them, and the duration is
+    estimated by the durations of their operations in past executions.
+
+    SERVICE_NAME is the unique name of the service.
+
+    WORKFLOW_NAME is the unique name of the workflow within the service (e.g. "install").
+    """
+    service = model_storage.service.get_by_name(service_name)
+    # nothing is stored, so workflows can be estimated while the service has an active execution
+    tasks = graph_compiler.plan_tasks(create_task_graph(
+        model_storage, resource_storage, service.id, workflow_name, inputs=inputs))
+    makespan = statistics.estimate_makespan(model_storage, tasks, percentile)
+    operations_count = sum(1 for task in tasks if not task._stub_type)
+    known_count = sum(1 for operation_statistics
+                      in statistics.get_statistics(model_storage, tasks).itervalues()
+                      if operation_statistics is not None)
+
+    logger.info('Estimated duration of workflow {0} on service {1}: {2:.1f} seconds'
+                .format(workflow_name, service_name, makespan))
+    unknown_count = operations_count - known_count
+    if unknown_count:
+        logger.info('{0} of {1} operations were never executed before, and are estimated to take '
+                    '{2} seconds each'.format(unknown_count, operations_count,
+                                              statistics.DEFAULT_OPERATION_DURATION))
+
+
 @executions.command(name='resume',
                     short_help='Resume a stopped execution')
 @aria.argument('execution-id')
@@ -201,31 +262,42 @@ def resume(execution_id,
 def _run_execution(workflow_runner, logger, model_storage, dry, mark_pattern):
     execution_thread_name = '{0}_{1}'.format(workflow_runner.service.name,
                                              workflow_runner.execution.workflow_name)
-    execution_thread = threading.ExceptionThread(target=workflow_runner.execute,
-                                                 name=execution_thread_name)
-
-    execution_thread.start()
 
-    last_task_id = workflow_runner.execution.logs[-1].id if workflow_runner.execution.logs else 0
-    log_iterator = cli_logger.ModelLogIterator(model_storage,
-                                               workflow_runner.execution_id,
-                                               offset=last_task_id)
+    # The logs are printed as they're published to the execution's log bus, which is served for the
+    # executor's subprocesses and for `aria logs tail -f`
+    execution_log_bus = log_bus.LogBus(workflow_runner.execution_id)
+    execution_log_bus.open()
     try:
-        while execution_thread.is_alive():
-            execution_logging.log_list(log_iterator, mark_pattern=mark_pattern)
-            execution_thread.join(1)
+        execution_log_bus.serve(env.log_bus_dir)
+        log_stream = cli_logger.ModelLogStream(model_storage, execution_log_bus.subscribe())
+
+        def execute():
+            try:
+                workflow_runner.execute()
+            finally:
+                # Ends the log stream
+                execution_log_bus.close()
+
+        execution_thread = threading.ExceptionThread(target=execute, name=execution_thread_name)
+        execution_thread.start()
 
-    except KeyboardInterrupt:
-        _cancel_execution(workflow_runner, execution_thread, logger, log_iterator)
+        try:
+            execution_logging.log_list(log_stream, mark_pattern=mark_pattern)
+            execution_thread.join()
+        except KeyboardInterrupt:
+            _cancel_execution(workflow_runner, execution_thread, logger, log_stream)
 
-    # It might be the case where some logs were written and the execution was terminated, thus we
-    # need to drain the remaining logs.
-    execution_logging.log_list(log_iterator, mark_pattern=mark_pattern)
+        # The log stream might have been interrupted before the remaining logs were printed
+        execution_logging.log_list(log_stream, mark_pattern=mark_pattern)
+    finally:
+        execution_log_bus.close()
 
     # raise any errors from the execution thread (note these are not workflow execution errors)
     execution_thread.raise_error_if_exists()
 
-    execution = workflow_runner.execution
+    # The execution was updated by the execution thread, while the logs were streamed without
+    # querying the storage
+    execution = model_storage.execution.refresh(workflow_runner.execution, load=[])
     logger.info('Execution has ended with "{0}" status'.format(execution.status))
     if execution.status == Execution.FAILED and execution.error:
         logger.info('Execution error:{0}{1}'.format(os.linesep, execution.error))
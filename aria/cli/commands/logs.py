@@ -17,9 +17,20 @@
 CLI ``logs`` sub-commands.
 """
 
+import sys
+import socket
+from datetime import timedelta
+
 from .. import execution_logging
-from ..logger import ModelLogIterator
+from ..logger import ModelLogIterator, ModelLogStream
 from ..core import aria
+from ..env import env
+from ..exceptions import AriaCliError
+from ...orchestrator import (
+    log_archive,
+    log_bus,
+    log_export
+)
 
 
 @aria.group(name='logs')
@@ -36,16 +47,21 @@ def logs():
 @aria.argument('execution-id')
 @aria.options.verbose()
 @aria.options.mark_pattern()
+@aria.options.logs_batch_size()
 @aria.pass_model_storage
+@aria.pass_resource_storage
 @aria.pass_logger
-def list(execution_id, mark_pattern, model_storage, logger):
+def list(execution_id, mark_pattern, batch_size, model_storage, resource_storage, logger):
     """
     List logs for an execution
 
+    Archived logs (see "aria logs compact") are listed along with the stored ones.
+
     EXECUTION_ID is the unique ID of the execution.
     """
     logger.info('Listing logs for execution id {0}'.format(execution_id))
-    log_iterator = ModelLogIterator(model_storage, execution_id)
+    log_iterator = ModelLogIterator(model_storage, execution_id, batch_size=batch_size,
+                                    resource_storage=resource_storage)
 
     any_logs = execution_logging.log_list(log_iterator, mark_pattern=mark_pattern)
 
@@ -53,13 +69,96 @@ def list(execution_id, mark_pattern, model_storage, logger):
         logger.info('\tNo logs')
 
 
+@logs.command(name='export',
+              short_help='Export logs of an execution for analysis')
+@aria.argument('execution-id')
+@aria.options.logs_export_path
+@aria.options.logs_export_format()
+@aria.options.logs_batch_size(default=log_export.BATCH_SIZE)
+@aria.options.verbose()
+@aria.pass_model_storage
+@aria.pass_resource_storage
+@aria.pass_logger
+def export(execution_id, output_path, output_format, batch_size, model_storage, resource_storage,
+           logger):
+    """
+    Export logs of an execution for analysis
+
+    Each log is exported with its ID, task ID, node name, interface and operation names, level,
+    timestamp, message and traceback, as lines of JSON (see --format). Archived logs (see "aria
+    logs compact") are exported along with the stored ones.
+
+    EXECUTION_ID is the unique ID of the execution.
+    """
+    if output_path is None:
+        log_export.export(model_storage, execution_id, sys.stdout, output_format=output_format,
+                          batch_size=batch_size, resource_storage=resource_storage)
+        return
+    logger.info('Exporting logs for execution id {0}...'.format(execution_id))
+    with open(output_path, 'w') as stream:
+        exported_count = log_export.export(model_storage, execution_id, stream,
+                                           output_format=output_format, batch_size=batch_size,
+                                           resource_storage=resource_storage)
+    logger.info('Exported {0} logs to {1}'.format(exported_count, output_path))
+
+
+@logs.command(name='tail',
+              short_help='Print the last logs of an execution')
+@aria.argument('execution-id')
+@aria.options.logs_lines()
+@aria.options.follow_logs
+@aria.options.verbose()
+@aria.options.mark_pattern()
+@aria.pass_model_storage
+@aria.pass_logger
+def tail(execution_id, lines, follow, mark_pattern, model_storage, logger):
+    """
+    Print the last logs of an execution
+
+    EXECUTION_ID is the unique ID of the execution.
+    """
+    subscription = None
+    if follow:
+        # Subscribing first, so no log is missed between reading the last logs and following
+        address = log_bus.find_address(env.log_bus_dir, execution_id)
+        if address is not None:
+            try:
+                subscription = log_bus.subscribe(address)
+            except socket.error:
+                pass
+        if subscription is None:
+            logger.info('Execution {0} is not running in a CLI process, so its logs are not '
+                        'followed'.format(execution_id))
+
+    last_logs = []
+    if lines:
+        last_logs = model_storage.log.list(filters=dict(execution_fk=execution_id),
+                                           sort=dict(id='desc'),
+                                           pagination=dict(size=lines, cursor=None),
+                                           load=('task.arguments', 'execution.inputs'))
+        last_logs = last_logs[::-1]
+    execution_logging.log_list(last_logs, mark_pattern=mark_pattern)
+
+    if subscription is not None:
+        # The logs which were published after subscribing, and were already printed
+        printed = set((log.task_fk, log.created_at, log.msg) for log in last_logs)
+        events = (event for event in subscription
+                  if (event.task_fk, event.created_at, event.msg) not in printed)
+        try:
+            execution_logging.log_list(ModelLogStream(model_storage, events),
+                                       mark_pattern=mark_pattern)
+        finally:
+            subscription.close()
+
+
 @logs.command(name='delete',
               short_help='Delete logs of an execution')
 @aria.argument('execution-id')
 @aria.options.verbose()
 @aria.pass_model_storage
+@aria.pass_resource_storage
 @aria.pass_logger
-def delete(execution_id, model_storage, logger):
+def delete(execution_id, model_storage, resource_storage, logger):
     """
     Delete logs of an execution
 
@@ -69,4 +168,38 @@ def delete(execution_id, model_storage, logger):
     logs_list = model_storage.log.list(filters=dict(execution_fk=execution_id))
     for log in logs_list:
         model_storage.log.delete(log)
+    log_archive.delete(resource_storage, execution_id)
     logger.info('Deleted logs for execution id {0}'.format(execution_id))
+
+
+@logs.command(name='compact',
+              short_help='Archive the expired logs of ended executions')
+@aria.options.logs_max_age
+@aria.options.logs_max_count
+@aria.options.logs_levels
+@aria.options.logs_batch_size()
+@aria.options.logs_max_batches
+@aria.options.verbose()
+@aria.pass_model_storage
+@aria.pass_resource_storage
+@aria.pass_logger
+def compact(max_age, max_count, levels, batch_size, max_batches, model_storage, resource_storage,
+            logger):
+    """
+    Archive the expired logs of ended executions
+
+    Logs expire once they're older than the maximal age, or once the maximal count of newer logs
+    were logged in their execution. When levels are given, only logs of these levels expire.
+    Expired logs are moved from the model storage to a compressed archive per execution in the
+    resource storage, and are still listed by "aria logs list".
+    """
+    if max_age is None and max_count is None and not levels:
+        raise AriaCliError('At least one of --max-age, --max-count and --level must be provided')
+    policy = log_archive.RetentionPolicy(
+        max_age=timedelta(days=max_age) if max_age is not None else None,
+        max_count=max_count,
+        levels=levels)
+    logger.info('Archiving expired logs...')
+    archived_count = log_archive.compact(model_storage, resource_storage, [policy],
+                                         batch_size=batch_size, max_batches=max_batches)
+    logger.info('Archived {0} logs'.format(archived_count))
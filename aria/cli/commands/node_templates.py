@@ -23,6 +23,8 @@ from ..core import aria
 
 
 NODE_TEMPLATE_COLUMNS = ['id', 'name', 'description', 'service_template_name', 'type_name']
+# relationships of the columns
+NODE_TEMPLATE_LOAD = ('service_template', 'type')
 
 
 @aria.group(name='node-templates')
@@ -48,7 +50,8 @@ def show(node_template_id, model_storage, logger):
     NODE_TEMPLATE_ID is the unique node template ID.
     """
     logger.info('Showing node template {0}'.format(node_template_id))
-    node_template = model_storage.node_template.get(node_template_id)
+    node_template = model_storage.node_template.get(
+        node_template_id, load=NODE_TEMPLATE_LOAD + ('properties', 'nodes'))
 
     table.print_data(NODE_TEMPLATE_COLUMNS, node_template, 'Node template:', col_max_width=50)
 
@@ -74,10 +77,12 @@ def show(node_template_id, model_storage, logger):
 @aria.options.service_template_name()
 @aria.options.sort_by('service_template_name')
 @aria.options.descending
+@aria.options.page_size
+@aria.options.cursor
 @aria.options.verbose()
 @aria.pass_model_storage
 @aria.pass_logger
-def list(service_template_name, sort_by, descending, model_storage, logger):
+def list(service_template_name, sort_by, descending, page_size, cursor, model_storage, logger):
     """
     List stored node templates
 
@@ -95,6 +100,9 @@ def list(service_template_name, sort_by, descending, model_storage, logger):
 
     node_templates_list = model_storage.node_template.list(
         filters=filters,
-        sort=utils.storage_sort_param(sort_by, descending))
+        sort=utils.storage_sort_param(sort_by, descending),
+        pagination=utils.storage_pagination_param(page_size, cursor),
+        load=NODE_TEMPLATE_LOAD)
 
     table.print_data(NODE_TEMPLATE_COLUMNS, node_templates_list, 'Node templates:')
+    utils.log_next_page(node_templates_list)
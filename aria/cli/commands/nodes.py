@@ -23,6 +23,8 @@ from ..core import aria
 
 
 NODE_COLUMNS = ['id', 'name', 'service_name', 'node_template_name', 'state']
+# relationships of the columns
+NODE_LOAD = ('service', 'node_template')
 
 
 @aria.group(name='nodes')
@@ -47,7 +49,7 @@ def show(node_id, model_storage, logger):
     NODE_ID is the unique node ID.
     """
     logger.info('Showing node {0}'.format(node_id))
-    node = model_storage.node.get(node_id)
+    node = model_storage.node.get(node_id, load=NODE_LOAD + ('attributes', ))
 
     table.print_data(NODE_COLUMNS, node, 'Node:', col_max_width=50)
 
@@ -65,12 +67,16 @@ def show(node_id, model_storage, logger):
 @aria.options.service_name(required=False)
 @aria.options.sort_by('service_name')
 @aria.options.descending
+@aria.options.page_size
+@aria.options.cursor
 @aria.options.verbose()
 @aria.pass_model_storage
 @aria.pass_logger
 def list(service_name,
          sort_by,
          descending,
+         page_size,
+         cursor,
          model_storage,
          logger):
     """
@@ -89,6 +95,9 @@ def list(service_name,
 
     nodes_list = model_storage.node.list(
         filters=filters,
-        sort=utils.storage_sort_param(sort_by, descending))
+        sort=utils.storage_sort_param(sort_by, descending),
+        pagination=utils.storage_pagination_param(page_size, cursor),
+        load=NODE_LOAD)
 
     table.print_data(NODE_COLUMNS, nodes_list, 'Nodes:')
+    utils.log_next_page(nodes_list)
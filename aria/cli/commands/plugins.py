@@ -98,14 +98,18 @@ def show(plugin_id, model_storage, logger):
                  short_help='List all installed plugins')
 @aria.options.sort_by('uploaded_at')
 @aria.options.descending
+@aria.options.page_size
+@aria.options.cursor
 @aria.options.verbose()
 @aria.pass_model_storage
 @aria.pass_logger
-def list(sort_by, descending, model_storage, logger):
+def list(sort_by, descending, page_size, cursor, model_storage, logger):
     """
     List all installed plugins
     """
     logger.info('Listing all plugins...')
     plugins_list = model_storage.plugin.list(
-        sort=utils.storage_sort_param(sort_by, descending)).items
+        sort=utils.storage_sort_param(sort_by, descending),
+        pagination=utils.storage_pagination_param(page_size, cursor))
     table.print_data(PLUGIN_COLUMNS, plugins_list, 'Plugins:')
+    utils.log_next_page(plugins_list)
@@ -101,22 +101,26 @@ def show(service_template_name, model_storage, mode_full, mode_types, format_jso
                            short_help='List all stored service templates')
 @aria.options.sort_by()
 @aria.options.descending
+@aria.options.page_size
+@aria.options.cursor
 @aria.options.verbose()
 @aria.pass_model_storage
 @aria.pass_logger
-def list(sort_by, descending, model_storage, logger):
+def list(sort_by, descending, page_size, cursor, model_storage, logger):
     """
     List all stored service templates
     """
 
     logger.info('Listing all service templates...')
     service_templates_list = model_storage.service_template.list(
-        sort=utils.storage_sort_param(sort_by, descending))
+        sort=utils.storage_sort_param(sort_by, descending),
+        pagination=utils.storage_pagination_param(page_size, cursor))
 
     column_formatters = \
         dict(description=table.trim_formatter_generator(DESCRIPTION_FIELD_LENGTH_LIMIT))
     table.print_data(SERVICE_TEMPLATE_COLUMNS, service_templates_list, 'Service templates:',
                      column_formatters=column_formatters)
+    utils.log_next_page(service_templates_list)
 
 
 @service_templates.command(name='store',
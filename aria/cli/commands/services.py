@@ -35,6 +35,8 @@ from ...orchestrator import topology
 
 DESCRIPTION_FIELD_LENGTH_LIMIT = 20
 SERVICE_COLUMNS = ('id', 'name', 'description', 'service_template_name', 'created_at', 'updated_at')
+# relationships of the columns
+SERVICE_LOAD = ('service_template', )
 
 
 @aria.group(name='services')
@@ -96,12 +98,16 @@ def show(service_name, model_storage, mode_full, mode_graph, format_json, format
 @aria.options.service_template_name()
 @aria.options.sort_by()
 @aria.options.descending
+@aria.options.page_size
+@aria.options.cursor
 @aria.options.verbose()
 @aria.pass_model_storage
 @aria.pass_logger
 def list(service_template_name,
          sort_by,
          descending,
+         page_size,
+         cursor,
          model_storage,
          logger):
     """
@@ -121,8 +127,11 @@ def list(service_template_name,
 
     services_list = model_storage.service.list(
         sort=utils.storage_sort_param(sort_by=sort_by, descending=descending),
-        filters=filters)
+        filters=filters,
+        pagination=utils.storage_pagination_param(page_size, cursor),
+        load=SERVICE_LOAD)
     table.print_data(SERVICE_COLUMNS, services_list, 'Services:')
+    utils.log_next_page(services_list)
 
 
 @services.command(name='create',
@@ -0,0 +1,46 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+CLI ``storage`` sub-commands.
+"""
+
+from ..core import aria
+
+
+@aria.group(name='storage')
+@aria.options.verbose()
+def storage():
+    """
+    Manage ARIA's storage
+    """
+    pass
+
+
+@storage.command(name='upgrade',
+                 short_help='Upgrade a storage created by an earlier version')
+@aria.options.verbose()
+@aria.pass_model_storage
+@aria.pass_logger
+def upgrade(model_storage, logger):
+    """
+    Upgrade a storage created by an earlier version
+
+    Creates the indexes which were added to the model storage since it was created. Run it once
+    after upgrading ARIA.
+    """
+    logger.info('Upgrading the storage...')
+    created = model_storage.upgrade()
+    logger.info('Created {0} indexes'.format(len(created)))
@@ -23,6 +23,8 @@ from ruamel import yaml
 
 from jinja2.environment import Template
 
+from .. import defaults
+
 
 CONFIG_FILE_NAME = 'config.yaml'
 
@@ -58,6 +60,19 @@ class CliConfig(object):
     def logging(self):
         return self.Logging(self._config.get('logging'))
 
+    @property
+    def storage(self):
+        return self.Storage(self._config.get('storage'))
+
+    class Storage(object):
+
+        def __init__(self, storage):
+            self._storage = storage or {}
+
+        @property
+        def profile(self):
+            return self._storage.get('profile', defaults.STORAGE_PROFILE)
+
     class Logging(object):
 
         def __init__(self, logging):
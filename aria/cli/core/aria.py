@@ -282,7 +282,7 @@ def argument(*args, **kwargs):
     return click.argument(*args, **kwargs)
 
 
-class Options(object):
+class Options(object):                                # pylint: disable=too-many-instance-attributes
     def __init__(self):
         """
         The options API is nicer when you use each option by calling ``@aria.options.some_option``
@@ -316,6 +316,39 @@ class Options(object):
             help=helptexts.RETRY_FAILED_TASK
         )
 
+        self.follow_logs = click.option(
+            '-f',
+            '--follow',
+            is_flag=True,
+            help=helptexts.FOLLOW_LOGS)
+
+        self.logs_max_age = click.option(
+            '--max-age',
+            type=float,
+            help=helptexts.LOGS_MAX_AGE)
+
+        self.logs_max_count = click.option(
+            '--max-count',
+            type=click.IntRange(0),
+            help=helptexts.LOGS_MAX_COUNT)
+
+        self.logs_levels = click.option(
+            '--level',
+            'levels',
+            multiple=True,
+            help=helptexts.LOGS_LEVELS)
+
+        self.logs_export_path = click.option(
+            '-o',
+            '--output-path',
+            type=click.Path(dir_okay=False, writable=True),
+            help=helptexts.LOGS_EXPORT_PATH)
+
+        self.logs_max_batches = click.option(
+            '--max-batches',
+            type=click.IntRange(1),
+            help=helptexts.LOGS_MAX_BATCHES)
+
         self.reset_config = click.option(
             '--reset-config',
             is_flag=True,
@@ -328,6 +361,15 @@ class Options(object):
             default=defaults.SORT_DESCENDING,
             help=helptexts.DESCENDING)
 
+        self.page_size = click.option(
+            '--page-size',
+            type=click.IntRange(1),
+            help=helptexts.PAGE_SIZE)
+
+        self.cursor = click.option(
+            '--cursor',
+            help=helptexts.CURSOR)
+
         self.service_template_filename = click.option(
             '-n',
             '--service-template-filename',
@@ -430,6 +472,14 @@ class Options(object):
             default=default,
             help=helptexts.TASK_MAX_ATTEMPTS.format(default))
 
+    @staticmethod
+    def estimate_percentile(default=defaults.ESTIMATE_PERCENTILE):
+        return click.option(
+            '--percentile',
+            type=click.IntRange(0, 100),
+            default=default,
+            help=helptexts.ESTIMATE_PERCENTILE.format(default))
+
     @staticmethod
     def sort_by(default='created_at'):
         return click.option(
@@ -438,6 +488,32 @@ class Options(object):
             default=default,
             help=helptexts.SORT_BY)
 
+    @staticmethod
+    def logs_batch_size(default=defaults.LOGS_BATCH_SIZE):
+        return click.option(
+            '--batch-size',
+            type=click.IntRange(1),
+            default=default,
+            help=helptexts.LOGS_BATCH_SIZE.format(default))
+
+    @staticmethod
+    def logs_export_format(default=defaults.LOGS_EXPORT_FORMAT):
+        return click.option(
+            '--format',
+            'output_format',
+            type=click.Choice(['ndjson', 'columnar']),
+            default=default,
+            help=helptexts.LOGS_EXPORT_FORMAT.format(default))
+
+    @staticmethod
+    def logs_lines(default=defaults.LOGS_LINES):
+        return click.option(
+            '-n',
+            '--lines',
+            type=click.IntRange(0),
+            default=default,
+            help=helptexts.LOGS_LINES.format(default))
+
     @staticmethod
     def task_retry_interval(default=defaults.TASK_RETRY_INTERVAL):
         return click.option(
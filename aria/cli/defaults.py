@@ -26,5 +26,23 @@ TASK_MAX_ATTEMPTS = 30
 #: Default task retry interval
 TASK_RETRY_INTERVAL = 30
 
+#: Default percentile of the historical operation durations for estimates
+ESTIMATE_PERCENTILE = 50
+
+#: Default SQLite profile of the model storage (when not set in the configuration)
+STORAGE_PROFILE = 'default'
+
 #: Default sort descending
 SORT_DESCENDING = False
+
+#: Default page size of lists (when only a cursor is passed)
+PAGE_SIZE = 100
+
+#: Default number of logs read at a time
+LOGS_BATCH_SIZE = 1000
+
+#: Default number of the last logs printed by ``logs tail``
+LOGS_LINES = 10
+
+#: Default format of ``logs export``
+LOGS_EXPORT_FORMAT = 'ndjson'
@@ -44,6 +44,7 @@ class _Environment(object):
         self._model_storage_dir = os.path.join(workdir, 'models')
         self._resource_storage_dir = os.path.join(workdir, 'resources')
         self._plugins_dir = os.path.join(workdir, 'plugins')
+        self._log_bus_dir = os.path.join(workdir, 'log-bus')
 
         # initialized lazily
         self._model_storage = None
@@ -62,6 +63,10 @@ class _Environment(object):
     def logging(self):
         return self._logging
 
+    @property
+    def log_bus_dir(self):
+        return self._log_bus_dir
+
     @property
     def model_storage(self):
         if not self._model_storage:
@@ -103,7 +108,8 @@ class _Environment(object):
         initiator_kwargs = dict(base_dir=self._model_storage_dir)
         return application_model_storage(
             SQLAlchemyModelAPI,
-            initiator_kwargs=initiator_kwargs)
+            initiator_kwargs=initiator_kwargs,
+            profile=self._config.storage.profile)
 
     def _init_fs_resource_storage(self):
         if not os.path.exists(self._resource_storage_dir):
@@ -47,10 +47,24 @@ TASK_MAX_ATTEMPTS = \
 DRY_EXECUTION = "Execute a workflow dry run (prints operations information without causing side " \
                 "effects)"
 RETRY_FAILED_TASK = "Retry tasks that failed in the previous execution attempt"
+ESTIMATE_PERCENTILE = \
+    "Percentile of the historical operation durations to estimate by [default: {0}]"
 IGNORE_AVAILABLE_NODES = "Delete the service even if it has available nodes"
 SORT_BY = "Key for sorting the list"
 DESCENDING = "Sort list in descending order [default: False]"
+PAGE_SIZE = "List a page of this size, and the cursor of the next page"
+CURSOR = "List the page of this cursor (printed along with the previous page)"
+LOGS_BATCH_SIZE = "Number of logs to read from the storage at a time [default: {0}]"
+LOGS_LINES = "Number of the last logs to print [default: {0}]"
+FOLLOW_LOGS = "Keep printing the logs of the execution as they're logged, until it ends"
+LOGS_MAX_AGE = "Archive logs older than this number of days"
+LOGS_MAX_COUNT = "Archive all but this number of the newest logs of each execution"
+LOGS_LEVELS = "Only archive logs of this level (can be used multiple times)"
+LOGS_MAX_BATCHES = "Stop archiving after this number of batches, leaving the rest to the next time"
 JSON_OUTPUT = "Output logs in JSON format"
+LOGS_EXPORT_FORMAT = "Export a JSON object per log (ndjson), or per batch of logs, mapping each " \
+                     "field to its values (columnar) [default: {0}]"
+LOGS_EXPORT_PATH = "Path of the file to export the logs to [default: standard output]"
 MARK_PATTERN = "Mark a regular expression pattern in the logs"
 
 SHOW_FULL = "Show full information"
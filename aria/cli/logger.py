@@ -22,6 +22,8 @@ import copy
 import logging
 from logutils import dictconfig
 
+from ..orchestrator import log_archive
+
 HIGH_VERBOSE = 3
 MEDIUM_VERBOSE = 2
 LOW_VERBOSE = 1
@@ -117,18 +119,105 @@ class Logging(object):
 
 
 class ModelLogIterator(object):
+    """
+    Iterates over the logs of an execution which were not iterated over yet.
+
+    Logs are read from the storage in pages of ``batch_size``, so the logs of large executions are
+    not all held in memory, and the storage is not kept busy while they are printed.
+
+    When ``resource_storage`` is passed, the logs which were archived (see
+    :mod:`aria.orchestrator.log_archive`) are iterated over as well, merged by ID with the stored
+    logs, so ``filters`` and ``sort`` should not be passed along with it.
+    """
 
-    def __init__(self, model_storage, execution_id, filters=None, sort=None, offset=0):
+    BATCH_SIZE = 1000
+
+    def __init__(self, model_storage, execution_id, filters=None, sort=None, offset=0,
+                 batch_size=BATCH_SIZE, resource_storage=None):
         self._last_visited_id = offset
         self._model_storage = model_storage
+        self._resource_storage = resource_storage
         self._execution_id = execution_id
         self._additional_filters = filters or {}
         self._sort = sort or {}
+        self._batch_size = batch_size
 
     def __iter__(self):
+        logs = self._stored_logs()
+        if self._resource_storage is not None:
+            last_visited_id = self._last_visited_id
+            archived_logs = (log for log in log_archive.read(self._resource_storage,
+                                                             self._execution_id)
+                             if log.id > last_visited_id)
+            logs = log_archive.merge(ModelLogStream(self._model_storage, archived_logs), logs)
+        for log in logs:
+            self._last_visited_id = log.id
+            yield log
+
+    def _stored_logs(self):
         filters = dict(execution_fk=self._execution_id, id=dict(gt=self._last_visited_id))
         filters.update(self._additional_filters)
+        pagination = dict(size=self._batch_size, cursor=None)
 
-        for log in self._model_storage.log.iter(filters=filters, sort=self._sort):
-            self._last_visited_id = log.id
-            yield log
+        while True:
+            # the task's arguments or the execution's inputs are printed along with each log
+            logs = self._model_storage.log.list(filters=filters, sort=self._sort,
+                                                pagination=pagination,
+                                                load=('task.arguments', 'execution.inputs'))
+            for log in logs:
+                yield log
+            pagination['cursor'] = logs.metadata['cursor']
+            if pagination['cursor'] is None:
+                break
+
+
+class ModelLogStream(object):
+    """
+    Iterates over the logs of an execution as they're published to its log bus (see
+    :mod:`aria.orchestrator.log_bus`), rather than reading them from the storage.
+
+    Only the task (or the execution) of each log is read from the storage, once, since it's
+    printed along with the log.
+
+    :param events: :class:`~aria.orchestrator.log_bus.LogEvent` iterable, such as a subscription
+    """
+
+    def __init__(self, model_storage, events):
+        self._model_storage = model_storage
+        self._events = events
+        self._tasks = {}
+        self._executions = {}
+
+    def __iter__(self):
+        for event in self._events:
+            yield self._log(event)
+
+    def _log(self, event):
+        task = execution = None
+        if event.task_fk is not None:
+            task = self._tasks.get(event.task_fk)
+            if task is None:
+                task = self._tasks[event.task_fk] = \
+                    self._model_storage.task.get(event.task_fk, load=('arguments', ))
+        else:
+            execution = self._executions.get(event.execution_fk)
+            if execution is None:
+                execution = self._executions[event.execution_fk] = \
+                    self._model_storage.execution.get(event.execution_fk, load=('inputs', ))
+        return _StreamedLog(event, task, execution)
+
+
+class _StreamedLog(object):
+    """
+    A published log, along with the models it's printed with.
+    """
+
+    def __init__(self, event, task, execution):
+        # Only archived logs have IDs
+        self.id = getattr(event, 'id', None)
+        self.level = event.level
+        self.msg = event.msg
+        self.created_at = event.created_at
+        self.traceback = event.traceback
+        self.task = task
+        self.execution = execution
@@ -53,6 +53,7 @@ def _register_commands():
     _aria.add_command(commands.plugins.plugins)
     _aria.add_command(commands.logs.logs)
     _aria.add_command(commands.reset.reset)
+    _aria.add_command(commands.storage.storage)
 
 
 def main():
@@ -23,6 +23,7 @@ from StringIO import StringIO
 
 from backports.shutil_get_terminal_size import get_terminal_size
 
+from . import defaults
 from .env import logger
 from .exceptions import AriaCliError
 from ..utils import http
@@ -32,6 +33,18 @@ def storage_sort_param(sort_by, descending):
     return {sort_by: 'desc' if descending else 'asc'}
 
 
+def storage_pagination_param(page_size, cursor):
+    if page_size is None and cursor is None:
+        return None
+    return {'size': page_size or defaults.PAGE_SIZE, 'cursor': cursor}
+
+
+def log_next_page(list_result):
+    cursor = getattr(list_result, 'metadata', {}).get('cursor')
+    if cursor:
+        logger.info('Next page: --cursor {0}'.format(cursor))
+
+
 def get_parameter_templates_as_string(parameter_templates):
     params_string = StringIO()
 
@@ -71,29 +71,32 @@ class Core(object):
         service_template = self.model_storage.service_template.get(service_template_id)
 
         storage_session = self.model_storage._all_api_kwargs['session']
-        # setting no autoflush for the duration of instantiation - this helps avoid dependency
-        # constraints as they're being set up
-        with storage_session.no_autoflush:
-            topology_ = topology.Topology()
-            service = topology_.instantiate(
-                service_template, inputs=inputs, plugins=self.model_storage.plugin.list())
-            topology_.coerce(service, report_issues=True)
-
-            topology_.validate(service)
-            topology_.satisfy_requirements(service)
-            topology_.coerce(service, report_issues=True)
-
-            topology_.validate_capabilities(service)
-            topology_.assign_hosts(service)
-            topology_.configure_operations(service)
-            topology_.coerce(service, report_issues=True)
-            if topology_.dump_issues():
-                raise exceptions.InstantiationError('Failed to instantiate service template `{0}`'
-                                                    .format(service_template.name))
-
-        storage_session.flush()  # flushing so service.id would auto-populate
-        service.name = service_name or '{0}_{1}'.format(service_template.name, service.id)
-        self.model_storage.service.put(service)
+        # the service is committed at once, or rolled back if the instantiation fails
+        with self.model_storage.service.bulk():
+            # setting no autoflush for the duration of instantiation - this helps avoid dependency
+            # constraints as they're being set up
+            with storage_session.no_autoflush:
+                topology_ = topology.Topology()
+                service = topology_.instantiate(
+                    service_template, inputs=inputs, plugins=self.model_storage.plugin.list())
+                topology_.coerce(service, report_issues=True)
+
+                topology_.validate(service)
+                topology_.satisfy_requirements(service)
+                topology_.coerce(service, report_issues=True)
+
+                topology_.validate_capabilities(service)
+                topology_.assign_hosts(service)
+                topology_.configure_operations(service)
+                topology_.coerce(service, report_issues=True)
+                if topology_.dump_issues():
+                    raise exceptions.InstantiationError(
+                        'Failed to instantiate service template `{0}`'
+                        .format(service_template.name))
+
+            storage_session.flush()  # flushing so service.id would auto-populate
+            service.name = service_name or '{0}_{1}'.format(service_template.name, service.id)
+            self.model_storage.service.put(service)
         return service
 
     def delete_service(self, service_id, force=False):
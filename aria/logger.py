@@ -18,6 +18,8 @@ Mix-ins and functions for logging, supporting multiple backends (such as SQL) an
 formatting.
 """
 
+import Queue
+import threading
 import logging
 from logging import handlers as logging_handlers
 # NullHandler doesn't exist in < 27. this workaround is from
@@ -33,6 +35,14 @@ from datetime import datetime
 
 TASK_LOGGER_NAME = 'aria.executions.task'
 
+#: Logging blocks until the log buffer has room
+BLOCK_WHEN_FULL = 'block'
+
+#: Log records are dropped while the log buffer is full
+DROP_WHEN_FULL = 'drop'
+
+FULL_BUFFER_POLICIES = (BLOCK_WHEN_FULL, DROP_WHEN_FULL)
+
 
 _base_logger = logging.getLogger('aria')
 
@@ -114,11 +124,33 @@ def create_console_log_handler(level=logging.DEBUG, formatter=None):
     return console
 
 
-def create_sqla_log_handler(model, log_cls, execution_id, level=logging.DEBUG):
+def create_sqla_log_handler(model, log_cls, execution_id, level=logging.DEBUG, buffer=None,
+                            publish=None):
+    """
+    :param publish: called with each log model before it's inserted (e.g.
+     :func:`aria.orchestrator.log_bus.publish`)
+    :param buffer: ``None`` to insert each log record when it's logged, or options of the buffer
+     which the records are queued in, and inserted in batches from a background thread:
+     ``max_size``, ``batch_size``, ``flush_interval`` and ``when_full`` (see
+     :class:`_BufferedSQLAlchemyHandler`)
+    :type buffer: dict
+    """
 
     # This is needed since the engine and session are entirely new we need to reflect the db
     # schema of the logging model into the engine and session.
-    return _SQLAlchemyHandler(model=model, log_cls=log_cls, execution_id=execution_id, level=level)
+    if buffer is not None:
+        return _BufferedSQLAlchemyHandler(model=model, log_cls=log_cls, execution_id=execution_id,
+                                          level=level, publish=publish, **buffer)
+    return _SQLAlchemyHandler(model=model, log_cls=log_cls, execution_id=execution_id, level=level,
+                              publish=publish)
+
+
+def flush_task_log_handlers():
+    """
+    Writes the buffered records of the task logger's handlers.
+    """
+    for handler in logging.getLogger(TASK_LOGGER_NAME).handlers:
+        handler.flush()
 
 
 class _DefaultConsoleFormat(logging.Formatter):
@@ -160,26 +192,129 @@ def create_file_log_handler(
 
 
 class _SQLAlchemyHandler(logging.Handler):
-    def __init__(self, model, log_cls, execution_id, **kwargs):
+    def __init__(self, model, log_cls, execution_id, publish=None, **kwargs):
         logging.Handler.__init__(self, **kwargs)
         self._model = model
         self._cls = log_cls
         self._execution_id = execution_id
+        self._publish = publish
 
     def emit(self, record):
-        created_at = datetime.strptime(logging.Formatter('%(asctime)s').formatTime(record),
-                                       '%Y-%m-%d %H:%M:%S,%f')
+        self._model.log.put(self._log(record))
+
+    def _log(self, record):
         log = self._cls(
             execution_fk=self._execution_id,
             task_fk=record.task_id,
             level=record.levelname,
             msg=str(record.msg),
-            created_at=created_at,
+            # The local time, as formatted by logging.Formatter
+            created_at=datetime.fromtimestamp(record.created),
 
             # Not mandatory.
             traceback=getattr(record, 'traceback', None)
         )
-        self._model.log.put(log)
+        # Published before it's inserted, since committing expires its attributes
+        if self._publish is not None:
+            self._publish(log)
+        return log
+
+
+class _BufferedSQLAlchemyHandler(_SQLAlchemyHandler):
+    """
+    Queues log records, and inserts them in batches from a background thread, every
+    ``flush_interval`` seconds or once ``batch_size`` records are queued, so logging doesn't wait
+    for the model storage.
+
+    While ``max_size`` records are queued, logging either waits for the queue to have room
+    (:data:`BLOCK_WHEN_FULL`), or drops the record (:data:`DROP_WHEN_FULL`), in which case a
+    warning with the number of dropped records is inserted along with the next batch.
+
+    :meth:`flush` inserts the queued records right away, and :meth:`close` flushes them after
+    stopping the background thread.
+    """
+
+    def __init__(self, model, log_cls, execution_id, max_size=10000, batch_size=500,
+                 flush_interval=0.5, when_full=BLOCK_WHEN_FULL, publish=None, **kwargs):
+        if when_full not in FULL_BUFFER_POLICIES:
+            raise ValueError('Unknown full log buffer policy: {0}'.format(when_full))
+        _SQLAlchemyHandler.__init__(self, model, log_cls, execution_id, publish=publish, **kwargs)
+        self._queue = Queue.Queue(max_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._when_full = when_full
+        self._dropped_count = 0
+        # Not the handler's lock, which logging.shutdown holds while closing the handler
+        self._dropped_lock = threading.Lock()
+        # Logs of a failed flush, inserted again by the next one
+        self._unflushed = []
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._open = True
+        self._thread = threading.Thread(target=self._flush_periodically,
+                                        name='BufferedSQLAlchemyHandler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def dropped_count(self):
+        """
+        Number of records dropped since the last flush.
+        """
+        return self._dropped_count
+
+    def emit(self, record):
+        try:
+            self._queue.put(self._log(record), block=self._when_full == BLOCK_WHEN_FULL)
+        except Queue.Full:
+            with self._dropped_lock:
+                self._dropped_count += 1
+        if self._queue.qsize() >= self._batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._flush_lock:
+            logs, self._unflushed = self._unflushed, []
+            while True:
+                try:
+                    logs.append(self._queue.get_nowait())
+                except Queue.Empty:
+                    break
+
+            with self._dropped_lock:
+                dropped_count, self._dropped_count = self._dropped_count, 0
+            if dropped_count:
+                logs.append(self._cls(
+                    execution_fk=self._execution_id,
+                    level=logging.getLevelName(logging.WARNING),
+                    msg='{0} log records were dropped, since the log buffer was full'
+                    .format(dropped_count),
+                    created_at=datetime.now()))
+
+            if logs:
+                try:
+                    self._model.log.put_many(logs)
+                except BaseException:
+                    self._unflushed = logs
+                    raise
+
+    def close(self):
+        if self._open:
+            self._open = False
+            self._wakeup.set()
+            self._thread.join()
+        self.flush()
+        _SQLAlchemyHandler.close(self)
+
+    def _flush_periodically(self):
+        while self._open:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except BaseException:
+                # The logs are inserted again on the next interval, and finally on close
+                pass
 
 
 _default_file_formatter = logging.Formatter(
@@ -79,6 +79,7 @@ Orchestration models
    aria.modeling.models.Log
    aria.modeling.models.Plugin
    aria.modeling.models.Argument
+   aria.modeling.models.OperationStatistics
 """
 
 # pylint: disable=abstract-method
@@ -154,7 +155,8 @@ __all__ = (
     'Plugin',
     'Task',
     'Log',
-    'Argument'
+    'Argument',
+    'OperationStatistics'
 )
 
 
@@ -371,6 +373,11 @@ class Log(aria_declarative_base, orchestration.LogBase):
 class Argument(aria_declarative_base, orchestration.ArgumentBase):
     pass
 
+
+@utils.fix_doc
+class OperationStatistics(aria_declarative_base, orchestration.OperationStatisticsBase):
+    pass
+
 # endregion
 
 
@@ -423,5 +430,6 @@ models_to_register = (
     Plugin,
     Task,
     Log,
-    Argument
+    Argument,
+    OperationStatistics
 )
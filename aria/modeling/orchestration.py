@@ -29,11 +29,13 @@ from sqlalchemy import (
     Enum,
     String,
     Float,
+    Index,
     orm,
     PickleType)
 from sqlalchemy.ext.declarative import declared_attr
 
 from ..orchestrator.exceptions import (TaskAbortException, TaskRetryException)
+from ..utils import timing
 from . import mixins
 from . import (
     relationship,
@@ -227,6 +229,11 @@ class TaskBase(mixins.ModelMixin):
                           'plugin_fk',
                           'execution_fk')
 
+    @declared_attr
+    def __table_args__(cls):
+        # The tasks of an execution, by status (e.g. the tasks to resume)
+        return (Index('ix_task_execution_fk_status', 'execution_fk', 'status'), )
+
     START_WORKFLOW = 'start_workflow'
     END_WORKFLOW = 'end_workflow'
     START_SUBWROFKLOW = 'start_subworkflow'
@@ -485,7 +492,7 @@ class TaskBase(mixins.ModelMixin):
                 'max_attempts': api_task.max_attempts,
                 'retry_interval': api_task.retry_interval,
                 'ignore_failure': api_task.ignore_failure,
-                'execution': api_task._workflow_context.execution,
+                'execution': kwargs.pop('execution', None) or api_task._workflow_context.execution,
                 'interface_name': api_task.interface_name,
                 'operation_name': api_task.operation_name,
 
@@ -513,6 +520,11 @@ class LogBase(mixins.ModelMixin):
     __private_fields__ = ('execution_fk',
                           'task_fk')
 
+    @declared_attr
+    def __table_args__(cls):
+        # The logs of an execution after the last one read (e.g. when following them)
+        return (Index('ix_log_execution_fk_id', 'execution_fk', 'id'), )
+
     # region many_to_one relationships
 
     @declared_attr
@@ -590,6 +602,13 @@ class PluginBase(mixins.ModelMixin):
 
     __tablename__ = 'plugin'
 
+    @declared_attr
+    def __table_args__(cls):
+        # Plugins by package (e.g. when finding the plugin of an operation)
+        return (
+            Index('ix_plugin_package_name_package_version', 'package_name', 'package_version'),
+        )
+
     # region one_to_many relationships
 
     @declared_attr
@@ -713,3 +732,99 @@ class ArgumentBase(mixins.ParameterMixin):
         return relationship.foreign_key('operation', nullable=True)
 
     # endregion
+
+
+class OperationStatisticsBase(mixins.ModelMixin):
+    """
+    Durations of the recent successful executions of an operation on a node type.
+
+    Only the durations within a rolling window are kept, so the percentiles follow the recent
+    behavior of the operation.
+    """
+
+    __tablename__ = 'operation_statistics'
+
+    #: Number of most recent durations kept per operation
+    WINDOW_SIZE = 100
+
+    function = Column(String, index=True, doc="""
+    Full path to Python function.
+
+    :type: :obj:`basestring`
+    """)
+
+    node_type_name = Column(String, doc="""
+    Name of the type of the node (or relationship) the operation was executed on.
+
+    :type: :obj:`basestring`
+    """)
+
+    interface_name = Column(String, doc="""
+    Name of interface on node or relationship.
+
+    :type: :obj:`basestring`
+    """)
+
+    operation_name = Column(String, doc="""
+    Name of operation in interface on node or relationship.
+
+    :type: :obj:`basestring`
+    """)
+
+    count = Column(Integer, default=0, doc="""
+    Total number of successful executions of the operation.
+
+    :type: :obj:`int`
+    """)
+
+    durations = Column(modeling_types.StrictList(float), doc="""
+    Durations (in seconds) of the most recent successful executions, oldest first.
+
+    :type: [:obj:`float`]
+    """)
+
+    p50 = Column(Float, doc="""
+    Median duration (in seconds) within the window.
+
+    :type: :obj:`float`
+    """)
+
+    p90 = Column(Float, doc="""
+    90th percentile duration (in seconds) within the window.
+
+    :type: :obj:`float`
+    """)
+
+    p99 = Column(Float, doc="""
+    99th percentile duration (in seconds) within the window.
+
+    :type: :obj:`float`
+    """)
+
+    updated_at = Column(DateTime, doc="""
+    Timestamp of the last update.
+
+    :type: :class:`~datetime.datetime`
+    """)
+
+    def add_durations(self, durations):
+        """
+        Adds durations (in seconds) to the window and updates the percentiles.
+        """
+        durations = list(durations)
+        self.count = (self.count or 0) + len(durations)
+        self.durations = ((self.durations or []) + [float(d) for d in durations])[
+            -self.WINDOW_SIZE:]
+        self.p50 = self.percentile(50)
+        self.p90 = self.percentile(90)
+        self.p99 = self.percentile(99)
+        self.updated_at = datetime.utcnow()
+
+    def percentile(self, percent):
+        """
+        Percentile of the durations within the window, interpolated between the closest ranks.
+
+        :param percent: percentile, between 0 and 100
+        :return: duration in seconds, or ``None`` if there are no durations
+        """
+        return timing.percentile(self.durations or [], percent)
@@ -24,7 +24,8 @@ from sqlalchemy import (
     Text,
     Integer,
     Enum,
-    Boolean
+    Boolean,
+    Index
 )
 from sqlalchemy import DateTime
 from sqlalchemy.ext.declarative import declared_attr
@@ -289,6 +290,11 @@ class NodeBase(InstanceModelMixin):
                           'service_fk',
                           'node_template_fk')
 
+    @declared_attr
+    def __table_args__(cls):
+        # The nodes of a service, by name (e.g. when getting the nodes of a workflow context)
+        return (Index('ix_node_service_fk_name', 'service_fk', 'name'), )
+
     INITIAL = 'initial'
     CREATING = 'creating'
     CREATED = 'created'
@@ -31,10 +31,49 @@ from ruamel import yaml
 from . import exceptions
 
 
+class JsonCodec(object):
+    """
+    Encodes column values as JSON text, which is readable in the database.
+
+    :param compact: whether to leave out the whitespace after separators (by default the text is
+     as encoded by ``json.dumps``)
+    """
+
+    def __init__(self, compact=False):
+        self._encoder = json.JSONEncoder(separators=(',', ':') if compact else None)
+        self._decoder = json.JSONDecoder()
+
+    def encode(self, value):
+        return self._encoder.encode(value)
+
+    def decode(self, value):
+        return self._decoder.decode(value)
+
+
+#: JSON text as encoded by ``json.dumps`` (the default codec)
+JSON_CODEC = JsonCodec()
+
+#: JSON text without whitespace after separators; opt-in, so that existing columns keep a single
+#: format
+COMPACT_JSON_CODEC = JsonCodec(compact=True)
+
+
 class _MutableType(TypeDecorator):
     """
     Dict representation of type.
+
+    :param codec: codec of the column values, overriding the :attr:`codec` of the type (e.g.
+     :data:`COMPACT_JSON_CODEC`)
     """
+
+    #: Codec of the column values (see :class:`JsonCodec`)
+    codec = JSON_CODEC
+
+    def __init__(self, codec=None, *args, **kwargs):
+        super(_MutableType, self).__init__(*args, **kwargs)
+        if codec is not None:
+            self.codec = codec
+
     @property
     def python_type(self):
         raise NotImplementedError
@@ -46,12 +85,12 @@ class _MutableType(TypeDecorator):
 
     def process_bind_param(self, value, dialect):
         if value is not None:
-            value = json.dumps(value)
+            value = self.codec.encode(value)
         return value
 
     def process_result_value(self, value, dialect):
         if value is not None:
-            value = json.loads(value)
+            value = self.codec.decode(value)
         return value
 
 
@@ -27,8 +27,9 @@ from aria import (
     logger as aria_logger,
     modeling
 )
-from aria.storage import exceptions
+from aria.storage import exceptions, sql_mapi
 
+from .. import log_bus
 from ...utils.uuid import generate_uuid
 
 
@@ -61,6 +62,16 @@ class BaseContext(object):
         modeling.models.OperationTemplate.inputs
     )
 
+    #: Models which don't change during executions, and are read through the
+    #: :attr:`template_cache`
+    TEMPLATE_MODELS = (
+        modeling.models.ServiceTemplate,
+        modeling.models.NodeTemplate,
+        modeling.models.Type,
+        modeling.models.InterfaceTemplate,
+        modeling.models.OperationTemplate
+    )
+
     class PrefixedLogger(object):
         def __init__(self, base_logger, task_id=None):
             self._logger = base_logger
@@ -84,6 +95,8 @@ class BaseContext(object):
                  resource_storage,
                  execution_id,
                  workdir=None,
+                 template_cache=None,
+                 log_buffer=None,
                  **kwargs):
         super(BaseContext, self).__init__(**kwargs)
         self._name = name
@@ -93,6 +106,8 @@ class BaseContext(object):
         self._service_id = service_id
         self._workdir = workdir
         self._execution_id = execution_id
+        self._template_cache = template_cache
+        self._log_buffer = log_buffer
         self.logger = None
 
     def _register_logger(self, level=None, task_id=None):
@@ -105,7 +120,9 @@ class BaseContext(object):
     def _get_sqla_handler(self):
         return aria_logger.create_sqla_log_handler(model=self._model,
                                                    log_cls=modeling.models.Log,
-                                                   execution_id=self._execution_id)
+                                                   execution_id=self._execution_id,
+                                                   buffer=self._log_buffer,
+                                                   publish=log_bus.publish)
 
     def __repr__(self):
         return (
@@ -138,12 +155,31 @@ class BaseContext(object):
         """
         return self._resource
 
+    @property
+    def template_cache(self):
+        """
+        Identity map of the :attr:`TEMPLATE_MODELS` used by the execution (shared with the contexts
+        of its operations which run in the same process).
+
+        :rtype: :class:`~aria.storage.sql_mapi.IdentityMapCache`
+        """
+        if self._template_cache is None:
+            self._template_cache = sql_mapi.IdentityMapCache(self.model.log.engine,
+                                                             self.TEMPLATE_MODELS)
+        return self._template_cache
+
+    def _get_template(self, model_cls, entry_id):
+        # The cached template is returned in the storage's session, like the models loaded through
+        # the storage
+        return self.template_cache.get(model_cls, entry_id, session=self.model.log._session())
+
     @property
     def service_template(self):
         """
         Service template model.
         """
-        return self.service.service_template
+        return self._get_template(modeling.models.ServiceTemplate,
+                                  self.service.service_template_fk)
 
     @property
     def service(self):
@@ -21,8 +21,13 @@ import threading
 from contextlib import contextmanager
 
 import aria
+from aria import (
+    logger as aria_logger,
+    modeling
+)
 from aria.utils import file
 from . import common
+from .. import log_bus
 
 
 class BaseOperationContext(common.BaseContext):
@@ -35,8 +40,15 @@ class BaseOperationContext(common.BaseContext):
         self._actor_id = actor_id
         self._thread_local = threading.local()
         self._destroy_session = kwargs.pop('destroy_session', False)
+        self._dispose_storage = kwargs.pop('dispose_storage', self._destroy_session)
         logger_level = kwargs.pop('logger_level', None)
+        log_bus_address = kwargs.pop('log_bus_address', None)
         super(BaseOperationContext, self).__init__(**kwargs)
+        # In a subprocess, the logs are forwarded to the execution's log bus in the parent process
+        self._log_bus = None
+        if log_bus_address and log_bus.get(self._execution_id) is None:
+            self._log_bus = log_bus.LogBus(self._execution_id, address=log_bus_address)
+            self._log_bus.open()
         self._register_logger(task_id=self.task.id, level=logger_level)
 
     def __repr__(self):
@@ -55,7 +67,9 @@ class BaseOperationContext(common.BaseContext):
         # original thread.
 
         if not hasattr(self._thread_local, 'task'):
-            self._thread_local.task = self.model.task.get(self._task_id)
+            # Executors always need the arguments and the plugin of the task
+            self._thread_local.task = self.model.task.get(self._task_id,
+                                                          load=('arguments', 'plugin'))
         return self._thread_local.task
 
     @property
@@ -73,6 +87,7 @@ class BaseOperationContext(common.BaseContext):
 
     @property
     def serialization_dict(self):
+        execution_log_bus = log_bus.get(self._execution_id)
         context_dict = {
             'name': self.name,
             'service_id': self._service_id,
@@ -82,7 +97,9 @@ class BaseOperationContext(common.BaseContext):
             'model_storage': self.model.serialization_dict if self.model else None,
             'resource_storage': self.resource.serialization_dict if self.resource else None,
             'execution_id': self._execution_id,
-            'logger_level': self.logger.level
+            'logger_level': self.logger.level,
+            'log_buffer': self._log_buffer,
+            'log_bus_address': execution_log_bus.address if execution_log_bus else None
         }
         return {
             'context_cls': self.__class__,
@@ -90,7 +107,12 @@ class BaseOperationContext(common.BaseContext):
         }
 
     @classmethod
-    def instantiate_from_dict(cls, model_storage=None, resource_storage=None, **kwargs):
+    def instantiate_from_dict(cls, model_storage=None, resource_storage=None, reuse_storage=False,
+                              **kwargs):
+        """
+        :param reuse_storage: whether the model storage is used again after the context is closed,
+         in which case its pooled connections are kept open
+        """
         if model_storage:
             model_storage = aria.application_model_storage(**model_storage)
         if resource_storage:
@@ -99,12 +121,22 @@ class BaseOperationContext(common.BaseContext):
         return cls(model_storage=model_storage,
                    resource_storage=resource_storage,
                    destroy_session=True,
+                   dispose_storage=not reuse_storage,
                    **kwargs)
 
     def close(self):
+        # Buffered logs are written while the storage is still usable
+        aria_logger.flush_task_log_handlers()
+        if self._log_bus is not None:
+            self._log_bus.close()
+            self._log_bus = None
         if self._destroy_session:
+            # Returns the session's connection to the pool
             self.model.log._session.remove()
-            self.model.log._engine.dispose()
+            if self._template_cache is not None:
+                self._template_cache.close()
+        if self._dispose_storage:
+            self.model.log.engine.dispose()
 
     @property
     @contextmanager
@@ -130,7 +162,7 @@ class NodeOperationContext(BaseOperationContext):
         """
         The node template of the current operation.
         """
-        return self.node.node_template
+        return self._get_template(modeling.models.NodeTemplate, self.node.node_template_fk)
 
 
 class RelationshipOperationContext(BaseOperationContext):
@@ -157,7 +189,8 @@ class RelationshipOperationContext(BaseOperationContext):
         """
         The relationship source node template.
         """
-        return self.source_node.node_template
+        return self._get_template(modeling.models.NodeTemplate,
+                                  self.source_node.node_template_fk)
 
     @property
     def target_node(self):
@@ -171,4 +204,5 @@ class RelationshipOperationContext(BaseOperationContext):
         """
         The relationship target node template.
         """
-        return self.target_node.node_template
+        return self._get_template(modeling.models.NodeTemplate,
+                                  self.target_node.node_template_fk)
@@ -17,8 +17,10 @@
 Workflow and operation decorators.
 """
 
+import inspect
 from functools import partial, wraps
 
+from ..utils import generators
 from ..utils.validation import validate_function_arguments
 from ..utils.uuid import generate_uuid
 
@@ -59,6 +61,10 @@ def workflow(func=None, suffix_template=''):
 def operation(func=None, toolbelt=False, suffix_template='', logging_handlers=None):
     """
     Operation decorator.
+
+    Generator functions (e.g. coroutines, see
+    :class:`~aria.orchestrator.workflows.executor.asyncio.AsyncioExecutor`) are supported: the model
+    is instrumented during each step of the generator rather than during the call.
     """
 
     if func is None:
@@ -74,6 +80,11 @@ def operation(func=None, toolbelt=False, suffix_template='', logging_handlers=No
             operation_toolbelt = context.toolbelt(ctx)
             func_kwargs.setdefault('toolbelt', operation_toolbelt)
         validate_function_arguments(func, func_kwargs)
+        if inspect.isgeneratorfunction(func):
+            # The model is instrumented only while the generator runs, so generators which are
+            # interleaved on the same thread don't see each other's instrumentation
+            return generators.delegate(func(**func_kwargs),
+                                       partial(ctx.model.instrument, *ctx.INSTRUMENTATION_FIELDS))
         with ctx.model.instrument(*ctx.INSTRUMENTATION_FIELDS):
             return func(**func_kwargs)
     return _wrapper
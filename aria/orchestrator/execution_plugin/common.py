@@ -20,12 +20,16 @@ Execution plugin utilities.
 import json
 import os
 import tempfile
+import threading
 
 import requests
 
 from . import constants
 from . import exceptions
 
+# Guards the attributes which the threads of a ctx proxy patch on their shared context
+_patch_lock = threading.Lock()
+
 
 def is_windows():
     return os.name == 'nt'
@@ -110,7 +114,10 @@ def create_process_config(script_path, process, operation_kwargs, quote_json_env
 
 
 def patch_ctx(ctx):
-    ctx._error = None
+    # Called in each thread of the ctx proxy, each of which has its own ``ctx.task``
+    with _patch_lock:
+        if not hasattr(ctx, '_error'):
+            ctx._error = None
     task = ctx.task
 
     def _validate_legal_action():
@@ -134,7 +141,8 @@ def patch_ctx(ctx):
 
 
 def check_error(ctx, error_check_func=None, reraise=False):
-    _error = ctx._error
+    # The ctx is only patched once the script makes a request
+    _error = getattr(ctx, '_error', None)
     # this happens when a script calls task.abort/task.retry more than once
     if isinstance(_error, RuntimeError):
         ctx.task.abort(str(_error))
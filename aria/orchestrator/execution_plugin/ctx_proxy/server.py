@@ -15,118 +15,91 @@
 
 """
 ``ctx`` proxy server implementation.
+
+The server speaks HTTP/1.1, so clients may keep their connection alive between requests, and
+pipeline requests on it; the responses are sent in the order of the requests. Connections are
+served concurrently by a pool of worker threads, each of which uses its own session of
+``ctx.model`` (the sessions of the model storage are thread-local).
 """
 
 import json
-import socket
+import time
 import Queue
+import socket
 import StringIO
 import threading
 import traceback
-import wsgiref.simple_server
+import BaseHTTPServer
+from collections import deque
 
-import bottle
 from aria import modeling
+from aria.utils import timing
 
 from .. import exceptions
 
+#: Default number of worker threads serving connections
+WORKERS = 8
+
+#: Seconds an idle kept-alive connection holds its worker before it's closed
+IDLE_TIMEOUT = 5
+
 
 class CtxProxy(object):
+    """
+    Serves the ``ctx`` of an operation to the scripts it runs.
+
+    ``ctx_patcher`` is called with the ``ctx`` in each worker thread before it serves its first
+    request, since models such as ``ctx.task`` are loaded in each thread's own session. It must
+    therefore be idempotent with regard to the state of the ``ctx`` itself.
 
-    def __init__(self, ctx, ctx_patcher=(lambda *args, **kwargs: None)):
+    :param ctx: operation context
+    :param ctx_patcher: function patching the context in each worker thread
+    :param workers: number of worker threads, which is the number of connections served at once
+    """
+
+    def __init__(self, ctx, ctx_patcher=(lambda *args, **kwargs: None), workers=WORKERS):
         self.ctx = ctx
         self._ctx_patcher = ctx_patcher
-        self.port = _get_unused_port()
+        self.metrics = LatencyMetrics()
+        self.server = _Server(self, workers)
+        self.port = self.server.server_address[1]
         self.socket_url = 'http://localhost:{0}'.format(self.port)
-        self.server = None
-        self._started = Queue.Queue(1)
-        self.thread = self._start_server()
-        self._started.get(timeout=5)
-
-    def _start_server(self):
-
-        class BottleServerAdapter(bottle.ServerAdapter):
-            proxy = self
-
-            def close_session(self):
-                self.proxy.ctx.model.log._session.remove()
-
-            def run(self, app):
-
-                class Server(wsgiref.simple_server.WSGIServer):
-                    allow_reuse_address = True
-                    bottle_server = self
-
-                    def handle_error(self, request, client_address):
-                        pass
-
-                    def serve_forever(self, poll_interval=0.5):
-                        try:
-                            wsgiref.simple_server.WSGIServer.serve_forever(self, poll_interval)
-                        finally:
-                            # Once shutdown is called, we need to close the session.
-                            # If the session is not closed properly, it might raise warnings,
-                            # or even lock the database.
-                            self.bottle_server.close_session()
-
-                class Handler(wsgiref.simple_server.WSGIRequestHandler):
-                    def address_string(self):
-                        return self.client_address[0]
-
-                    def log_request(*args, **kwargs):  # pylint: disable=no-method-argument
-                        if not self.quiet:
-                            return wsgiref.simple_server.WSGIRequestHandler.log_request(*args,
-                                                                                        **kwargs)
-                server = wsgiref.simple_server.make_server(
-                    host=self.host,
-                    port=self.port,
-                    app=app,
-                    server_class=Server,
-                    handler_class=Handler)
-                self.proxy.server = server
-                self.proxy._started.put(True)
-                server.serve_forever(poll_interval=0.1)
-
-        def serve():
-            # Since task is a thread_local object, we need to patch it inside the server thread.
-            self._ctx_patcher(self.ctx)
-
-            bottle_app = bottle.Bottle()
-            bottle_app.post('/', callback=self._request_handler)
-            bottle.run(
-                app=bottle_app,
-                host='localhost',
-                port=self.port,
-                quiet=True,
-                server=BottleServerAdapter)
-        thread = threading.Thread(target=serve)
-        thread.daemon = True
-        thread.start()
-        return thread
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs=dict(poll_interval=0.1))
+        self.thread.daemon = True
+        self.thread.start()
 
     def close(self):
         if self.server:
             self.server.shutdown()
             self.server.server_close()
+            self.server = None
+
+    def _patch_ctx(self):
+        self._ctx_patcher(self.ctx)
 
-    def _request_handler(self):
-        request = bottle.request.body.read()  # pylint: disable=no-member
-        response = self._process(request)
-        return bottle.LocalResponse(
-            body=json.dumps(response, cls=modeling.utils.ModelJSONEncoder),
-            status=200,
-            headers={'content-type': 'application/json'}
-        )
+    def _instrument(self):
+        # The instrumentation of the model storage is thread-local, so each worker thread
+        # instruments it once, for as long as the thread runs, rather than for each request
+        return self.ctx.model.instrument(*self.ctx.INSTRUMENTATION_FIELDS)
+
+    def _close_session(self):
+        # Closes the session of the current worker thread. If the session is not closed properly,
+        # it might raise warnings, or even lock the database.
+        self.ctx.model.log._session.remove()
 
     def _process(self, request):
+        """
+        Processes a request, and serializes its response.
+        """
         try:
-            with self.ctx.model.instrument(*self.ctx.INSTRUMENTATION_FIELDS):
-                payload = _process_request(self.ctx, request)
-                result_type = 'result'
-                if isinstance(payload, exceptions.ScriptException):
-                    payload = dict(message=str(payload))
-                    result_type = 'stop_operation'
-                result = {'type': result_type, 'payload': payload}
+            payload = _process_request(self.ctx, request)
+            result_type = 'result'
+            if isinstance(payload, exceptions.ScriptException):
+                payload = dict(message=str(payload))
+                result_type = 'stop_operation'
+            result = {'type': result_type, 'payload': payload}
+            return json.dumps(result, cls=modeling.utils.ModelJSONEncoder)
         except Exception as e:
             traceback_out = StringIO.StringIO()
             traceback.print_exc(file=traceback_out)
@@ -135,9 +108,7 @@ class CtxProxy(object):
                 'message': str(e),
                 'traceback': traceback_out.getvalue()
             }
-            result = {'type': 'error', 'payload': payload}
-
-        return result
+            return json.dumps({'type': 'error', 'payload': payload})
 
     def __enter__(self):
         return self
@@ -146,6 +117,137 @@ class CtxProxy(object):
         self.close()
 
 
+class LatencyMetrics(object):
+    """
+    Latencies (in seconds) of the requests served by a :class:`CtxProxy`, from reading a request
+    to sending its response.
+
+    Percentiles are of the latencies of the last ``window_size`` requests.
+    """
+
+    def __init__(self, window_size=1000):
+        self._lock = threading.Lock()
+        self._window = deque(maxlen=window_size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency):
+        with self._lock:
+            self._window.append(latency)
+            self.count += 1
+            self.total += latency
+            self.max = max(self.max, latency)
+
+    @property
+    def mean(self):
+        """
+        Mean latency of all the requests, or ``None`` if none were served.
+        """
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent):
+        """
+        Percentile of the latencies within the window, interpolated between the closest ranks.
+
+        :param percent: percentile, between 0 and 100
+        :return: latency in seconds, or ``None`` if no requests were served
+        """
+        with self._lock:
+            latencies = list(self._window)
+        return timing.percentile(latencies, percent)
+
+
+class _Server(BaseHTTPServer.HTTPServer):
+    """
+    HTTP server handing its connections to a pool of worker threads.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, proxy, workers):
+        # Binding to port 0 picks an unused port
+        BaseHTTPServer.HTTPServer.__init__(self, ('localhost', 0), _RequestHandler)
+        self.proxy = proxy
+        self._connections = Queue.Queue()
+        self._open_connections = set()
+        self._lock = threading.Lock()
+        self._workers = [threading.Thread(target=self._work) for _ in xrange(workers)]
+        for worker in self._workers:
+            worker.daemon = True
+            worker.start()
+
+    def process_request(self, request, client_address):
+        self._connections.put((request, client_address))
+
+    def handle_error(self, request, client_address):
+        pass
+
+    def server_close(self):
+        BaseHTTPServer.HTTPServer.server_close(self)
+        with self._lock:
+            # Wakes the workers waiting for the next request on kept-alive connections
+            for connection in self._open_connections:
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except socket.error:
+                    pass
+        for _ in self._workers:
+            self._connections.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _work(self):
+        patched = False
+        try:
+            with self.proxy._instrument():
+                while True:
+                    connection = self._connections.get()
+                    if connection is None:
+                        break
+                    request, client_address = connection
+                    with self._lock:
+                        self._open_connections.add(request)
+                    try:
+                        if not patched:
+                            self.proxy._patch_ctx()
+                            patched = True
+                        self.finish_request(request, client_address)
+                    except Exception:
+                        self.handle_error(request, client_address)
+                    finally:
+                        with self._lock:
+                            self._open_connections.discard(request)
+                        self.shutdown_request(request)
+        finally:
+            self.proxy._close_session()
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    # Keeps connections alive
+    protocol_version = 'HTTP/1.1'
+    timeout = IDLE_TIMEOUT
+    # Sends each response at once (flushed after each request), so kept-alive connections don't
+    # wait for delayed acknowledgements
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_POST(self):                                                                              # pylint: disable=invalid-name
+        start = time.time()
+        request = self.rfile.read(int(self.headers.getheader('content-length', 0)))
+        response = self.server.proxy._process(request)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+        self.server.proxy.metrics.add(time.time() - start)
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+
 class CtxError(RuntimeError):
     pass
 
@@ -220,11 +322,13 @@ def _process_next_operation(obj, args, modifying):
 
     # Attribute?
     if isinstance(arg, basestring):
-        if hasattr(obj, arg):
-            return getattr(obj, arg), args
-        token_sugared = arg.replace('-', '_')
-        if hasattr(obj, token_sugared):
-            return getattr(obj, token_sugared), args
+        # Attributes such as ``ctx.node`` are loaded from the storage, so they're only got once
+        for token in (arg, arg.replace('-', '_')):
+            try:
+                return getattr(obj, token), args
+            except Exception:                                                                       # pylint: disable=broad-except
+                # As with ``hasattr``, any error means there's no such attribute
+                continue
 
     # Item? (dict, lists, and similar)
     if hasattr(obj, '__getitem__'):
@@ -234,11 +338,3 @@ def _process_next_operation(obj, args, modifying):
         return obj[arg], args
 
     raise CtxParsingError('Cannot parse argument: `{0!r}`'.format(arg))
-
-
-def _get_unused_port():
-    sock = socket.socket()
-    sock.bind(('127.0.0.1', 0))
-    _, port = sock.getsockname()
-    sock.close()
-    return port
@@ -21,6 +21,7 @@ import os
 import random
 import string
 import tempfile
+import threading
 import StringIO
 
 import fabric.api
@@ -34,6 +35,9 @@ from .. import ctx_proxy
 from . import tunnel
 
 
+# Guards patching the context shared by the threads of a ctx proxy
+_patch_lock = threading.Lock()
+
 _PROXY_CLIENT_PATH = ctx_proxy.client.__file__
 if _PROXY_CLIENT_PATH.endswith('.pyc'):
     _PROXY_CLIENT_PATH = _PROXY_CLIENT_PATH[:-1]
@@ -104,6 +108,13 @@ def run_script(ctx, script_path, fabric_env, process, use_sudo, hide_output, **k
 
 def _patch_ctx(ctx):
     common.patch_ctx(ctx)
+    with _patch_lock:
+        # Patched once, by the first thread of the ctx proxy
+        if 'download_resource' not in vars(ctx):
+            _patch_download_resource(ctx)
+
+
+def _patch_download_resource(ctx):
     original_download_resource = ctx.download_resource
     original_download_resource_and_render = ctx.download_resource_and_render
 
@@ -0,0 +1,416 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Retention of execution logs.
+
+Logs are kept in the model storage until they expire by a :class:`RetentionPolicy`. Compacting the
+logs (see :func:`compact`) moves the expired logs of ended executions out of the model storage,
+into a compressed archive per execution in the resource storage, from which they're still read
+(see :func:`read`).
+
+An archive is a gzip file of JSON lines, one per log. Each compaction appends a gzip member to the
+archive, so the logs which were already archived are not compressed again, and records the offsets
+of the members in an index next to the archive. Once an archive has more than
+:data:`MAX_MEMBERS` members, they're merged into one.
+"""
+
+import os
+import gzip
+import zlib
+import json
+import heapq
+import operator
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from collections import namedtuple
+
+from sqlalchemy import and_, or_
+
+from ..modeling import models
+from ..storage import exceptions
+
+#: Path of the archive within the resource storage entry of the execution
+ARCHIVE_PATH = 'logs.jsonl.gz'
+
+#: Path of the index of the archive's members within the resource storage entry of the execution
+INDEX_PATH = 'logs.jsonl.gz.index'
+
+#: Number of members of an archive above which they're merged into one, so reading the archive
+#: doesn't keep too many members open at once
+MAX_MEMBERS = 8
+
+#: Default number of logs read, and deleted, in each transaction
+BATCH_SIZE = 1000
+
+#: Number of compressed bytes read from an archive at a time
+READ_SIZE = 64 * 1024
+
+#: An archived log; the fields are those of :class:`~aria.modeling.orchestration.LogBase`
+ArchivedLog = namedtuple('ArchivedLog',
+                         'id, execution_fk, task_fk, level, msg, created_at, traceback')
+
+_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+_ARCHIVED_COLUMNS = (models.Log.id, models.Log.task_fk, models.Log.level, models.Log.msg,
+                     models.Log.created_at, models.Log.traceback)
+
+
+class RetentionPolicy(object):
+    """
+    Decides which logs expire.
+
+    Logs of the policy's levels expire once they're older than ``max_age``, or once ``max_count``
+    newer logs of these levels were logged in their execution. A policy with neither expires all
+    the logs of its levels (e.g. ``RetentionPolicy(levels=['DEBUG'])``).
+
+    :param max_age: seconds, or :class:`~datetime.timedelta`
+    :param max_count: number of the newest logs kept per execution
+    :param levels: names of the levels the policy applies to; all levels if ``None``
+    """
+
+    def __init__(self, max_age=None, max_count=None, levels=None):
+        if max_age is not None and not isinstance(max_age, timedelta):
+            max_age = timedelta(seconds=max_age)
+        self.max_age = max_age
+        self.max_count = max_count
+        self.levels = [level.upper() for level in levels] if levels else None
+
+    def expired(self, session, execution_id, now):
+        """
+        Builds the filter of the expired logs of an execution.
+
+        :param session: session of the model storage, used to find the oldest log of the newest
+         ``max_count`` logs
+        :param execution_id: execution ID
+        :param now: time the age of the logs is measured by
+        :return: SQLAlchemy clause, or ``None`` if none of the logs expired
+        """
+        clauses = [models.Log.execution_fk == execution_id]
+        if self.levels is not None:
+            clauses.append(models.Log.level.in_(self.levels))
+
+        expiries = []
+        if self.max_age is not None:
+            expiries.append(models.Log.created_at < now - self.max_age)
+        if self.max_count is not None:
+            # ID of the newest log which isn't kept
+            newest_expired_id = session.query(models.Log.id) \
+                .filter(*clauses) \
+                .order_by(models.Log.id.desc()) \
+                .offset(self.max_count) \
+                .limit(1) \
+                .scalar()
+            if newest_expired_id is not None:
+                expiries.append(models.Log.id <= newest_expired_id)
+            elif self.max_age is None:
+                return None
+        if expiries:
+            clauses.append(or_(*expiries))
+        return and_(*clauses)
+
+
+def compact(model_storage, resource_storage, policies, batch_size=BATCH_SIZE, max_batches=None):
+    """
+    Moves the logs of ended executions which expired by any of the policies to the archives of
+    their executions.
+
+    Logs are read, and then deleted, in batches of ``batch_size``, so the model storage isn't
+    locked for long. Logs are only deleted once they're archived; a compaction which is stopped in
+    between archives them again the next time, and :func:`read` skips the duplicates.
+
+    :param model_storage: model storage
+    :param resource_storage: resource storage
+    :param policies: :class:`RetentionPolicy` list
+    :param batch_size: number of logs read, and deleted, in each transaction
+    :param max_batches: number of batches after which compaction stops, leaving the remaining
+     expired logs to the next compaction; unlimited if ``None``
+    :return: number of archived logs
+    """
+    session = model_storage.log._session
+    now = datetime.now()
+    archived_count = 0
+    batches_count = 0
+    ended_executions = session.query(models.Execution.id) \
+        .filter(models.Execution.status.in_(models.Execution.END_STATES)) \
+        .order_by(models.Execution.id)
+    for execution_id, in ended_executions.all():
+        expired = [clause for clause in (policy.expired(session, execution_id, now)
+                                         for policy in policies)
+                   if clause is not None]
+        if not expired:
+            continue
+        expired = or_(*expired)
+        max_execution_batches = max_batches - batches_count if max_batches else None
+        batches = _archive(model_storage, resource_storage, execution_id, expired, batch_size,
+                           max_execution_batches)
+        for log_ids in batches:
+            session.query(models.Log) \
+                .filter(models.Log.id.in_(log_ids)) \
+                .delete(synchronize_session=False)
+            model_storage.log._safe_commit()
+            archived_count += len(log_ids)
+        batches_count += len(batches)
+        if max_batches and batches_count >= max_batches:
+            break
+    return archived_count
+
+
+def read(resource_storage, execution_id):
+    """
+    Reads the archived logs of an execution.
+
+    The archive is downloaded to a temporary file (deleted once the iteration ends), from which
+    the logs are read as they're iterated over, so they're not all held in memory.
+
+    :param resource_storage: resource storage
+    :param execution_id: execution ID
+    :return: iterator of :class:`ArchivedLog`, sorted by ID
+    """
+    temp_dir = tempfile.mkdtemp(prefix='log-archive-')
+    try:
+        archive_path, offsets = _download(resource_storage, execution_id, temp_dir)
+        for log in _logs(archive_path, offsets, execution_id):
+            yield log
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def merge(archived_logs, stored_logs, key=operator.attrgetter('id')):
+    """
+    Merges archived logs with stored logs of the same execution, by ID, as they're iterated over.
+
+    A log is both archived and stored when its compaction was stopped before deleting it, in which
+    case the stored one is kept.
+
+    :param archived_logs: archived logs, sorted by ID (e.g. read by :func:`read`)
+    :param stored_logs: stored logs, sorted by ID
+    :param key: function returning the ID of a log
+    :return: iterator of logs, sorted by ID
+    """
+    archived_logs = iter(archived_logs)
+    archived_log = next(archived_logs, None)
+    for stored_log in stored_logs:
+        stored_id = key(stored_log)
+        while archived_log is not None and key(archived_log) <= stored_id:
+            if key(archived_log) < stored_id:
+                yield archived_log
+            archived_log = next(archived_logs, None)
+        yield stored_log
+    while archived_log is not None:
+        yield archived_log
+        archived_log = next(archived_logs, None)
+
+
+def delete(resource_storage, execution_id):
+    """
+    Deletes the archived logs of an execution.
+
+    :param resource_storage: resource storage
+    :param execution_id: execution ID
+    """
+    resource_storage.execution.delete(entry_id=str(execution_id), path=ARCHIVE_PATH)
+    resource_storage.execution.delete(entry_id=str(execution_id), path=INDEX_PATH)
+
+
+def _archive(model_storage, resource_storage, execution_id, expired, batch_size, max_batches):
+    """
+    Appends the expired logs of an execution to its archive.
+
+    :return: list of the IDs of the archived logs of each batch
+    """
+    session = model_storage.log._session
+    batches = []
+    temp_dir = tempfile.mkdtemp(prefix='log-archive-')
+    try:
+        archive_path, offsets = _download(resource_storage, execution_id, temp_dir)
+        offsets.append(os.path.getsize(archive_path) if os.path.exists(archive_path) else 0)
+
+        with open(archive_path, 'ab') as archive_file:
+            with gzip.GzipFile(filename='', mode='wb', fileobj=archive_file) as archive:
+                last_id = 0
+                while not max_batches or len(batches) < max_batches:
+                    # Only the columns, since the logs are not used as models
+                    rows = session.query(*_ARCHIVED_COLUMNS) \
+                        .filter(expired, models.Log.id > last_id) \
+                        .order_by(models.Log.id) \
+                        .limit(batch_size) \
+                        .all()
+                    if not rows:
+                        break
+                    archive.writelines(_dump(row) for row in rows)
+                    batches.append([row.id for row in rows])
+                    last_id = rows[-1].id
+        if batches:
+            if len(offsets) > MAX_MEMBERS:
+                offsets = _merge_members(archive_path, offsets, execution_id)
+            index_path = os.path.join(temp_dir, INDEX_PATH)
+            with open(index_path, 'wb') as index_file:
+                json.dump(dict(size=os.path.getsize(archive_path), offsets=offsets), index_file)
+            # The archive is uploaded first; an index which doesn't match it is ignored
+            resource_storage.execution.upload(entry_id=str(execution_id),
+                                              source=archive_path,
+                                              path=ARCHIVE_PATH)
+            resource_storage.execution.upload(entry_id=str(execution_id),
+                                              source=index_path,
+                                              path=INDEX_PATH)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return batches
+
+
+def _download(resource_storage, execution_id, temp_dir):
+    """
+    Downloads the archive of an execution, and the offsets of its members, to a directory.
+
+    :return: path of the archive (which doesn't exist if the execution has no archive) and the
+     offsets of its members
+    """
+    archive_path = os.path.join(temp_dir, ARCHIVE_PATH)
+    index_path = os.path.join(temp_dir, INDEX_PATH)
+    try:
+        resource_storage.execution.download(entry_id=str(execution_id),
+                                            destination=archive_path,
+                                            path=ARCHIVE_PATH)
+    except exceptions.StorageError:
+        return archive_path, []
+    try:
+        resource_storage.execution.download(entry_id=str(execution_id),
+                                            destination=index_path,
+                                            path=INDEX_PATH)
+        with open(index_path, 'rb') as index_file:
+            index = json.load(index_file)
+    except (exceptions.StorageError, ValueError):
+        index = None
+    if index is not None and index['size'] == os.path.getsize(archive_path):
+        return archive_path, index['offsets']
+    # The index is missing or out of date (e.g. the compaction was stopped before uploading it)
+    return archive_path, _member_offsets(archive_path)
+
+
+def _member_offsets(archive_path):
+    """
+    Finds the offset of each gzip member of an archive, by decompressing the members.
+    """
+    offsets = []
+    offset = 0
+    size = os.path.getsize(archive_path)
+    while offset < size:
+        offsets.append(offset)
+        member = _ArchiveMember(archive_path, offset)
+        for _ in member:
+            pass
+        offset = member.end
+    return offsets
+
+
+def _logs(archive_path, offsets, execution_id):
+    """
+    Yields the logs of the members of an archive at the offsets, sorted by ID.
+    """
+    # The members of the archive are sorted, but a member may have older logs than the previous
+    # one, so they're merged
+    members = [_member_logs(archive_path, offset, execution_id) for offset in offsets]
+    last_id = None
+    for log in heapq.merge(*members):
+        # A log is archived again when its compaction was stopped before deleting it
+        if log.id != last_id:
+            last_id = log.id
+            yield log
+
+
+def _merge_members(archive_path, offsets, execution_id):
+    """
+    Merges the members of an archive into one.
+
+    :return: offsets of the members of the merged archive
+    """
+    merged_path = archive_path + '.merged'
+    with open(merged_path, 'wb') as merged_file:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=merged_file) as merged:
+            merged.writelines(_dump(log) for log in _logs(archive_path, offsets, execution_id))
+    os.rename(merged_path, archive_path)
+    return [0]
+
+
+def _member_logs(archive_path, offset, execution_id):
+    """
+    Yields the logs of the gzip member of an archive at an offset.
+    """
+    pending = ''
+    for data in _ArchiveMember(archive_path, offset):
+        lines = (pending + data).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield _load(execution_id, line)
+    if pending:
+        yield _load(execution_id, pending)
+
+
+class _ArchiveMember(object):
+    """
+    Iterates over the decompressed data of the gzip member of an archive at an offset, in chunks.
+
+    Once iterated over, ``end`` is the offset of the next member (or the size of the archive).
+    """
+
+    def __init__(self, archive_path, offset):
+        self._archive_path = archive_path
+        self.offset = offset
+        self.end = None
+
+    def __iter__(self):
+        # The gzip header and trailer are handled by zlib
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        with open(self._archive_path, 'rb') as archive_file:
+            archive_file.seek(self.offset)
+            while not decompressor.unused_data:
+                compressed = archive_file.read(READ_SIZE)
+                if not compressed:
+                    data = decompressor.flush()
+                    if data:
+                        yield data
+                    break
+                while True:
+                    # Limited, since a small compressed chunk may decompress to a lot of data
+                    data = decompressor.decompress(compressed, READ_SIZE)
+                    if data:
+                        yield data
+                    compressed = decompressor.unconsumed_tail
+                    if decompressor.unused_data or (not compressed and len(data) < READ_SIZE):
+                        break
+            self.end = archive_file.tell() - len(decompressor.unused_data)
+
+
+def _dump(row):
+    return json.dumps(dict(id=row.id,
+                           task_fk=row.task_fk,
+                           level=row.level,
+                           msg=row.msg,
+                           created_at=row.created_at.strftime(_DATETIME_FORMAT),
+                           traceback=row.traceback),
+                      separators=(',', ':')) + '\n'
+
+
+def _load(execution_id, line):
+    log = json.loads(line)
+    return ArchivedLog(id=log['id'],
+                       execution_fk=execution_id,
+                       task_fk=log['task_fk'],
+                       level=log['level'],
+                       msg=log['msg'],
+                       created_at=datetime.strptime(log['created_at'], _DATETIME_FORMAT),
+                       traceback=log['traceback'])
@@ -0,0 +1,453 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Live streaming of execution logs.
+
+Operation and workflow logs are written to the model storage, which keeps them for later, but
+following an execution by reading its new logs from the storage means querying the database the
+execution is busy writing to. Instead, the SQL log handler publishes each log to the open
+:class:`LogBus` of its execution (see :func:`publish`), which passes it on to its subscribers right
+away.
+
+A bus may also be served on a local socket (see :meth:`LogBus.serve`), through which logs are
+published from other processes (e.g. the process executor's subprocesses), and followed by other
+processes (e.g. ``aria logs tail -f``).
+"""
+
+import os
+import json
+import Queue
+import shutil
+import socket
+import time
+import threading
+from collections import namedtuple
+
+from ..utils import ipc
+
+
+#: A published log; the fields are those of :class:`~aria.modeling.orchestration.LogBase`
+LogEvent = namedtuple('LogEvent', 'execution_fk, task_fk, level, msg, created_at, traceback')
+
+_PUBLISHER = 'publisher'
+_SUBSCRIBER = 'subscriber'
+_CLOSER = 'closer'
+
+# Seconds between checks for interrupts (e.g. Ctrl+C) while waiting for logs
+_WAIT_INTERVAL = 1
+
+# Seconds a closed bus waits for the logs which other processes already sent it
+_DELIVERY_TIMEOUT = 5
+
+_buses = {}
+_buses_lock = threading.Lock()
+
+
+def get(execution_id):
+    """
+    Finds the open log bus of an execution.
+
+    :param execution_id: execution ID
+    :return: :class:`LogBus`, or ``None`` if the execution has no open log bus in this process
+    """
+    return _buses.get(execution_id)
+
+
+def publish(log):
+    """
+    Publishes a log to the open log bus of its execution, if there is one.
+
+    :param log: :class:`~aria.modeling.models.Log` model, which wasn't committed yet
+    """
+    bus = _buses.get(log.execution_fk)
+    if bus is not None:
+        bus.publish(LogEvent(execution_fk=log.execution_fk,
+                             task_fk=log.task_fk,
+                             level=log.level,
+                             msg=log.msg,
+                             created_at=log.created_at,
+                             traceback=log.traceback))
+
+
+def find_address(directory, execution_id):
+    """
+    Finds the address a log bus of an execution is served on.
+
+    :param directory: directory the bus was served with (see :meth:`LogBus.serve`)
+    :param execution_id: execution ID
+    :return: the address, or ``None`` if the execution's log bus isn't served
+    """
+    try:
+        with open(_address_path(directory, execution_id)) as f:
+            address = json.load(f)
+    except (IOError, ValueError):
+        return None
+    return address if isinstance(address, basestring) else tuple(address)
+
+
+def subscribe(address):
+    """
+    Subscribes to a log bus served on a local socket.
+
+    :param address: address the bus is served on (see :func:`find_address`)
+    :return: :class:`RemoteSubscription`
+    :raises socket.error: if the bus is no longer served
+    """
+    return RemoteSubscription(address)
+
+
+class LogBus(object):
+    """
+    Passes the logs of an execution on to its subscribers.
+
+    Publishing never waits for subscribers: a subscriber which falls ``max_size`` logs behind
+    misses the next ones (see :attr:`Subscription.dropped_count`), and can read them from the model
+    storage.
+
+    :param execution_id: ID of the execution the logs belong to
+    :param address: address of a bus served in another process (see :meth:`serve`), which the logs
+     published to this bus are forwarded to
+    :param max_size: number of logs each subscriber may fall behind
+    """
+
+    MAX_SIZE = 10000
+
+    def __init__(self, execution_id, address=None, max_size=MAX_SIZE):
+        self._execution_id = execution_id
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._subscriptions = []
+        self._forward_address = address
+        self._forward_socket = None
+        self._forward_lock = threading.Lock()
+        self._server = None
+        self._close_lock = threading.Lock()
+        self._open = False
+
+    @property
+    def execution_id(self):
+        return self._execution_id
+
+    @property
+    def address(self):
+        """
+        Address the bus is served on, or ``None`` if it isn't served.
+        """
+        return self._server.address if self._server else None
+
+    def open(self):
+        """
+        Makes the bus the one logs of the execution are published to in this process.
+        """
+        with _buses_lock:
+            if self._execution_id in _buses:
+                raise RuntimeError('Execution {0} already has an open log bus'
+                                   .format(self._execution_id))
+            _buses[self._execution_id] = self
+        self._open = True
+
+    def close(self):
+        """
+        Stops publishing, and ends the subscriptions once they've read the published logs.
+        """
+        with self._close_lock:
+            if self._open:
+                self._open = False
+                with _buses_lock:
+                    _buses.pop(self._execution_id, None)
+            if self._server is not None:
+                self._server.close()
+                self._server = None
+            with self._lock:
+                subscriptions, self._subscriptions = self._subscriptions, []
+            for subscription in subscriptions:
+                subscription._end()
+            with self._forward_lock:
+                if self._forward_socket is not None:
+                    self._forward_socket.close()
+                self._forward_address = self._forward_socket = None
+
+    def serve(self, directory=None):
+        """
+        Serves the bus on a local socket.
+
+        :param directory: directory in which the address of the bus is written, where
+         :func:`find_address` finds it
+        :return: the address
+        """
+        if self._server is None:
+            self._server = _Server(self, directory)
+        return self._server.address
+
+    def subscribe(self):
+        """
+        Subscribes to the logs published from now on.
+
+        :rtype: :class:`Subscription`
+        """
+        subscription = Subscription(self, self._max_size)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def publish(self, event):
+        """
+        Passes a log on to the subscribers, and to the bus it's forwarded to.
+
+        :param event: :class:`LogEvent`
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription._put(event)
+        if self._forward_address is not None:
+            self._forward(event)
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def _forward(self, event):
+        with self._forward_lock:
+            try:
+                if self._forward_socket is None:
+                    self._forward_socket = _connect(self._forward_address, _PUBLISHER)
+                ipc.send_message(self._forward_socket, event)
+            except socket.error:
+                # The logs are still written to the model storage, so once the serving bus is
+                # gone (i.e. nobody follows the execution), they're no longer forwarded
+                if self._forward_socket is not None:
+                    self._forward_socket.close()
+                self._forward_address = self._forward_socket = None
+
+
+class Subscription(object):
+    """
+    Logs published to a :class:`LogBus`, in the order they were published.
+
+    Iterating over the subscription yields the logs as they're published, until the bus is closed.
+    """
+
+    def __init__(self, bus, max_size):
+        self._bus = bus
+        self._queue = Queue.Queue(max_size)
+        self._dropped_count = 0
+        self._ended = False
+
+    @property
+    def dropped_count(self):
+        """
+        Number of logs which were published while the subscription was full.
+        """
+        return self._dropped_count
+
+    @property
+    def ended(self):
+        """
+        Whether all the logs were read, and the bus was closed.
+        """
+        return self._ended
+
+    def __iter__(self):
+        while not self._ended:
+            try:
+                # Waiting without a timeout would block interrupts (e.g. Ctrl+C)
+                event = self._queue.get(timeout=_WAIT_INTERVAL)
+            except Queue.Empty:
+                continue
+            if event is None:
+                self._ended = True
+            else:
+                yield event
+
+    def available(self):
+        """
+        Yields the logs which were already published, without waiting for more.
+        """
+        while not self._ended:
+            try:
+                event = self._queue.get_nowait()
+            except Queue.Empty:
+                return
+            if event is None:
+                self._ended = True
+            else:
+                yield event
+
+    def close(self):
+        """
+        Stops receiving logs.
+        """
+        self._bus._unsubscribe(self)
+        self._end()
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except Queue.Full:
+            self._dropped_count += 1
+
+    def _end(self):
+        # The end must not be dropped, so the oldest log makes room for it
+        while True:
+            try:
+                self._queue.put_nowait(None)
+                return
+            except Queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self._dropped_count += 1
+                except Queue.Empty:
+                    pass
+
+
+class RemoteSubscription(object):
+    """
+    Logs published to a :class:`LogBus` served in another process.
+
+    Iterating over the subscription yields the logs as they're published, until the bus is closed.
+    """
+
+    def __init__(self, address):
+        self._socket = _connect(address, _SUBSCRIBER)
+        try:
+            # Logs published from now on are sent
+            ipc.recv_message(self._socket)
+        except EOFError:
+            self._socket.close()
+            raise socket.error('Log bus is no longer served')
+
+    def __iter__(self):
+        try:
+            while True:
+                event = ipc.recv_message(self._socket)
+                if event is None:
+                    return
+                yield event
+        except (socket.error, EOFError):
+            # The serving process is gone
+            return
+
+    def close(self):
+        self._socket.close()
+
+
+class _Server(object):
+    """
+    Serves a bus on a local socket. Each connection is made by either a publisher, which sends
+    logs, or a subscriber, which is sent logs and then ``None`` once the bus is closed.
+    """
+
+    def __init__(self, bus, directory=None):
+        self._bus = bus
+        self._address_path = None
+        self._socket, self.address, self._socket_dir = ipc.listen(prefix='log-bus-')
+        # Number of publishers which are still connected
+        self._publishers_count = 0
+        self._publishers_done = threading.Condition()
+        self._thread = _start_thread(self._accept, 'LogBusServer')
+
+        if directory is not None:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._address_path = _address_path(directory, bus.execution_id)
+            with open(self._address_path, 'w') as f:
+                json.dump(self.address, f)
+
+    def close(self):
+        if self._address_path is not None:
+            try:
+                os.remove(self._address_path)
+            except OSError:
+                pass
+        # The connections made before this one are accepted first
+        try:
+            _connect(self.address, _CLOSER).close()
+        except socket.error:
+            pass
+        self._thread.join()
+        self._socket.close()
+        # Publishers close their connection once they're done (e.g. when the operation context in
+        # a subprocess is closed, which is before the executor is told the task ended)
+        deadline = time.time() + _DELIVERY_TIMEOUT
+        with self._publishers_done:
+            while self._publishers_count and time.time() < deadline:
+                self._publishers_done.wait(deadline - time.time())
+        if self._socket_dir:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+
+    def _accept(self):
+        while True:
+            connection = self._socket.accept()[0]
+            try:
+                # Sent right after connecting
+                role = ipc.recv_message(connection)
+            except (socket.error, EOFError):
+                connection.close()
+                continue
+            if role == _CLOSER:
+                connection.close()
+                return
+            if role == _PUBLISHER:
+                with self._publishers_done:
+                    self._publishers_count += 1
+            _start_thread(self._handle, 'LogBusConnection', connection, role)
+
+    def _handle(self, connection, role):
+        try:
+            if role == _PUBLISHER:
+                while True:
+                    self._bus.publish(ipc.recv_message(connection))
+            elif role == _SUBSCRIBER:
+                subscription = self._bus.subscribe()
+                try:
+                    ipc.send_message(connection, _SUBSCRIBER)
+                    for event in subscription:
+                        ipc.send_message(connection, event)
+                    ipc.send_message(connection, None)
+                finally:
+                    subscription.close()
+        except (socket.error, EOFError):
+            # The other process is gone, or is done publishing
+            pass
+        finally:
+            connection.close()
+            if role == _PUBLISHER:
+                with self._publishers_done:
+                    self._publishers_count -= 1
+                    self._publishers_done.notify_all()
+
+
+def _address_path(directory, execution_id):
+    return os.path.join(directory, '{0}.address'.format(execution_id))
+
+
+def _start_thread(target, name, *args):
+    thread = threading.Thread(target=target, name=name, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def _connect(address, role):
+    sock = ipc.connect(address)
+    try:
+        ipc.send_message(sock, role)
+    except socket.error:
+        sock.close()
+        raise
+    return sock
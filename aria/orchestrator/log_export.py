@@ -0,0 +1,154 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Structured export of execution logs.
+
+Logs are exported with the node, interface and operation of their task, for analysis by other
+tools (see :data:`FIELDS`), in one of these formats:
+
+* ``ndjson``: a JSON object per log, one per line
+* ``columnar``: a JSON object per batch of logs, one per line, mapping each field to the list of its
+  values in the batch
+
+Logs are read in keyset-paginated batches of plain rows, rather than as models, so exporting the
+logs of large executions is bound by writing them. The archived logs of the execution (see
+:mod:`~aria.orchestrator.log_archive`) are exported along with the stored ones.
+"""
+
+import json
+import itertools
+import operator
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import aliased
+
+from . import log_archive
+from ..modeling import models
+
+NDJSON = 'ndjson'
+COLUMNAR = 'columnar'
+FORMATS = (NDJSON, COLUMNAR)
+
+#: Exported fields of each log
+FIELDS = ('id', 'task', 'node', 'interface', 'operation', 'level', 'timestamp', 'msg',
+          'traceback')
+
+#: Default number of logs read in each query
+BATCH_SIZE = 10000
+
+_LOG_COLUMNS = (models.Log.id, models.Log.task_fk, models.Log.level, models.Log.msg,
+                models.Log.created_at, models.Log.traceback)
+
+_NO_TASK = (None, None, None)
+
+_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+
+def export(model_storage, execution_id, stream, output_format=NDJSON, batch_size=BATCH_SIZE,
+           resource_storage=None):
+    """
+    Writes the logs of an execution, sorted by ID.
+
+    :param model_storage: model storage
+    :param execution_id: execution ID
+    :param stream: file-like object the logs are written to
+    :param output_format: one of :data:`FORMATS`
+    :param batch_size: number of logs read in each query, and in each line of the ``columnar``
+     format
+    :param resource_storage: resource storage the archived logs are read from; only the stored
+     logs are exported if ``None``
+    :return: number of exported logs
+    """
+    if output_format not in FORMATS:
+        raise ValueError('Unknown log export format `{0}`, expected one of: {1}'
+                         .format(output_format, ', '.join(FORMATS)))
+    write_batch = _write_ndjson if output_format == NDJSON else _write_columnar
+    tasks = _tasks(model_storage, execution_id)
+    exported_count = 0
+    for batch in _batches(model_storage, resource_storage, execution_id, batch_size):
+        write_batch(stream, [_values(row, tasks) for row in batch])
+        exported_count += len(batch)
+    return exported_count
+
+
+def _tasks(model_storage, execution_id):
+    """
+    Maps the IDs of the tasks of an execution to their node name, interface and operation.
+
+    The node of a relationship task is the source node of the relationship.
+    """
+    source_node = aliased(models.Node)
+    rows = model_storage.task._session.query(
+        models.Task.id,
+        func.coalesce(models.Node.name, source_node.name),
+        models.Task.interface_name,
+        models.Task.operation_name) \
+        .outerjoin(models.Node, models.Task.node_fk == models.Node.id) \
+        .outerjoin(models.Relationship, models.Task.relationship_fk == models.Relationship.id) \
+        .outerjoin(source_node, models.Relationship.source_node_fk == source_node.id) \
+        .filter(models.Task.execution_fk == execution_id)
+    return dict((row[0], tuple(row[1:])) for row in rows)
+
+
+def _batches(model_storage, resource_storage, execution_id, batch_size):
+    """
+    Yields the logs of an execution in batches sorted by ID, as rows of the ``_LOG_COLUMNS``.
+    """
+    rows = _stored_rows(model_storage, execution_id, batch_size)
+    if resource_storage:
+        archived_rows = ((log.id, log.task_fk, log.level, log.msg, log.created_at, log.traceback)
+                         for log in log_archive.read(resource_storage, execution_id))
+        rows = log_archive.merge(archived_rows, rows, key=operator.itemgetter(0))
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        yield batch
+
+
+def _stored_rows(model_storage, execution_id, batch_size):
+    session = model_storage.log._session
+    last_id = 0
+    while True:
+        # A Core query, since even column queries of the ORM build a keyed tuple per row
+        rows = session.execute(
+            select(_LOG_COLUMNS)
+            .where(and_(models.Log.execution_fk == execution_id, models.Log.id > last_id))
+            .order_by(models.Log.id)
+            .limit(batch_size)) \
+            .fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        for row in rows:
+            yield row
+
+
+def _values(row, tasks):
+    log_id, task_fk, level, msg, created_at, traceback = row
+    node, interface, operation = tasks.get(task_fk, _NO_TASK)
+    return (log_id, task_fk, node, interface, operation, level, created_at.isoformat(), msg,
+            traceback)
+
+
+def _write_ndjson(stream, values):
+    stream.writelines(_ENCODER.encode(dict(zip(FIELDS, log_values))) + '\n'
+                      for log_values in values)
+
+
+def _write_columnar(stream, values):
+    stream.write(_ENCODER.encode(dict(zip(FIELDS, (list(column) for column in zip(*values)))))
+                 + '\n')
@@ -0,0 +1,238 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Historical durations of operations, and estimates based on them.
+
+The durations of successful operation tasks are recorded per function, node type, interface and
+operation (see :class:`~aria.modeling.models.OperationStatistics`) when their execution ends.
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+
+from ..modeling import models
+from ..utils import timing
+from .workflows.executor.dry import DryExecutor
+
+
+#: Estimated duration (in seconds) of operations which were never executed before
+DEFAULT_OPERATION_DURATION = 1.0
+
+#: Percentile of the historical durations used for estimates
+DEFAULT_PERCENTILE = 50
+
+
+def record_execution(model_storage, execution):
+    """
+    Adds the durations of the operation tasks which succeeded in an execution to the statistics.
+
+    Only tasks which ended since the execution was last started are recorded, so the tasks of a
+    resumed execution are not recorded twice. Tasks of dry executions are not recorded.
+
+    :param model_storage: model storage
+    :param execution: ended execution
+    """
+    durations = {}
+    for row in _ended_operations(model_storage, execution):
+        key, started_at, ended_at, executor = row[:4], row[4], row[5], row[6]
+        if isinstance(executor, type) and issubclass(executor, DryExecutor):
+            continue
+        durations.setdefault(key, []).append(timing.total_seconds(ended_at - started_at))
+    if not durations:
+        return
+
+    existing = _load_statistics(model_storage, durations)
+    added, updated = [], []
+    for key, key_durations in durations.iteritems():
+        operation_statistics = existing.get(key)
+        if operation_statistics is None:
+            function, node_type_name, interface_name, operation_name = key
+            operation_statistics = models.OperationStatistics(function=function,
+                                                              node_type_name=node_type_name,
+                                                              interface_name=interface_name,
+                                                              operation_name=operation_name)
+            added.append(operation_statistics)
+        else:
+            updated.append(operation_statistics)
+        operation_statistics.add_durations(key_durations)
+
+    with model_storage.operation_statistics.bulk():
+        model_storage.operation_statistics.put_many(added)
+        model_storage.operation_statistics.update_many(updated)
+
+
+def get_statistics(model_storage, tasks):
+    """
+    Finds the statistics of the operations of tasks.
+
+    When an operation was never executed on the node type of a task, the statistics of the
+    operation on all the other node types are combined.
+
+    :param model_storage: model storage
+    :param tasks: tasks (stored, or listed by
+     :func:`~aria.orchestrator.workflows.core.graph_compiler.plan_tasks`)
+    :return: dict of task IDs to :class:`~aria.modeling.models.OperationStatistics` (not
+     necessarily stored), or ``None`` for stub tasks and operations without history
+    """
+    existing = _load_statistics(
+        model_storage, set(_statistics_key(task) for task in tasks if not task._stub_type))
+    per_operation = {}
+    for key, operation_statistics in existing.iteritems():
+        per_operation.setdefault(_operation_key(*key), []).append(operation_statistics)
+
+    combined = {}
+    result = {}
+    for task in tasks:
+        if task._stub_type:
+            result[task.id] = None
+            continue
+        key = _statistics_key(task)
+        if key in existing:
+            result[task.id] = existing[key]
+            continue
+        operation_key = _operation_key(*key)
+        if operation_key not in combined:
+            combined[operation_key] = _combine(per_operation.get(operation_key, ()))
+        result[task.id] = combined[operation_key]
+    return result
+
+
+def estimate_durations(model_storage, tasks, percent=DEFAULT_PERCENTILE):
+    """
+    Estimates the duration of tasks by a percentile of the historical durations of their
+    operations.
+
+    :param model_storage: model storage
+    :param tasks: tasks
+    :param percent: percentile of the historical durations, between 0 and 100
+    :return: dict of task IDs to their estimated duration in seconds; ``0`` for stub tasks, and
+     :data:`DEFAULT_OPERATION_DURATION` for operations without history
+    """
+    operations_statistics = get_statistics(model_storage, tasks)
+    durations = {}
+    for task in tasks:
+        operation_statistics = operations_statistics[task.id]
+        if operation_statistics is not None:
+            durations[task.id] = operation_statistics.percentile(percent)
+        else:
+            durations[task.id] = 0 if task._stub_type else DEFAULT_OPERATION_DURATION
+    return durations
+
+
+def estimate_makespan(model_storage, tasks, percent=DEFAULT_PERCENTILE):
+    """
+    Estimates the total duration of executing tasks, assuming each of them is executed as soon as
+    its dependencies end.
+
+    This is the length of the critical path through the task graph, where each task takes its
+    estimated duration (see :func:`estimate_durations`).
+
+    :param model_storage: model storage
+    :param tasks: tasks of an execution, with their dependencies
+    :param percent: percentile of the historical durations, between 0 and 100
+    :return: estimated duration in seconds
+    """
+    durations = estimate_durations(model_storage, tasks, percent)
+    # Estimated time from the start of the execution until each task ends
+    end_times = {}
+    for task in tasks:
+        # Iterative post-order traversal of the task's dependencies
+        stack = [(task, False)]
+        while stack:
+            current, visited = stack.pop()
+            if current.id in end_times:
+                continue
+            if visited:
+                end_times[current.id] = durations.get(current.id, 0) + max(
+                    [end_times[dependency.id] for dependency in current.dependencies] or [0])
+            else:
+                stack.append((current, True))
+                stack.extend((dependency, False) for dependency in current.dependencies
+                             if dependency.id not in end_times)
+    return max(end_times.itervalues()) if end_times else 0
+
+
+def _ended_operations(model_storage, execution):
+    """
+    Yields the statistics key, start and end times and executor of the operation tasks which
+    succeeded in an execution (since it was last started).
+
+    Loading the actor and its type of each task would have cost queries per task, so they are
+    joined in a single query.
+    """
+    node_type = aliased(models.Type)
+    relationship_type = aliased(models.Type)
+    query = model_storage.task._session.query(
+        models.Task.function,
+        func.coalesce(node_type.name, relationship_type.name),
+        models.Task.interface_name,
+        models.Task.operation_name,
+        models.Task.started_at,
+        models.Task.ended_at,
+        models.Task._executor) \
+        .outerjoin(models.Node, models.Task.node_fk == models.Node.id) \
+        .outerjoin(node_type, models.Node.type_fk == node_type.id) \
+        .outerjoin(models.Relationship, models.Task.relationship_fk == models.Relationship.id) \
+        .outerjoin(relationship_type, models.Relationship.type_fk == relationship_type.id) \
+        .filter(models.Task.execution_fk == execution.id,
+                models.Task._stub_type.is_(None),
+                models.Task.status == models.Task.SUCCESS,
+                models.Task.started_at.isnot(None),
+                models.Task.ended_at.isnot(None))
+    if execution.started_at is not None:
+        query = query.filter(models.Task.ended_at >= execution.started_at)
+    return query
+
+
+def _load_statistics(model_storage, keys):
+    if not keys:
+        return {}
+    functions = list(set(key[0] for key in keys))
+    return dict((_model_key(operation_statistics), operation_statistics)
+                for operation_statistics in model_storage.operation_statistics.iter(
+                    filters=dict(function=functions)))
+
+
+def _combine(operations_statistics):
+    if not operations_statistics:
+        return None
+    # The windows are merged rather than their percentiles, which can't be combined
+    return models.OperationStatistics(
+        function=operations_statistics[0].function,
+        interface_name=operations_statistics[0].interface_name,
+        operation_name=operations_statistics[0].operation_name,
+        count=sum(operation_statistics.count for operation_statistics in operations_statistics),
+        durations=[duration for operation_statistics in operations_statistics
+                   for duration in operation_statistics.durations or ()])
+
+
+def _statistics_key(task):
+    actor_type = task.actor.type if task.actor is not None else None
+    return (task.function,
+            actor_type.name if actor_type is not None else None,
+            task.interface_name,
+            task.operation_name)
+
+
+def _model_key(operation_statistics):
+    return (operation_statistics.function,
+            operation_statistics.node_type_name,
+            operation_statistics.interface_name,
+            operation_statistics.operation_name)
+
+
+def _operation_key(function, node_type_name, interface_name, operation_name):                     # pylint: disable=unused-argument
+    return function, interface_name, operation_name
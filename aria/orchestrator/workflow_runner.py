@@ -24,7 +24,7 @@ from datetime import datetime
 from . import exceptions
 from .context.workflow import WorkflowContext
 from .workflows import builtin
-from .workflows.core import engine, graph_compiler
+from .workflows.core import engine, graph_compiler, journal
 from .workflows.executor.process import ProcessExecutor
 from ..modeling import models
 from ..modeling import utils as modeling_utils
@@ -41,7 +41,11 @@ class WorkflowRunner(object):
                  execution_id=None, retry_failed_tasks=False,
                  service_id=None, workflow_name=None, inputs=None, executor=None,
                  task_max_attempts=DEFAULT_TASK_MAX_ATTEMPTS,
-                 task_retry_interval=DEFAULT_TASK_RETRY_INTERVAL):
+                 task_retry_interval=DEFAULT_TASK_RETRY_INTERVAL,
+                 concurrency_limits=None,
+                 scheduling_policy=None,
+                 task_state_durability=journal.ENDED,
+                 log_buffer=None):
         """
         Manages a single workflow execution on a given service.
 
@@ -55,6 +59,15 @@ class WorkflowRunner(object):
          :class:`~aria.orchestrator.workflows.executor.process.ProcessExecutor` instance
         :param task_max_attempts: maximum attempts of repeating each failing task
         :param task_retry_interval: retry interval between retry attempts of a failing task
+        :param concurrency_limits: limits on the number of tasks executed at the same time (see
+         :class:`~aria.orchestrator.workflows.core.scheduling.ConcurrencyLimits`)
+        :param scheduling_policy: decides which ready tasks are executed first (see
+         :class:`~aria.orchestrator.workflows.core.scheduling.SchedulingPolicy`)
+        :param task_state_durability: when task state changes are committed (see
+         :mod:`~aria.orchestrator.workflows.core.journal`)
+        :param log_buffer: options of the buffer which operation logs are queued in, and written
+         from in batches (see :func:`~aria.logger.create_sqla_log_handler`); ``None`` to write each
+         log when it's logged
         """
 
         if not (execution_id or (workflow_name and service_id)):
@@ -78,7 +91,7 @@ class WorkflowRunner(object):
         else:
             self._service_id = service_id
             self._workflow_name = workflow_name
-            self._validate_workflow_exists_for_service()
+            _validate_workflow_exists(self.service, self._workflow_name)
             self._execution_id = self._create_execution_model(inputs).id
 
         self._workflow_context = WorkflowContext(
@@ -89,7 +102,8 @@ class WorkflowRunner(object):
             execution_id=self._execution_id,
             workflow_name=self._workflow_name,
             task_max_attempts=task_max_attempts,
-            task_retry_interval=task_retry_interval)
+            task_retry_interval=task_retry_interval,
+            log_buffer=log_buffer)
 
         # Set default executor and kwargs
         executor = executor or ProcessExecutor(plugin_manager=plugin_manager)
@@ -98,12 +112,15 @@ class WorkflowRunner(object):
         execution_inputs_dict = dict(inp.unwrapped for inp in self.execution.inputs.itervalues())
 
         if not self._is_resume:
-            workflow_fn = self._get_workflow_fn()
+            workflow_fn = _get_workflow_fn(resource_storage, self.service, self._workflow_name)
             self._tasks_graph = workflow_fn(ctx=self._workflow_context, **execution_inputs_dict)
             compiler = graph_compiler.GraphCompiler(self._workflow_context, executor.__class__)
             compiler.compile(self._tasks_graph)
 
-        self._engine = engine.Engine(executors={executor.__class__: executor})
+        self._engine = engine.Engine(executors={executor.__class__: executor},
+                                     concurrency_limits=concurrency_limits,
+                                     scheduling_policy=scheduling_policy,
+                                     task_state_durability=task_state_durability)
 
     @property
     def execution_id(self):
@@ -132,29 +149,12 @@ class WorkflowRunner(object):
             workflow_name=self._workflow_name,
             inputs={})
 
-        if self._workflow_name in builtin.BUILTIN_WORKFLOWS:
-            workflow_inputs = dict()  # built-in workflows don't have any inputs
-        else:
-            workflow_inputs = self.service.workflows[self._workflow_name].inputs
-
-        modeling_utils.validate_no_undeclared_inputs(declared_inputs=workflow_inputs,
-                                                     supplied_inputs=inputs or {})
-        modeling_utils.validate_required_inputs_are_supplied(declared_inputs=workflow_inputs,
-                                                             supplied_inputs=inputs or {})
-        execution.inputs = modeling_utils.merge_parameter_values(
-            inputs, workflow_inputs, model_cls=models.Input)
+        execution.inputs = _merge_workflow_inputs(self.service, self._workflow_name, inputs)
         # TODO: these two following calls should execute atomically
         self._validate_no_active_executions(execution)
         self._model_storage.execution.put(execution)
         return execution
 
-    def _validate_workflow_exists_for_service(self):
-        if self._workflow_name not in self.service.workflows and \
-                        self._workflow_name not in builtin.BUILTIN_WORKFLOWS:
-            raise exceptions.UndeclaredWorkflowError(
-                'No workflow policy {0} declared in service {1}'
-                .format(self._workflow_name, self.service.name))
-
     def _validate_no_active_executions(self, execution):
         active_executions = [e for e in self.service.executions if e.is_active()]
         if active_executions:
@@ -162,27 +162,79 @@ class WorkflowRunner(object):
                 "Can't start execution; Service {0} has an active execution with ID {1}"
                 .format(self.service.name, active_executions[0].id))
 
-    def _get_workflow_fn(self):
-        if self._workflow_name in builtin.BUILTIN_WORKFLOWS:
-            return import_fullname('{0}.{1}'.format(builtin.BUILTIN_WORKFLOWS_PATH_PREFIX,
-                                                    self._workflow_name))
-
-        workflow = self.service.workflows[self._workflow_name]
-
-        # TODO: Custom workflow support needs improvement, currently this code uses internal
-        # knowledge of the resource storage; Instead, workflows should probably be loaded
-        # in a similar manner to operation plugins. Also consider passing to import_fullname
-        # as paths instead of appending to sys path.
-        service_template_resources_path = os.path.join(
-            self._resource_storage.service_template.base_path,
-            str(self.service.service_template.id))
-        sys.path.append(service_template_resources_path)
-
-        try:
-            workflow_fn = import_fullname(workflow.function)
-        except ImportError:
-            raise exceptions.WorkflowImplementationNotFoundError(
-                'Could not find workflow {0} function at {1}'.format(
-                    self._workflow_name, workflow.function))
-
-        return workflow_fn
+
+def create_task_graph(model_storage, resource_storage, service_id, workflow_name, inputs=None):
+    """
+    Creates the task graph of a workflow on a service, without creating an execution.
+
+    Nothing is stored: the graph's tasks are only held in memory (e.g. for estimating the duration
+    of the workflow, see :mod:`~aria.orchestrator.statistics`).
+
+    :param model_storage: model storage API ("MAPI")
+    :param resource_storage: resource storage API ("RAPI")
+    :param service_id: service ID
+    :param workflow_name: workflow name
+    :param inputs: key-value dict of inputs for the workflow
+    :return: task graph
+    :rtype: :class:`~aria.orchestrator.workflows.api.task_graph.TaskGraph`
+    """
+    service = model_storage.service.get(service_id)
+    _validate_workflow_exists(service, workflow_name)
+    workflow_inputs = _merge_workflow_inputs(service, workflow_name, inputs)
+    workflow_context = WorkflowContext(
+        name=create_task_graph.__name__,
+        model_storage=model_storage,
+        resource_storage=resource_storage,
+        service_id=service_id,
+        execution_id=None,
+        workflow_name=workflow_name)
+    workflow_fn = _get_workflow_fn(resource_storage, service, workflow_name)
+    return workflow_fn(ctx=workflow_context,
+                       **dict(inp.unwrapped for inp in workflow_inputs.itervalues()))
+
+
+def _validate_workflow_exists(service, workflow_name):
+    if workflow_name not in service.workflows and \
+                    workflow_name not in builtin.BUILTIN_WORKFLOWS:
+        raise exceptions.UndeclaredWorkflowError(
+            'No workflow policy {0} declared in service {1}'
+            .format(workflow_name, service.name))
+
+
+def _merge_workflow_inputs(service, workflow_name, inputs):
+    if workflow_name in builtin.BUILTIN_WORKFLOWS:
+        workflow_inputs = dict()  # built-in workflows don't have any inputs
+    else:
+        workflow_inputs = service.workflows[workflow_name].inputs
+
+    modeling_utils.validate_no_undeclared_inputs(declared_inputs=workflow_inputs,
+                                                 supplied_inputs=inputs or {})
+    modeling_utils.validate_required_inputs_are_supplied(declared_inputs=workflow_inputs,
+                                                         supplied_inputs=inputs or {})
+    return modeling_utils.merge_parameter_values(inputs, workflow_inputs, model_cls=models.Input)
+
+
+def _get_workflow_fn(resource_storage, service, workflow_name):
+    if workflow_name in builtin.BUILTIN_WORKFLOWS:
+        return import_fullname('{0}.{1}'.format(builtin.BUILTIN_WORKFLOWS_PATH_PREFIX,
+                                                workflow_name))
+
+    workflow = service.workflows[workflow_name]
+
+    # TODO: Custom workflow support needs improvement, currently this code uses internal
+    # knowledge of the resource storage; Instead, workflows should probably be loaded
+    # in a similar manner to operation plugins. Also consider passing to import_fullname
+    # as paths instead of appending to sys path.
+    service_template_resources_path = os.path.join(
+        resource_storage.service_template.base_path,
+        str(service.service_template.id))
+    sys.path.append(service_template_resources_path)
+
+    try:
+        workflow_fn = import_fullname(workflow.function)
+    except ImportError:
+        raise exceptions.WorkflowImplementationNotFoundError(
+            'Could not find workflow {0} function at {1}'.format(
+                workflow_name, workflow.function))
+
+    return workflow_fn
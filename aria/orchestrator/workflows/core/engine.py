@@ -18,15 +18,20 @@ Workflow execution.
 """
 
 import time
+import heapq
+import threading
 from datetime import datetime
 
 from aria import logger
 from aria.modeling import models
 from aria.orchestrator import events
 from aria.orchestrator.context import operation
+from aria.utils import timing
 
 from .. import exceptions
 from ..executor.base import StubTaskExecutor
+from . import journal
+from .scheduling import ReadyTasksQueue, FIFOPolicy
 # Import required so all signals are registered
 from . import events_handler  # pylint: disable=unused-import
 
@@ -34,12 +39,35 @@ from . import events_handler  # pylint: disable=unused-import
 class Engine(logger.LoggerMixin):
     """
     Executes workflows.
+
+    :param executors: dict of executor classes to executor instances
+    :param event_driven: when ``True`` (the default) the engine sleeps until an executor signals a
+     task state change, a retrying task becomes due or a cancel is requested; when ``False`` it
+     polls the model storage for task states every 100ms
+    :param concurrency_limits: limits on the number of tasks executed at the same time (see
+     :class:`~aria.orchestrator.workflows.core.scheduling.ConcurrencyLimits`); ready tasks beyond
+     the limits are queued
+    :param scheduling_policy: decides which of the queued ready tasks are dispatched first (see
+     :class:`~aria.orchestrator.workflows.core.scheduling.SchedulingPolicy`); FIFO by default
+    :param task_state_durability: when task state changes are committed to the model storage (see
+     :mod:`~aria.orchestrator.workflows.core.journal`); changes are batched, but committed as soon
+     as a task ends by default
     """
 
-    def __init__(self, executors, **kwargs):
+    def __init__(self,
+                 executors,
+                 event_driven=True,
+                 concurrency_limits=None,
+                 scheduling_policy=None,
+                 task_state_durability=journal.ENDED,
+                 **kwargs):
         super(Engine, self).__init__(**kwargs)
         self._executors = executors.copy()
         self._executors.setdefault(StubTaskExecutor, StubTaskExecutor())
+        self._event_driven = event_driven
+        self._concurrency_limits = concurrency_limits
+        self._scheduling_policy = scheduling_policy
+        self._task_state_durability = task_state_durability
 
     def execute(self, ctx, resuming=False, retry_failed=False):
         """
@@ -48,12 +76,21 @@ class Engine(logger.LoggerMixin):
         if resuming:
             events.on_resume_workflow_signal.send(ctx, retry_failed=retry_failed)
 
-        tasks_tracker = _TasksTracker(ctx)
+        task_journal = journal.TaskStateJournal(ctx.model, ctx.execution.id,
+                                                durability=self._task_state_durability)
+        if self._event_driven:
+            tasks_tracker = _EventDrivenTasksTracker(
+                ctx, self._concurrency_limits, self._scheduling_policy, task_journal)
+        else:
+            tasks_tracker = _TasksTracker(
+                ctx, self._concurrency_limits, self._scheduling_policy, task_journal)
 
         try:
+            task_journal.open()
+            tasks_tracker.connect()
             events.start_workflow_signal.send(ctx)
             while True:
-                cancel = self._is_cancel(ctx)
+                cancel = tasks_tracker.cancel_requested and self._is_cancel(ctx)
                 if cancel:
                     break
                 for task in tasks_tracker.ended_tasks:
@@ -65,17 +102,27 @@ class Engine(logger.LoggerMixin):
                 if tasks_tracker.all_tasks_consumed:
                     break
                 else:
-                    time.sleep(0.1)
+                    tasks_tracker.wait()
+            # The task states are flushed before the workflow signals, so their receivers see them
             if cancel:
                 self._terminate_tasks(tasks_tracker.executing_tasks)
+                task_journal.close()
                 events.on_cancelled_workflow_signal.send(ctx)
             else:
+                task_journal.close()
                 events.on_success_workflow_signal.send(ctx)
         except BaseException as e:
             # Cleanup any remaining tasks
             self._terminate_tasks(tasks_tracker.executing_tasks)
+            try:
+                task_journal.close()
+            except BaseException:
+                # The original exception is the one raised
+                pass
             events.on_failure_workflow_signal.send(ctx, exception=e)
             raise
+        finally:
+            tasks_tracker.disconnect()
 
     def _terminate_tasks(self, tasks):
         for task in tasks:
@@ -95,7 +142,8 @@ class Engine(logger.LoggerMixin):
 
     @staticmethod
     def _is_cancel(ctx):
-        execution = ctx.model.execution.refresh(ctx.execution)
+        # Only the status is needed, so none of the (possibly large) relationships are reloaded
+        execution = ctx.model.execution.refresh(ctx.execution, load=())
         return execution.status in (models.Execution.CANCELLING, models.Execution.CANCELLED)
 
     def _handle_executable_task(self, ctx, task):
@@ -111,7 +159,9 @@ class Engine(logger.LoggerMixin):
             actor_id=task.actor.id if task.actor else None,
             service_id=task.execution.service.id,
             execution_id=task.execution.id,
-            name=task.name
+            name=task.name,
+            template_cache=ctx.template_cache,
+            log_buffer=ctx._log_buffer
         )
 
         if not task._stub_type:
@@ -125,61 +175,275 @@ class Engine(logger.LoggerMixin):
 
 
 class _TasksTracker(object):
+    """
+    Tracks the tasks of an execution by polling their state from the model storage.
+
+    Readiness is tracked by counting, per task, the dependencies that have yet to end. The
+    dependents of each task are indexed once, so ending a task only touches its own dependents.
+    Tasks that are ready but not yet due (i.e. retrying tasks) are kept in a heap ordered by
+    ``due_at``, and due tasks wait in a :class:`ReadyTasksQueue` until the concurrency limits allow
+    executing them.
+    """
 
-    def __init__(self, ctx):
+    POLLING_INTERVAL = 0.1
+
+    def __init__(self, ctx, concurrency_limits=None, scheduling_policy=None, task_journal=None):
         self._ctx = ctx
+        self._task_journal = task_journal
+        scheduling_policy = scheduling_policy or FIFOPolicy()
 
         self._tasks = ctx.execution.tasks
-        self._executed_tasks = [task for task in self._tasks if task.has_ended()]
-        self._executable_tasks = list(set(self._tasks) - set(self._executed_tasks))
-        self._executing_tasks = []
+        self._tasks_by_id = {}
+        self._dependents = {}
+        self._pending_dependencies_count = {}
+        self._executed_tasks_count = 0
+        self._executing_tasks = {}
+        self._ready_tasks = ReadyTasksQueue(concurrency_limits, scheduling_policy)
+        self._due_tasks = []
+        self._scheduled_task_ids = set()
+
+        ended_task_ids = set()
+        for task in self._tasks:
+            self._tasks_by_id[task.id] = task
+            if task.has_ended():
+                ended_task_ids.add(task.id)
+                self._executed_tasks_count += 1
+            else:
+                self._pending_dependencies_count[task.id] = 0
+
+        for task_id, dependency_id in self._dependency_pairs():
+            if task_id in ended_task_ids or dependency_id in ended_task_ids:
+                continue
+            self._dependents.setdefault(dependency_id, []).append(self._tasks_by_id[task_id])
+            self._pending_dependencies_count[task_id] += 1
+
+        scheduling_policy.prepare(
+            ctx,
+            [task for task in self._tasks if task.id in self._pending_dependencies_count],
+            self._dependents)
+        for task in self._tasks:
+            if self._pending_dependencies_count.get(task.id) == 0:
+                self._schedule(task)
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    @property
+    def cancel_requested(self):
+        # A cancel request can only be detected by checking the execution in the storage
+        return True
+
+    def wait(self):
+        time.sleep(self.POLLING_INTERVAL)
 
     @property
     def all_tasks_consumed(self):
-        return len(self._executed_tasks) == len(self._tasks) and len(self._executing_tasks) == 0
+        return self._executed_tasks_count == len(self._tasks) and not self._executing_tasks
 
     def executing(self, task):
-        # Task executing could be retrying (thus removed and added earlier)
-        if task not in self._executing_tasks:
-            self._executable_tasks.remove(task)
-            self._executing_tasks.append(task)
+        # Task executing could be retrying (thus already executing)
+        self._executing_tasks[task.id] = task
 
     def finished(self, task):
-        self._executing_tasks.remove(task)
-        self._executed_tasks.append(task)
+        del self._executing_tasks[task.id]
+        self._ready_tasks.release(task)
+        self._executed_tasks_count += 1
+        for dependent in self._dependents.pop(task.id, ()):
+            self._pending_dependencies_count[dependent.id] -= 1
+            if self._pending_dependencies_count[dependent.id] == 0:
+                self._schedule(dependent)
 
     @property
     def ended_tasks(self):
         for task in self.executing_tasks:
             if task.has_ended():
                 yield task
+            elif task.is_waiting():
+                # The task failed and is now waiting to be retried
+                self._schedule(task)
 
     @property
     def executable_tasks(self):
         now = datetime.utcnow()
-        # we need both lists since retrying task are in the executing task list.
-        for task in self._update_tasks(set(self._executing_tasks + self._executable_tasks)):
-            if all([task.is_waiting(),
-                    task.due_at <= now,
-                    all(dependency in self._executed_tasks for dependency in task.dependencies)
-                   ]):
-                yield task
+        while self._due_tasks and self._due_tasks[0][0] <= now:
+            _, task_id = heapq.heappop(self._due_tasks)
+            self._ready_tasks.put(self._tasks_by_id[task_id])
+        for task in self._ready_tasks.pop_admitted():
+            self._scheduled_task_ids.discard(task.id)
+            yield task
 
     @property
     def executing_tasks(self):
-        for task in self._update_tasks(self._executing_tasks):
+        for task in self._update_tasks(self._executing_tasks.values()):
             yield task
 
     @property
-    def executed_tasks(self):
-        for task in self._update_tasks(self._executed_tasks):
-            yield task
+    def next_due_at(self):
+        """
+        Due date of the earliest task which is ready but not yet due, or ``None``.
+        """
+        return self._due_tasks[0][0] if self._due_tasks else None
 
-    @property
-    def tasks(self):
-        for task in self._update_tasks(self._tasks):
-            yield task
+    def _schedule(self, task):
+        if task.id in self._scheduled_task_ids:
+            return
+        self._scheduled_task_ids.add(task.id)
+        # A retrying task doesn't hold its slot while waiting to be retried
+        self._ready_tasks.release(task)
+        if task.due_at <= datetime.utcnow():
+            self._ready_tasks.put(task)
+        else:
+            heapq.heappush(self._due_tasks, (task.due_at, task.id))
+
+    def _dependency_pairs(self):
+        """
+        Yields ``(task_id, dependency_id)`` for all the dependencies of the execution's tasks.
+
+        Loading ``models.Task.dependencies`` of each task would have cost a query per task, so the
+        association table is read directly, in a single query.
+        """
+        dependencies = models.Task.dependencies.property
+        task_column = dependencies.synchronize_pairs[0][1]
+        dependency_column = dependencies.secondary_synchronize_pairs[0][1]
+        query = self._ctx.model.task._session.query(task_column, dependency_column) \
+            .join(models.Task, models.Task.id == task_column) \
+            .filter(models.Task.execution_fk == self._ctx.execution.id)
+        for task_id, dependency_id in query:
+            yield task_id, dependency_id
 
     def _update_tasks(self, tasks):
         for task in tasks:
-            yield self._ctx.model.task.refresh(task)
+            yield self._refresh(task)
+
+    def _refresh(self, task):
+        # Related models are loaded lazily when needed, usually from the session's identity map
+        task = self._ctx.model.task.refresh(task, load=())
+        if self._task_journal is not None:
+            # Task state changes may not have been flushed to the storage yet
+            task = self._task_journal.apply(task)
+        return task
+
+
+class _EventDrivenTasksTracker(_TasksTracker):
+    """
+    Tracks the tasks of an execution using the task signals sent by the executors.
+
+    Only tasks which were signaled as ended (or just dispatched) are reloaded from the model
+    storage, and :meth:`wait` blocks until a task is signaled, a retrying task is due or a cancel
+    is requested. Cancel requests which aren't signaled in this process (e.g. which were made by
+    another process) are detected by checking the execution in the storage every
+    :attr:`CANCEL_CHECK_INTERVAL` seconds.
+    """
+
+    # Signal receivers may be called before the state change is recorded (the order in which
+    # receivers are called is arbitrary). Until the change shows up we keep on checking in this
+    # interval.
+    RECHECK_INTERVAL = 0.01
+
+    # Seconds between checks of the execution's status in the storage, which are also the longest
+    # wait (waiting without a timeout would block interrupts, e.g. Ctrl+C)
+    CANCEL_CHECK_INTERVAL = 1
+
+    def __init__(self, ctx, concurrency_limits=None, scheduling_policy=None, task_journal=None):
+        super(_EventDrivenTasksTracker, self).__init__(
+            ctx, concurrency_limits, scheduling_policy, task_journal)
+        self._execution_id = ctx.execution.id
+        self._condition = threading.Condition()
+        self._signaled_task_ids = set()
+        self._dispatched_tasks = []
+        self._cancel_requested = False
+        self._cancel_checked_at = time.time()
+        self._notified = False
+        self._unresolved = False
+
+    def connect(self):
+        events.on_success_task_signal.connect(self._task_signaled, weak=False)
+        events.on_failure_task_signal.connect(self._task_signaled, weak=False)
+        events.on_cancelling_workflow_signal.connect(self._cancel_signaled, weak=False)
+
+    def disconnect(self):
+        events.on_success_task_signal.disconnect(self._task_signaled)
+        events.on_failure_task_signal.disconnect(self._task_signaled)
+        events.on_cancelling_workflow_signal.disconnect(self._cancel_signaled)
+
+    def _task_signaled(self, ctx, *args, **kwargs):
+        if ctx._execution_id != self._execution_id:
+            return
+        with self._condition:
+            self._signaled_task_ids.add(ctx._task_id)
+            self._notified = True
+            self._condition.notify()
+
+    def _cancel_signaled(self, workflow_context, *args, **kwargs):
+        if workflow_context._execution_id != self._execution_id:
+            return
+        with self._condition:
+            self._cancel_requested = True
+            self._notified = True
+            self._condition.notify()
+
+    @property
+    def cancel_requested(self):
+        # Once requested, the cancel request stays on until the engine sees it in the storage
+        if self._cancel_requested:
+            return True
+        now = time.time()
+        if now - self._cancel_checked_at >= self.CANCEL_CHECK_INTERVAL:
+            self._cancel_checked_at = now
+            return True
+        return False
+
+    def executing(self, task):
+        super(_EventDrivenTasksTracker, self).executing(task)
+        self._dispatched_tasks.append(task)
+
+    @property
+    def ended_tasks(self):
+        with self._condition:
+            signaled_task_ids, self._signaled_task_ids = self._signaled_task_ids, set()
+        dispatched_tasks, self._dispatched_tasks = self._dispatched_tasks, []
+        self._unresolved = False
+
+        ended_tasks = []
+        for task_id in signaled_task_ids:
+            task = self._executing_tasks.get(task_id)
+            if task is None:
+                continue
+            task = self._refresh(task)
+            if task.has_ended():
+                ended_tasks.append(task)
+            elif task.is_waiting():
+                # The task failed and is now waiting to be retried
+                self._schedule(task)
+            else:
+                # The signal got here before the state change was persisted
+                self._unresolved = True
+                with self._condition:
+                    self._signaled_task_ids.add(task_id)
+        # Synchronous executors (such as the stub executor) update the task within the engine's
+        # own session, and do not necessarily send any signal
+        ended_tasks.extend(task for task in dispatched_tasks
+                           if task.id not in signaled_task_ids and task.has_ended())
+        return ended_tasks
+
+    @property
+    def executing_tasks(self):
+        return self._executing_tasks.values()
+
+    def wait(self):
+        if self._dispatched_tasks:
+            # Dispatched tasks might have already ended without sending any signal
+            return
+        timeout = self.CANCEL_CHECK_INTERVAL
+        if self._unresolved or self._cancel_requested:
+            timeout = self.RECHECK_INTERVAL
+        if self.next_due_at is not None:
+            due_in = max(timing.total_seconds(self.next_due_at - datetime.utcnow()), 0)
+            timeout = min(due_in, timeout)
+        with self._condition:
+            if not self._notified:
+                self._condition.wait(timeout)
+            self._notified = False
@@ -24,56 +24,56 @@ from datetime import (
 
 from ... import events
 from ... import exceptions
+from ... import statistics
+from . import journal
 
 
 @events.sent_task_signal.connect
 def _task_sent(ctx, *args, **kwargs):
-    with ctx.persist_changes:
-        ctx.task.status = ctx.task.SENT
+    _update_task(ctx, status=ctx.task.SENT)
 
 
 @events.start_task_signal.connect
 def _task_started(ctx, *args, **kwargs):
-    with ctx.persist_changes:
-        ctx.task.started_at = datetime.utcnow()
-        ctx.task.status = ctx.task.STARTED
-        _update_node_state_if_necessary(ctx, is_transitional=True)
+    _update_node_state_if_necessary(ctx, is_transitional=True)
+    _update_task(ctx, started_at=datetime.utcnow(), status=ctx.task.STARTED)
 
 
 @events.on_failure_task_signal.connect
 def _task_failed(ctx, exception, *args, **kwargs):
-    with ctx.persist_changes:
-        should_retry = all([
-            not isinstance(exception, exceptions.TaskAbortException),
-            ctx.task.attempts_count < ctx.task.max_attempts or
-            ctx.task.max_attempts == ctx.task.INFINITE_RETRIES,
-            # ignore_failure check here means the task will not be retried and it will be marked
-            # as failed. The engine will also look at ignore_failure so it won't fail the
-            # workflow.
-            not ctx.task.ignore_failure
-        ])
-        if should_retry:
-            retry_interval = None
-            if isinstance(exception, exceptions.TaskRetryException):
-                retry_interval = exception.retry_interval
-            if retry_interval is None:
-                retry_interval = ctx.task.retry_interval
-            ctx.task.status = ctx.task.RETRYING
-            ctx.task.attempts_count += 1
-            ctx.task.due_at = datetime.utcnow() + timedelta(seconds=retry_interval)
-        else:
-            ctx.task.ended_at = datetime.utcnow()
-            ctx.task.status = ctx.task.FAILED
+    task = _get_task(ctx)
+    should_retry = all([
+        not isinstance(exception, exceptions.TaskAbortException),
+        task.attempts_count < task.max_attempts or
+        task.max_attempts == task.INFINITE_RETRIES,
+        # ignore_failure check here means the task will not be retried and it will be marked
+        # as failed. The engine will also look at ignore_failure so it won't fail the
+        # workflow.
+        not task.ignore_failure
+    ])
+    if should_retry:
+        retry_interval = None
+        if isinstance(exception, exceptions.TaskRetryException):
+            retry_interval = exception.retry_interval
+        if retry_interval is None:
+            retry_interval = task.retry_interval
+        _update_task(ctx,
+                     status=task.RETRYING,
+                     attempts_count=task.attempts_count + 1,
+                     due_at=datetime.utcnow() + timedelta(seconds=retry_interval))
+    else:
+        _update_task(ctx, ended_at=datetime.utcnow(), status=task.FAILED)
 
 
 @events.on_success_task_signal.connect
 def _task_succeeded(ctx, *args, **kwargs):
-    with ctx.persist_changes:
-        ctx.task.ended_at = datetime.utcnow()
-        ctx.task.status = ctx.task.SUCCESS
-        ctx.task.attempts_count += 1
-
-        _update_node_state_if_necessary(ctx)
+    task = _get_task(ctx)
+    # The node state is updated first, so it is up to date once the task is seen as ended
+    _update_node_state_if_necessary(ctx)
+    _update_task(ctx,
+                 ended_at=datetime.utcnow(),
+                 status=task.SUCCESS,
+                 attempts_count=task.attempts_count + 1)
 
 
 @events.start_workflow_signal.connect
@@ -94,6 +94,7 @@ def _workflow_failed(workflow_context, exception, *args, **kwargs):
         execution.error = str(exception)
         execution.status = execution.FAILED
         execution.ended_at = datetime.utcnow()
+    _record_statistics(workflow_context, execution)
 
 
 @events.on_success_workflow_signal.connect
@@ -102,6 +103,7 @@ def _workflow_succeeded(workflow_context, *args, **kwargs):
         execution = workflow_context.execution
         execution.status = execution.SUCCEEDED
         execution.ended_at = datetime.utcnow()
+    _record_statistics(workflow_context, execution)
 
 
 @events.on_cancelled_workflow_signal.connect
@@ -117,6 +119,8 @@ def _workflow_cancelled(workflow_context, *args, **kwargs):
         else:
             execution.status = execution.CANCELLED
             execution.ended_at = datetime.utcnow()
+    if execution.status == execution.CANCELLED:
+        _record_statistics(workflow_context, execution)
 
 
 @events.on_resume_workflow_signal.connect
@@ -150,6 +154,34 @@ def _workflow_cancelling(workflow_context, *args, **kwargs):
             execution.status = execution.CANCELLING
 
 
+def _record_statistics(workflow_context, execution):
+    # Statistics are advisory, so failing to record them (after the execution's status was
+    # committed) doesn't fail the execution
+    try:
+        statistics.record_execution(workflow_context.model, execution)
+    except Exception as e:                                                                          # pylint: disable=broad-except
+        workflow_context.logger.warning(
+            'Failed to record the operation statistics of execution {execution.id}: {error}'
+            .format(execution=execution, error=e))
+
+
+def _get_task(ctx):
+    task_journal = journal.get(ctx._execution_id)
+    return task_journal.apply(ctx.task) if task_journal is not None else ctx.task
+
+
+def _update_task(ctx, **values):
+    # Changes are written by the execution's task state journal, or committed right away when it
+    # has none (e.g. when the engine isn't running)
+    task_journal = journal.get(ctx._execution_id)
+    if task_journal is not None:
+        task_journal.record(ctx.task, **values)
+    else:
+        with ctx.persist_changes:
+            for name, value in values.iteritems():
+                setattr(ctx.task, name, value)
+
+
 def _update_node_state_if_necessary(ctx, is_transitional=False):
     # TODO: this is not the right way to check! the interface name is arbitrary
     # and also will *never* be the type name
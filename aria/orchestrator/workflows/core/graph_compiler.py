@@ -24,6 +24,11 @@ class GraphCompiler(object):
         self._default_executor = default_executor
         self._stub_executor = executor.base.StubTaskExecutor
         self._model_to_api_id = {}
+        # Index of the model tasks created so far by their API ID (or start/end marker ID)
+        self._api_id_to_model_task = {}
+        # Model tasks created so far which no other task depends on
+        self._non_dependent_tasks = set()
+        self._execution = None
 
     def compile(self,
                 task_graph,
@@ -32,11 +37,26 @@ class GraphCompiler(object):
                 depends_on=()):
         """
         Translates the user graph to the execution graph
+
+        All the model tasks are created in memory and stored together in a single transaction.
+
         :param task_graph: The user's graph
         :param start_stub_type: internal use
         :param end_stub_type: internal use
         :param depends_on: internal use
         """
+        # Fetching the execution once also keeps the session from autoflushing the pending tasks
+        # on each lookup
+        self._execution = self._ctx.execution
+        with self._ctx.model.task.bulk():
+            self._compile(task_graph, start_stub_type, end_stub_type, depends_on)
+            self._ctx.model.task.put_many(self._api_id_to_model_task.values())
+            self._ctx.model.execution.update(self._execution)
+
+        for api_id, model_task in self._api_id_to_model_task.iteritems():
+            self._model_to_api_id[model_task.id] = api_id
+
+    def _compile(self, task_graph, start_stub_type, end_stub_type, depends_on):
         depends_on = list(depends_on)
 
         # Insert start marker
@@ -54,7 +74,7 @@ class GraphCompiler(object):
 
             elif isinstance(task, api.task.WorkflowTask):
                 # Build the graph recursively while adding start and end markers
-                self.compile(
+                self._compile(
                     task, models.Task.START_SUBWROFKLOW, models.Task.END_SUBWORKFLOW, dependencies
                 )
             elif isinstance(task, api.task.StubTask):
@@ -65,7 +85,7 @@ class GraphCompiler(object):
         # Insert end marker
         self._create_stub_task(
             end_stub_type,
-            self._get_non_dependent_tasks(self._ctx.execution) or [start_task],
+            list(self._non_dependent_tasks) or [start_task],
             self._end_graph_suffix(task_graph.id),
             task_graph.name
         )
@@ -74,20 +94,23 @@ class GraphCompiler(object):
         model_task = models.Task(
             name=name,
             dependencies=dependencies,
-            execution=self._ctx.execution,
+            execution=self._execution,
             _executor=self._stub_executor,
             _stub_type=stub_type)
-        self._ctx.model.task.put(model_task)
-        self._model_to_api_id[model_task.id] = api_id
+        self._index(model_task, api_id, dependencies)
         return model_task
 
     def _create_operation_task(self, api_task, dependencies):
         model_task = models.Task.from_api_task(
-            api_task, self._default_executor, dependencies=dependencies)
-        self._ctx.model.task.put(model_task)
-        self._model_to_api_id[model_task.id] = api_task.id
+            api_task, self._default_executor, dependencies=dependencies, execution=self._execution)
+        self._index(model_task, api_task.id, dependencies)
         return model_task
 
+    def _index(self, model_task, api_id, dependencies):
+        self._api_id_to_model_task[api_id] = model_task
+        self._non_dependent_tasks.difference_update(dependencies)
+        self._non_dependent_tasks.add(model_task)
+
     @staticmethod
     def _start_graph_suffix(api_id):
         return '{0}-Start'.format(api_id)
@@ -96,13 +119,6 @@ class GraphCompiler(object):
     def _end_graph_suffix(api_id):
         return '{0}-End'.format(api_id)
 
-    @staticmethod
-    def _get_non_dependent_tasks(execution):
-        tasks_with_dependencies = set()
-        for task in execution.tasks:
-            tasks_with_dependencies.update(task.dependencies)
-        return list(set(execution.tasks) - set(tasks_with_dependencies))
-
     def _get_tasks_from_dependencies(self, dependencies):
         """
         Returns task list from dependencies.
@@ -113,6 +129,65 @@ class GraphCompiler(object):
                 dependency_name = dependency.id
             else:
                 dependency_name = self._end_graph_suffix(dependency.id)
-            tasks.extend(task for task in self._ctx.execution.tasks
-                         if self._model_to_api_id.get(task.id, None) == dependency_name)
+            if dependency_name in self._api_id_to_model_task:
+                tasks.append(self._api_id_to_model_task[dependency_name])
         return tasks
+
+
+def plan_tasks(task_graph):
+    """
+    Lists the tasks which executing a task graph would create, without creating them.
+
+    The listed tasks have the dependencies, IDs and operation attributes of the model tasks
+    :class:`GraphCompiler` would create, but are neither models nor stored (e.g. for estimating the
+    duration of a workflow without creating an execution, see :mod:`~aria.orchestrator.statistics`).
+
+    :param task_graph: task graph
+    :type task_graph: :class:`~aria.orchestrator.workflows.api.task_graph.TaskGraph`
+    :return: planned tasks
+    :rtype: [:class:`PlannedTask`]
+    """
+    compiler = _PlanningGraphCompiler()
+    compiler.compile(task_graph)
+    return compiler.tasks
+
+
+class PlannedTask(object):
+    """
+    In-memory counterpart of a :class:`~aria.modeling.models.Task` (see :func:`plan_tasks`).
+    """
+    def __init__(self, task_id, dependencies, stub_type=None, api_task=None):
+        self.id = task_id
+        self.dependencies = dependencies
+        self._stub_type = stub_type
+        self.actor = getattr(api_task, 'actor', None)
+        self.function = getattr(api_task, 'function', None)
+        self.interface_name = getattr(api_task, 'interface_name', None)
+        self.operation_name = getattr(api_task, 'operation_name', None)
+
+
+class _PlanningGraphCompiler(GraphCompiler):
+    def __init__(self):
+        super(_PlanningGraphCompiler, self).__init__(ctx=None, default_executor=None)
+
+    @property
+    def tasks(self):
+        return self._api_id_to_model_task.values()
+
+    def compile(self,
+                task_graph,
+                start_stub_type=models.Task.START_WORKFLOW,
+                end_stub_type=models.Task.END_WORKFLOW,
+                depends_on=()):
+        # Nothing is stored
+        self._compile(task_graph, start_stub_type, end_stub_type, depends_on)
+
+    def _create_stub_task(self, stub_type, dependencies, api_id, name=None):
+        task = PlannedTask(api_id, dependencies, stub_type=stub_type)
+        self._index(task, api_id, dependencies)
+        return task
+
+    def _create_operation_task(self, api_task, dependencies):
+        task = PlannedTask(api_task.id, dependencies, api_task=api_task)
+        self._index(task, api_task.id, dependencies)
+        return task
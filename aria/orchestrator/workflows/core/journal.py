@@ -0,0 +1,230 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Write-behind journal of task state changes.
+
+Each task goes through several state changes (sent, started, and succeeded or failed), and
+committing each of them in its own transaction makes the model storage the bottleneck of
+executions with many short tasks. The journal coalesces the changes of each task in memory, and
+writes them in batched transactions.
+
+Durability levels:
+
+* :data:`IMMEDIATE`: every change is committed when it happens.
+* :data:`ENDED` (the default): changes are batched, but a task ending commits the batch right
+  away. Resuming an execution only relies on which tasks ended, so a crash loses nothing it needs.
+* :data:`BATCHED`: all changes are batched. After a crash, tasks which ended within the last flush
+  interval may be executed again when the execution is resumed.
+"""
+
+import threading
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ....modeling import models
+
+#: Every change is committed when it happens
+IMMEDIATE = 'immediate'
+
+#: Changes are batched, and flushed as soon as a task ends
+ENDED = 'ended'
+
+#: All changes are batched
+BATCHED = 'batched'
+
+DURABILITY_LEVELS = (IMMEDIATE, ENDED, BATCHED)
+
+_ENDED_STATES = (models.Task.SUCCESS, models.Task.FAILED)
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def get(execution_id):
+    """
+    Finds the open journal of an execution.
+
+    :param execution_id: execution ID
+    :return: :class:`TaskStateJournal`, or ``None`` if the execution has no open journal (in which
+     case task changes should be committed directly)
+    """
+    return _journals.get(execution_id)
+
+
+class TaskStateJournal(object):
+    """
+    Coalesces task state changes of an execution, and flushes them to the model storage in batched
+    transactions, every ``flush_interval`` seconds or once ``max_batch_size`` tasks have changes.
+
+    Changes are applied to the given task object without marking it as modified, so the same
+    object reflects them right away. Task objects loaded from the storage elsewhere should pass
+    through :meth:`apply` to see the changes which were not flushed yet.
+
+    Tasks which ended in the storage are never modified by a flush, so task changes committed
+    directly (e.g. by the dry executor) are not overridden by older journaled changes.
+
+    :param model_storage: model storage
+    :param execution_id: ID of the execution the tasks belong to
+    :param durability: one of :data:`DURABILITY_LEVELS`
+    :param flush_interval: maximal seconds between flushes
+    :param max_batch_size: number of changed tasks which triggers a flush
+    """
+
+    FLUSH_INTERVAL = 0.2
+    MAX_BATCH_SIZE = 100
+
+    def __init__(self, model_storage, execution_id, durability=ENDED,
+                 flush_interval=FLUSH_INTERVAL, max_batch_size=MAX_BATCH_SIZE):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError('durability must be one of {0}: {1}'.format(
+                ', '.join(DURABILITY_LEVELS), durability))
+        self._model = model_storage
+        self._execution_id = execution_id
+        self._durability = durability
+        self._flush_interval = flush_interval
+        self._max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Task IDs to the latest values of their changed fields
+        self._pending = {}
+        # Changes being written by a flush, which are not yet visible in the storage
+        self._flushing = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._open = False
+
+    @property
+    def durability(self):
+        return self._durability
+
+    @property
+    def pending_count(self):
+        """
+        Number of tasks with changes which were not flushed yet.
+        """
+        with self._lock:
+            return len(self._pending)
+
+    def open(self):
+        """
+        Starts journaling the changes of the execution's tasks.
+        """
+        with _journals_lock:
+            if self._execution_id in _journals:
+                raise RuntimeError('Execution {0} already has an open task state journal'
+                                   .format(self._execution_id))
+            _journals[self._execution_id] = self
+        self._open = True
+        if self._durability != IMMEDIATE:
+            self._thread = threading.Thread(target=self._flush_periodically,
+                                            name='TaskStateJournal')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def close(self):
+        """
+        Stops journaling, and flushes the remaining changes. Later changes of the execution's tasks
+        are committed directly.
+        """
+        if self._open:
+            self._open = False
+            with _journals_lock:
+                _journals.pop(self._execution_id, None)
+            if self._thread is not None:
+                self._wakeup.set()
+                self._thread.join()
+                self._thread = None
+        self.flush()
+
+    def record(self, task, **values):
+        """
+        Records changes of a task.
+
+        :param task: task model
+        :param values: field names to their new values
+        """
+        for name, value in values.iteritems():
+            set_committed_value(task, name, value)
+        with self._lock:
+            self._pending.setdefault(task.id, {}).update(values)
+            pending_count = len(self._pending)
+
+        if self._durability == IMMEDIATE or \
+                (self._durability == ENDED and values.get('status') in _ENDED_STATES):
+            self.flush()
+        elif pending_count >= self._max_batch_size:
+            self._wakeup.set()
+
+    def apply(self, task):
+        """
+        Applies the changes which were not flushed yet to a task loaded from the storage.
+
+        :param task: task model
+        :return: the task
+        """
+        if task.status in _ENDED_STATES:
+            return task
+        with self._lock:
+            values = dict(self._flushing.get(task.id, ()))
+            values.update(self._pending.get(task.id, ()))
+        for name, value in values.iteritems():
+            set_committed_value(task, name, value)
+        return task
+
+    def flush(self):
+        """
+        Writes the pending changes to the storage in a single transaction.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                flushing = self._flushing
+            try:
+                if flushing:
+                    self._write(flushing)
+            except BaseException:
+                # The changes are kept, and written by the next flush
+                with self._lock:
+                    for task_id, values in flushing.iteritems():
+                        values.update(self._pending.get(task_id, ()))
+                        self._pending[task_id] = values
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+
+    def _write(self, changes):
+        task_mapi = self._model.task
+        try:
+            for task_id, values in changes.iteritems():
+                task_mapi._session.query(models.Task) \
+                    .filter(models.Task.id == task_id,
+                            ~models.Task.status.in_(_ENDED_STATES)) \
+                    .update(values, synchronize_session=False)
+        except BaseException:
+            task_mapi._session.rollback()
+            raise
+        task_mapi._safe_commit()
+
+    def _flush_periodically(self):
+        while self._open:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except BaseException:
+                # The changes are flushed again on the next interval, and finally on close
+                pass
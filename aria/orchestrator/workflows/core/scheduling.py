@@ -0,0 +1,262 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Scheduling of the ready tasks of a workflow execution.
+"""
+
+import heapq
+import itertools
+from collections import deque
+
+from aria.orchestrator import statistics
+
+
+# Queue key of stub tasks, which are never limited
+_STUB_KEY = object()
+
+
+class ConcurrencyLimits(object):
+    """
+    Limits on the number of tasks the engine executes at the same time. Stub tasks are not limited.
+
+    :param max_tasks: maximum number of executing tasks; ``None`` for no limit
+    :param max_tasks_per_executor: dict of executor classes to the maximum number of tasks they
+     may execute at the same time
+    :param max_tasks_per_host: maximum number of executing tasks per host node (``task.actor.host``,
+     or the host of the source node for relationship tasks); ``None`` for no limit
+    """
+
+    def __init__(self, max_tasks=None, max_tasks_per_executor=None, max_tasks_per_host=None):
+        self.max_tasks = max_tasks
+        self.max_tasks_per_executor = max_tasks_per_executor or {}
+        self.max_tasks_per_host = max_tasks_per_host
+
+
+class SchedulingPolicy(object):
+    """
+    Decides which of the ready tasks are dispatched first.
+
+    Base class for scheduling policies. Tasks with a lower :meth:`priority` are dispatched first;
+    tasks with the same priority are dispatched in the order they became ready.
+    """
+
+    def prepare(self, ctx, tasks, dependents):
+        """
+        Called once, before any of the tasks is scheduled.
+
+        :param ctx: workflow context
+        :param tasks: the tasks of the execution which have yet to end
+        :param dependents: dict of task IDs to the tasks which depend on them
+        """
+        pass
+
+    def priority(self, task):                                                  # pylint: disable=no-self-use,unused-argument
+        return 0
+
+
+class FIFOPolicy(SchedulingPolicy):
+    """
+    Dispatches tasks in the order they became ready (the default).
+    """
+    pass
+
+
+class ShortestJobFirstPolicy(SchedulingPolicy):
+    """
+    Dispatches the tasks with the shortest historical duration first.
+    """
+
+    def __init__(self):
+        self._durations = {}
+
+    def prepare(self, ctx, tasks, dependents):
+        self._durations = estimate_durations(ctx, tasks)
+
+    def priority(self, task):
+        return self._durations.get(task.id, 0)
+
+
+class CriticalPathPolicy(SchedulingPolicy):
+    """
+    Dispatches the tasks with the longest remaining path to the end of the workflow first, which
+    shortens the total execution time when the concurrency is limited.
+
+    The length of a path is the sum of the historical durations of its tasks.
+    """
+
+    def __init__(self):
+        self._remaining_path_lengths = {}
+
+    def prepare(self, ctx, tasks, dependents):
+        durations = estimate_durations(ctx, tasks)
+        lengths = self._remaining_path_lengths = {}
+        for task in tasks:
+            # Iterative post-order traversal of the task's dependents
+            stack = [(task, False)]
+            while stack:
+                current, visited = stack.pop()
+                if current.id in lengths:
+                    continue
+                current_dependents = dependents.get(current.id, ())
+                if visited:
+                    lengths[current.id] = durations[current.id] + max(
+                        [lengths[dependent.id] for dependent in current_dependents] or [0])
+                else:
+                    stack.append((current, True))
+                    stack.extend((dependent, False) for dependent in current_dependents
+                                 if dependent.id not in lengths)
+
+    def priority(self, task):
+        return -self._remaining_path_lengths.get(task.id, 0)
+
+
+def estimate_durations(ctx, tasks):
+    """
+    Estimates the duration of tasks by the median historical duration of their operations (see
+    :func:`~aria.orchestrator.statistics.estimate_durations`).
+
+    :return: dict of task IDs to their estimated duration in seconds
+    """
+    return statistics.estimate_durations(ctx.model, tasks)
+
+
+class ReadyTasksQueue(object):
+    """
+    Ready tasks waiting to be dispatched, within the concurrency limits.
+
+    Tasks are queued per host and executor (as far as they are limited). The admissible queue with
+    the highest priority task dispatches next, and queues with tasks of the same priority take
+    turns, so tasks of a busy host or executor don't hold back the others.
+
+    :param limits: :class:`ConcurrencyLimits`; no limits if ``None``
+    :param policy: :class:`SchedulingPolicy`; :class:`FIFOPolicy` if ``None``
+    """
+
+    def __init__(self, limits=None, policy=None):
+        self._limits = limits or ConcurrencyLimits()
+        self._policy = policy or FIFOPolicy()
+        # Heaps of (priority, sequence, task)
+        self._queues = {}
+        self._sequence = itertools.count()
+        # Keys of the non-empty queues, in the order of their turns
+        self._turns = deque()
+        self._size = 0
+        # Queue keys of the dispatched tasks which still hold their slot
+        self._executing = {}
+        self._executing_count = 0
+        self._executing_per_executor = {}
+        self._executing_per_host = {}
+
+    def __len__(self):
+        return self._size
+
+    def put(self, task):
+        key = self._key(task)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = []
+            self._turns.append(key)
+        heapq.heappush(queue, (self._policy.priority(task), next(self._sequence), task))
+        self._size += 1
+
+    def pop_admitted(self):
+        """
+        Yields queued tasks as long as the concurrency limits allow, taking a slot for each of
+        them until :meth:`release` is called.
+        """
+        while True:
+            key = self._next_key()
+            if key is None:
+                return
+            queue = self._queues[key]
+            task = heapq.heappop(queue)[2]
+            self._size -= 1
+            self._turns.remove(key)
+            if queue:
+                self._turns.append(key)
+            else:
+                del self._queues[key]
+            self._acquire(task.id, key)
+            yield task
+
+    def release(self, task):
+        """
+        Releases the slot of a task which isn't executing anymore (has no effect if the task has no
+        slot).
+        """
+        key = self._executing.pop(task.id, None)
+        if key is None or key is _STUB_KEY:
+            return
+        executor, host = key
+        self._executing_count -= 1
+        if executor is not None:
+            self._executing_per_executor[executor] -= 1
+        if host is not None:
+            self._executing_per_host[host] -= 1
+
+    def _next_key(self):
+        limits = self._limits
+        if limits.max_tasks is not None and self._executing_count >= limits.max_tasks and \
+                _STUB_KEY not in self._queues:
+            return None
+        next_key = next_priority = None
+        for key in self._turns:
+            priority = self._queues[key][0][0]
+            if (next_key is None or priority < next_priority) and self._admissible(key):
+                next_key, next_priority = key, priority
+        return next_key
+
+    def _key(self, task):
+        if task._stub_type:
+            return _STUB_KEY
+        executor = task._executor if task._executor in self._limits.max_tasks_per_executor \
+            else None
+        host = _host_id(task) if self._limits.max_tasks_per_host is not None else None
+        return executor, host
+
+    def _admissible(self, key):
+        if key is _STUB_KEY:
+            return True
+        executor, host = key
+        limits = self._limits
+        if limits.max_tasks is not None and self._executing_count >= limits.max_tasks:
+            return False
+        if executor is not None and \
+                self._executing_per_executor.get(executor, 0) >= \
+                limits.max_tasks_per_executor[executor]:
+            return False
+        if host is not None and \
+                self._executing_per_host.get(host, 0) >= limits.max_tasks_per_host:
+            return False
+        return True
+
+    def _acquire(self, task_id, key):
+        self._executing[task_id] = key
+        if key is _STUB_KEY:
+            return
+        executor, host = key
+        self._executing_count += 1
+        if executor is not None:
+            self._executing_per_executor[executor] = \
+                self._executing_per_executor.get(executor, 0) + 1
+        if host is not None:
+            self._executing_per_host[host] = self._executing_per_host.get(host, 0) + 1
+
+
+def _host_id(task):
+    node = task.node or task.relationship.source_node
+    # Tasks of nodes which have no host are not limited per host
+    return node.host_fk
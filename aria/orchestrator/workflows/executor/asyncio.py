@@ -0,0 +1,191 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Asyncio task executor.
+"""
+
+from __future__ import absolute_import  # so we can import standard 'asyncio'
+
+import sys
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+try:
+    import asyncio
+except ImportError:
+    # The backport of asyncio to Python 2 (installed with the "asyncio" extra)
+    import trollius as asyncio
+from concurrent import futures
+
+from aria.utils import imports, exceptions, generators
+
+from .base import BaseExecutor
+
+
+class AsyncioExecutor(BaseExecutor):
+    """
+    Asyncio task executor, for operations which mostly wait on I/O.
+
+    Coroutine function operations are executed concurrently on a single event loop, which runs in
+    its own thread. On Python 2 these are ``trollius`` coroutines:
+
+    .. code-block:: python
+
+        @operation
+        @trollius.coroutine
+        def create(ctx, **_):
+            yield trollius.From(trollius.sleep(1))
+
+    Each coroutine has a model storage session of its own. Other operations, as well as the task
+    signals (which update the storage), are executed in a thread pool, so they don't block the loop.
+
+    Note: This executor is incapable of running plugin operations.
+
+    :param pool_size: number of threads executing the operations which aren't coroutine functions
+    :param close_timeout: seconds to wait for the executing tasks when closing; ``None`` to wait
+     until they end
+    """
+
+    def __init__(self, pool_size=10, close_timeout=5, *args, **kwargs):
+        super(AsyncioExecutor, self).__init__(*args, **kwargs)
+        self._close_timeout = close_timeout
+        self._closing = False
+        # Futures of the current steps of the tasks (starting, executing or ending) by task ID; only
+        # accessed in the event loop's thread
+        self._futures = {}
+        self._loop = asyncio.new_event_loop()
+        self._pool = futures.ThreadPoolExecutor(pool_size)
+        self._thread = threading.Thread(target=self._run_loop, name='AsyncioExecutor')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _execute(self, ctx):
+        self._loop.call_soon_threadsafe(self._start_task, ctx)
+
+    def terminate(self, task_id):
+        """
+        Cancels an executing task. Coroutines are cancelled at their current ``yield``; operations
+        executing in the thread pool can't be interrupted, and their result is ignored.
+        """
+        self._loop.call_soon_threadsafe(self._cancel_task, task_id)
+
+    def close(self):
+        if self._closing:
+            return
+        self._closing = True
+        self._loop.call_soon_threadsafe(self._stop_when_idle)
+        self._thread.join(self._close_timeout)
+        if not self._thread.is_alive():
+            self._loop.close()
+        self._pool.shutdown(wait=False)
+        super(AsyncioExecutor, self).close()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _start_task(self, ctx):
+        # The storage signals are sent in the thread pool, so their queries don't block the loop
+        self._step(ctx, self._pool.submit(self._prepare_task, ctx), self._task_prepared)
+
+    def _prepare_task(self, ctx):
+        self._task_started(ctx)
+        task_func = imports.load_attribute(ctx.task.function)
+        arguments = dict(arg.unwrapped for arg in ctx.task.arguments.itervalues())
+        return task_func, arguments
+
+    def _task_prepared(self, ctx, future):
+        try:
+            task_func, arguments = future.result()
+            if asyncio.iscoroutinefunction(task_func):
+                # Each coroutine has a session of its own, so committing the changes of one doesn't
+                # commit the changes another has made so far
+                scoped_session = ctx.model.log._session
+                session = scoped_session.session_factory()
+                with _current_session(scoped_session, session):
+                    coroutine = task_func(ctx=ctx, **arguments)
+                # The session is the current session only while the coroutine runs, so
+                # coroutines which are interleaved on the loop's thread don't share a session
+                future = asyncio.ensure_future(
+                    generators.delegate(coroutine,
+                                        partial(_current_session, scoped_session, session)),
+                    loop=self._loop)
+                future.add_done_callback(lambda _: session.close())
+            else:
+                # The future of the thread pool (rather than an asyncio future wrapping it) keeps
+                # the traceback of the operation's exception
+                future = self._pool.submit(task_func, ctx=ctx, **arguments)
+        except BaseException as e:
+            self._end_task(ctx,
+                           self._task_failed,
+                           exception=e,
+                           traceback=exceptions.get_exception_as_string(*sys.exc_info()))
+            return
+        self._step(ctx, future, self._task_done)
+
+    def _task_done(self, ctx, future):
+        try:
+            future.result()
+        except BaseException as e:
+            self._end_task(ctx,
+                           self._task_failed,
+                           exception=e,
+                           traceback=exceptions.get_exception_as_string(*sys.exc_info()))
+        else:
+            self._end_task(ctx, self._task_succeeded)
+
+    def _end_task(self, ctx, signal, **kwargs):
+        self._step(ctx, self._pool.submit(signal, ctx, **kwargs), lambda *_: None)
+
+    def _step(self, ctx, future, callback):
+        # Only the future of the task's current step is kept, and called back on the loop
+        self._futures[ctx._task_id] = future
+        future.add_done_callback(partial(self._loop.call_soon_threadsafe,
+                                         self._step_done, ctx, callback))
+
+    def _step_done(self, ctx, callback, future):
+        # Terminated tasks end without a signal, as with the other executors
+        if self._futures.get(ctx._task_id) is future:
+            del self._futures[ctx._task_id]
+            callback(ctx, future)
+        if self._closing and not self._futures:
+            self._loop.stop()
+
+    def _cancel_task(self, task_id):
+        future = self._futures.pop(task_id, None)
+        if future is not None:
+            future.cancel()
+        if self._closing and not self._futures:
+            self._loop.stop()
+
+    def _stop_when_idle(self):
+        if not self._futures:
+            self._loop.stop()
+
+
+@contextmanager
+def _current_session(scoped_session, session):
+    registry = scoped_session.registry
+    previous = registry() if registry.has() else None
+    registry.set(session)
+    try:
+        yield
+    finally:
+        if previous is None:
+            registry.clear()
+        else:
+            registry.set(previous)
@@ -43,11 +43,11 @@ class BaseExecutor(logger.LoggerMixin):
             self._task_started(ctx)
             self._task_succeeded(ctx)
 
-    def close(self):
+    def close(self):                                                                                # pylint: disable=no-self-use
         """
-        Closes the executor.
+        Closes the executor, and writes the buffered operation logs.
         """
-        pass
+        logger.flush_task_log_handlers()
 
     def terminate(self, task_id):
         """
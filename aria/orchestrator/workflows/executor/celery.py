@@ -57,6 +57,7 @@ class CeleryExecutor(BaseExecutor):
         if self._receiver:
             self._receiver.should_stop = True
         self._receiver_thread.join()
+        super(CeleryExecutor, self).close()
 
     @staticmethod
     def _get_queue(task):
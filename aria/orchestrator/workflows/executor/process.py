@@ -26,24 +26,24 @@ import sys
 # entry point. We thus remove this module's directory from the python path if it happens to be
 # there
 
-from collections import namedtuple
+from collections import namedtuple, deque
 
 script_dir = os.path.dirname(__file__)
 if script_dir in sys.path:
     sys.path.remove(script_dir)
 
-import contextlib
-import io
+import functools
 import threading
+import select
+import shutil
 import socket
-import struct
 import subprocess
 import tempfile
 import Queue
-import pickle
+import cPickle as pickle
 
 import psutil
-import jsonpickle
+import sqlalchemy.orm
 
 import aria
 from aria.orchestrator.workflows.executor import base
@@ -51,12 +51,13 @@ from aria.extension import process_executor
 from aria.utils import (
     imports,
     exceptions,
+    ipc,
     process as process_utils
 )
 
 
-_INT_FMT = 'I'
-_INT_SIZE = struct.calcsize(_INT_FMT)
+_RECV_SIZE = 64 * 1024
+_WORKER_ARG = '--worker'
 UPDATE_TRACKED_CHANGES_FAILED_STR = \
     'Some changes failed writing to storage. For more info refer to the log.'
 
@@ -69,7 +70,27 @@ class ProcessExecutor(base.BaseExecutor):
     Sub-process task executor.
     """
 
-    def __init__(self, plugin_manager=None, python_path=None, *args, **kwargs):
+    def __init__(self,
+                 plugin_manager=None,
+                 python_path=None,
+                 pool_size=0,
+                 max_tasks_per_worker=None,
+                 plugin_pool_sizes=None,
+                 max_pool_memory=None,
+                 *args,
+                 **kwargs):
+        """
+        :param plugin_manager: used to load plugins into the subprocesses' environment
+        :param python_path: additional directories to add to the subprocesses' python path
+        :param pool_size: number of warm worker subprocesses to keep; if ``0``, a new subprocess is
+         started for each task
+        :param max_tasks_per_worker: number of tasks after which a worker subprocess is replaced; if
+         ``None``, workers are only replaced when a task requires a different environment
+        :param plugin_pool_sizes: maximum number of worker subprocesses per plugin package name;
+         plugins which aren't listed may use the whole pool
+        :param max_pool_memory: memory (RSS, in bytes) of all worker subprocesses above which idle
+         workers are stopped, least recently used first, before new ones are started
+        """
         super(ProcessExecutor, self).__init__(*args, **kwargs)
         self._plugin_manager = plugin_manager
 
@@ -89,14 +110,13 @@ class ProcessExecutor(base.BaseExecutor):
             'failed': self._handle_task_failed_request,
         }
 
-        # Server socket used to accept task status messages from subprocesses
-        self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._server_socket.bind(('localhost', 0))
-        self._server_socket.listen(10)
-        self._server_port = self._server_socket.getsockname()[1]
+        # Server socket used to accept the channels through which subprocesses send task status
+        # messages. Each subprocess keeps a single channel open for all of its messages
+        self._server_socket, self._server_address, self._server_dir = \
+            ipc.listen(prefix='executor-')
 
         # Used to send a "closed" message to the listener when this executor is closed
-        self._messenger = _Messenger(task_id=None, port=self._server_port)
+        self._messenger = _Messenger(task_id=None, channel=_Channel(self._server_address))
 
         # Queue object used by the listener thread to notify this constructed it has started
         # (see last line of this __init__ method)
@@ -110,21 +130,50 @@ class ProcessExecutor(base.BaseExecutor):
         # Wait for listener thread to actually start before returning
         self._listener_started.get(timeout=60)
 
+        # Pool of warm worker subprocesses, used instead of a subprocess per task if enabled.
+        # Workers are keyed by the plugin they have loaded (see _worker_key)
+        self._pool = None
+        self._pool_size = pool_size
+        self._plugin_pool_sizes = plugin_pool_sizes or {}
+        # Subprocess environment of each worker key, so plugins are loaded once per key
+        self._worker_envs = {}
+        if pool_size:
+            self._pool = _WorkerPool(size=pool_size,
+                                     max_tasks_per_worker=max_tasks_per_worker,
+                                     max_memory=max_pool_memory,
+                                     key_size=self._worker_key_size,
+                                     spawn=self._spawn_worker,
+                                     on_dispatch=self._task_dispatched)
+            worker_key = self._worker_key()
+            self._worker_envs[worker_key] = self._construct_subprocess_env()
+            self._pool.start(worker_key)
+
     def close(self):
         if self._stopped:
             return
         self._stopped = True
-        # Listener thread may be blocked on "accept" call. This will wake it up with an explicit
+        # Listener thread may be blocked on "select" call. This will wake it up with an explicit
         # "closed" message
-        self._messenger.closed()
-        self._server_socket.close()
+        if self._listener_thread.is_alive():
+            self._messenger.closed()
+        self._messenger.channel.close()
         self._listener_thread.join(timeout=60)
+        self._server_socket.close()
+        if self._server_dir:
+            shutil.rmtree(self._server_dir, ignore_errors=True)
 
         # we use set(self._tasks) since tasks may change in the process of closing
         for task_id in set(self._tasks):
             self.terminate(task_id)
 
+        if self._pool:
+            self._pool.close()
+        super(ProcessExecutor, self).close()
+
     def terminate(self, task_id):
+        if self._pool:
+            # The worker running the task is killed below, so it must not be reused
+            self._pool.discard(task_id)
         task = self._remove_task(task_id)
         # The process might have managed to finish, thus it would not be in the tasks list
         if task:
@@ -142,6 +191,13 @@ class ProcessExecutor(base.BaseExecutor):
     def _execute(self, ctx):
         self._check_closed()
 
+        if self._pool:
+            worker_key = self._worker_key(ctx.task)
+            if worker_key not in self._worker_envs:
+                self._worker_envs[worker_key] = self._construct_subprocess_env(task=ctx.task)
+            self._pool.submit(ctx, arguments=self._create_arguments_dict(ctx), key=worker_key)
+            return
+
         # Temporary file used to pass arguments to the started subprocess
         file_descriptor, arguments_json_path = tempfile.mkstemp(prefix='executor-', suffix='.json')
         os.close(file_descriptor)
@@ -158,7 +214,33 @@ class ProcessExecutor(base.BaseExecutor):
             ],
             env=env)
 
-        self._tasks[ctx.task.id] = _Task(ctx=ctx, proc=proc)
+        self._tasks[ctx._task_id] = _Task(ctx=ctx, proc=proc)
+
+    def _worker_key(self, task=None):
+        """
+        Tasks are only executed by workers which have the same key, i.e. the same plugin loaded.
+        """
+        if task is not None and task.plugin_fk and self._plugin_manager:
+            plugin = task.plugin
+            return plugin.package_name, plugin.package_version, tuple(self._python_path)
+        return None, None, tuple(self._python_path)
+
+    def _worker_key_size(self, worker_key):
+        return self._plugin_pool_sizes.get(worker_key[0], self._pool_size)
+
+    def _spawn_worker(self, worker_key):
+        # Tasks are sent to the worker through its stdin
+        return subprocess.Popen(
+            [
+                sys.executable,
+                os.path.expanduser(os.path.expandvars(__file__)),
+                _WORKER_ARG
+            ],
+            env=self._worker_envs[worker_key],
+            stdin=subprocess.PIPE)
+
+    def _task_dispatched(self, ctx, worker):
+        self._tasks[ctx._task_id] = _Task(ctx=ctx, proc=worker.proc)
 
     def _remove_task(self, task_id):
         return self._tasks.pop(task_id, None)
@@ -169,17 +251,17 @@ class ProcessExecutor(base.BaseExecutor):
 
     def _create_arguments_dict(self, ctx):
         return {
-            'task_id': ctx.task.id,
+            'task_id': ctx._task_id,
             'function': ctx.task.function,
             'operation_arguments': dict(arg.unwrapped for arg in ctx.task.arguments.itervalues()),
-            'port': self._server_port,
+            'address': self._server_address,
             'context': ctx.serialization_dict
         }
 
-    def _construct_subprocess_env(self, task):
+    def _construct_subprocess_env(self, task=None):
         env = os.environ.copy()
 
-        if task.plugin_fk and self._plugin_manager:
+        if task is not None and task.plugin_fk and self._plugin_manager:
             # If this is a plugin operation,
             # load the plugin on the subprocess env we're constructing
             self._plugin_manager.load_plugin(task.plugin, env=env)
@@ -193,32 +275,71 @@ class ProcessExecutor(base.BaseExecutor):
     def _listener(self):
         # Notify __init__ method this thread has actually started
         self._listener_started.put(True)
-        while not self._stopped:
-            try:
-                with self._accept_request() as (request, response):
-                    request_type = request['type']
-                    if request_type == 'closed':
-                        break
-                    request_handler = self._request_handlers.get(request_type)
-                    if not request_handler:
-                        raise RuntimeError('Invalid request type: {0}'.format(request_type))
-                    task_id = request['task_id']
-                    request_handler(task_id=task_id, request=request, response=response)
-            except BaseException as e:
-                self.logger.debug('Error in process executor listener: {0}'.format(e))
-
-    @contextlib.contextmanager
-    def _accept_request(self):
-        with contextlib.closing(self._server_socket.accept()[0]) as connection:
-            message = _recv_message(connection)
-            response = {}
-            try:
-                yield message, response
-            except BaseException as e:
-                response['exception'] = exceptions.wrap_if_needed(e)
-                raise
-            finally:
-                _send_message(connection, response)
+        # Received data of each open channel, which doesn't make up a whole message yet
+        channels = {}
+        try:
+            # Stops once the executor sends the "closed" message
+            while True:
+                readable = select.select([self._server_socket] + channels.keys(), [], [])[0]
+                for connection in readable:
+                    if connection is self._server_socket:
+                        channels[self._server_socket.accept()[0]] = ''
+                        continue
+                    try:
+                        requests = self._recv_requests(connection, channels)
+                    except BaseException as e:
+                        self.logger.debug('Error in process executor listener: {0}'.format(e))
+                        requests = None
+                    if requests is None:
+                        del channels[connection]
+                        connection.close()
+                        continue
+                    for request in requests:
+                        if not self._handle_request(connection, request):
+                            return
+        finally:
+            for connection in channels:
+                connection.close()
+
+    @staticmethod
+    def _recv_requests(connection, channels):
+        """
+        Receives the available data of a channel.
+
+        :return: the requests which were fully received, or ``None`` if the channel was closed
+        """
+        data = connection.recv(_RECV_SIZE)
+        if not data:
+            return None
+        requests, channels[connection] = ipc.unpack_messages(channels[connection] + data)
+        return requests
+
+    def _handle_request(self, connection, request):
+        """
+        Handles a request and sends back its response.
+
+        :return: whether the listener should keep on handling requests
+        """
+        request_type = request['type']
+        task_id = request['task_id']
+        response = {}
+        try:
+            if request_type != 'closed':
+                request_handler = self._request_handlers.get(request_type)
+                if not request_handler:
+                    raise RuntimeError('Invalid request type: {0}'.format(request_type))
+                request_handler(task_id=task_id, request=request, response=response)
+        except BaseException as e:
+            self.logger.debug('Error in process executor listener: {0}'.format(e))
+            response['exception'] = exceptions.wrap_if_needed(e, serializer=pickle)
+        try:
+            ipc.send_message(connection, response)
+        except socket.error as e:
+            self.logger.debug('Error in process executor listener: {0}'.format(e))
+        # The worker is only handed its next task after it got the response, as it blocks on it
+        if self._pool and request_type in ('succeeded', 'failed'):
+            self._pool.release(task_id)
+        return request_type != 'closed'
 
     def _handle_task_started_request(self, task_id, **kwargs):
         self._task_started(self._tasks[task_id].ctx)
@@ -235,46 +356,210 @@ class ProcessExecutor(base.BaseExecutor):
                 task.ctx, exception=request['exception'], traceback=request['traceback'])
 
 
-def _send_message(connection, message):
+class _PipeConnection(object):
+    """
+    Exposes pipe file descriptors through the socket methods used by the message framing.
+    """
 
-    # Packing the length of the entire msg using struct.pack.
-    # This enables later reading of the content.
-    def _pack(data):
-        return struct.pack(_INT_FMT, len(data))
+    def __init__(self, read_fd=None, write_fd=None):
+        self._read_fd = read_fd
+        self._write_fd = write_fd
 
-    data = jsonpickle.dumps(message)
-    msg_metadata = _pack(data)
-    connection.send(msg_metadata)
-    connection.sendall(data)
+    def recv(self, count):
+        return os.read(self._read_fd, count)
 
+    def sendall(self, data):
+        while data:
+            data = data[os.write(self._write_fd, data):]
 
-def _recv_message(connection):
-    # Retrieving the length of the msg to come.
-    def _unpack(conn):
-        return struct.unpack(_INT_FMT, _recv_bytes(conn, _INT_SIZE))[0]
+    send = sendall
 
-    msg_metadata_len = _unpack(connection)
-    msg = _recv_bytes(connection, msg_metadata_len)
-    return jsonpickle.loads(msg)
 
+class _Worker(object):
+    """
+    A warm subprocess which executes tasks one at a time.
+    """
 
-def _recv_bytes(connection, count):
-    result = io.BytesIO()
-    while True:
-        if not count:
-            return result.getvalue()
-        read = connection.recv(count)
-        if not read:
-            return result.getvalue()
-        result.write(read)
-        count -= len(read)
+    def __init__(self, proc, key):
+        self.proc = proc
+        self.key = key
+        self.tasks_count = 0
+        self._connection = _PipeConnection(write_fd=proc.stdin.fileno())
+
+    def execute(self, arguments):
+        self.tasks_count += 1
+        ipc.send_message(self._connection, {'type': 'execute', 'arguments': arguments})
+
+    def stop(self):
+        # The worker exits once its stdin is closed
+        try:
+            self.proc.stdin.close()
+        except BaseException:
+            pass
+
+    @property
+    def stopped(self):
+        return self.proc.poll() is not None
+
+    @property
+    def memory(self):
+        try:
+            return psutil.Process(self.proc.pid).memory_info().rss
+        except psutil.Error:
+            return 0
+
+
+class _WorkerPool(object):
+    """
+    Pool of warm worker subprocesses.
+
+    Each worker has a key (the plugin it has loaded), and only executes tasks with the same key.
+    Tasks are queued until such a worker is idle, or a new one can be started. Idle workers are
+    stopped, least recently used first, to make room for workers with other keys when the pool is
+    full or uses more than ``max_memory``. Workers are also replaced after
+    ``max_tasks_per_worker`` tasks.
+    """
+
+    def __init__(self, size, max_tasks_per_worker, max_memory, key_size, spawn, on_dispatch):
+        self._size = size
+        self._max_tasks_per_worker = max_tasks_per_worker
+        self._max_memory = max_memory
+        self._key_size = key_size
+        self._spawn = spawn
+        self._on_dispatch = on_dispatch
+        self._lock = threading.RLock()
+        self._workers = set()
+        # Ordered from the least recently used
+        self._idle_workers = []
+        self._busy_workers = {}
+        self._stopped_workers = []
+        # Tasks waiting for a worker, as (ctx, arguments, key) tuples
+        self._pending_tasks = deque()
+
+    def start(self, key):
+        with self._lock:
+            while len(self._workers) < min(self._size, self._key_size(key)):
+                self._idle_workers.append(self._start_worker(key))
+
+    def submit(self, ctx, arguments, key):
+        with self._lock:
+            self._pending_tasks.append((ctx, arguments, key))
+            self._dispatch()
+
+    def release(self, task_id):
+        with self._lock:
+            worker = self._busy_workers.pop(task_id, None)
+            if worker is not None:
+                if self._max_tasks_per_worker and \
+                        worker.tasks_count >= self._max_tasks_per_worker:
+                    self._stop_worker(worker)
+                else:
+                    self._idle_workers.append(worker)
+            self._dispatch()
+
+    def discard(self, task_id):
+        with self._lock:
+            worker = self._busy_workers.pop(task_id, None)
+            if worker is not None:
+                self._workers.discard(worker)
+                self._stopped_workers.append(worker)
+            for pending_task in list(self._pending_tasks):
+                if pending_task[0]._task_id == task_id:
+                    self._pending_tasks.remove(pending_task)
+            self._dispatch()
+
+    def close(self):
+        with self._lock:
+            self._pending_tasks.clear()
+            for worker in list(self._workers):
+                self._stop_worker(worker)
+            for worker in self._stopped_workers:
+                try:
+                    worker.proc.wait()
+                except BaseException:
+                    pass
+            self._stopped_workers = []
+
+    def _dispatch(self):
+        self._reap_stopped_workers()
+        # Tasks which can't get a worker yet don't hold back tasks with other keys
+        for pending_task in list(self._pending_tasks):
+            ctx, arguments, key = pending_task
+            worker = self._acquire_worker(key)
+            if worker is None:
+                continue
+            self._pending_tasks.remove(pending_task)
+            self._busy_workers[ctx._task_id] = worker
+            self._on_dispatch(ctx, worker)
+            worker.execute(arguments)
+
+    def _acquire_worker(self, key):
+        for worker in list(self._idle_workers):
+            if worker.stopped:
+                # The worker exited unexpectedly
+                self._stop_worker(worker)
+            elif worker.key == key:
+                self._idle_workers.remove(worker)
+                return worker
+
+        if len([worker for worker in self._workers if worker.key == key]) >= self._key_size(key):
+            return None
+        while self._idle_workers and (len(self._workers) >= self._size or self._memory_exceeded()):
+            self._stop_worker(self._idle_workers[0])
+        if len(self._workers) >= self._size or (self._workers and self._memory_exceeded()):
+            return None
+        return self._start_worker(key)
+
+    def _memory_exceeded(self):
+        if not self._max_memory:
+            return False
+        return sum(worker.memory for worker in self._workers) >= self._max_memory
+
+    def _start_worker(self, key):
+        worker = _Worker(proc=self._spawn(key), key=key)
+        self._workers.add(worker)
+        return worker
+
+    def _stop_worker(self, worker):
+        worker.stop()
+        self._workers.discard(worker)
+        if worker in self._idle_workers:
+            self._idle_workers.remove(worker)
+        self._stopped_workers.append(worker)
+
+    def _reap_stopped_workers(self):
+        self._stopped_workers = [worker for worker in self._stopped_workers if not worker.stopped]
+
+
+class _Channel(object):
+    """
+    Long-lived connection to the executor's listener, used for all the messages of a subprocess.
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self._socket = None
+        self._lock = threading.Lock()
+
+    def request(self, message):
+        with self._lock:
+            if self._socket is None:
+                self._socket = ipc.connect(self.address)
+            ipc.send_message(self._socket, message)
+            return ipc.recv_message(self._socket)
+
+    def close(self):
+        with self._lock:
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
 
 
 class _Messenger(object):
 
-    def __init__(self, task_id, port):
+    def __init__(self, task_id, channel):
         self.task_id = task_id
-        self.port = port
+        self.channel = channel
 
     def started(self):
         """Task started message"""
@@ -293,21 +578,15 @@ class _Messenger(object):
         self._send_message(type='closed')
 
     def _send_message(self, type, exception=None):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect(('localhost', self.port))
-        try:
-            _send_message(sock, {
-                'type': type,
-                'task_id': self.task_id,
-                'exception': exceptions.wrap_if_needed(exception),
-                'traceback': exceptions.get_exception_as_string(*sys.exc_info()),
-            })
-            response = _recv_message(sock)
-            response_exception = response.get('exception')
-            if response_exception:
-                raise response_exception
-        finally:
-            sock.close()
+        response = self.channel.request({
+            'type': type,
+            'task_id': self.task_id,
+            'exception': exceptions.wrap_if_needed(exception, serializer=pickle),
+            'traceback': exceptions.get_exception_as_string(*sys.exc_info()),
+        })
+        response_exception = response.get('exception')
+        if response_exception:
+            raise response_exception
 
 
 def _main():
@@ -319,16 +598,72 @@ def _main():
     # so we remove it here
     os.remove(arguments_json_path)
 
+    channel = _Channel(arguments['address'])
+    try:
+        _execute_task(arguments, channel=channel, install_extensions=True, reuse_storage=False)
+    finally:
+        channel.close()
+
+
+def _worker_main():
+    # Tasks are read from a duplicate of stdin, while the tasks themselves get an empty stdin
+    connection = _PipeConnection(read_fd=os.dup(sys.stdin.fileno()))
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, sys.stdin.fileno())
+    os.close(devnull)
+
+    # Done once, so tasks don't pay for it
+    aria.install_aria_extensions()
+    sqlalchemy.orm.configure_mappers()
+    aria.application_model_storage = _reuse_storage(aria.application_model_storage)
+    aria.application_resource_storage = _reuse_storage(aria.application_resource_storage)
+
+    # Shared by all the worker's tasks
+    channel = None
+    while True:
+        try:
+            message = ipc.recv_message(connection)
+        except EOFError:
+            # stdin was closed by the executor
+            return
+        arguments = message['arguments']
+        if channel is None or channel.address != arguments['address']:
+            channel = _Channel(arguments['address'])
+        _execute_task(arguments, channel=channel, install_extensions=False, reuse_storage=True)
+
+
+def _reuse_storage(storage_factory):
+    """
+    Makes a worker's tasks reuse the storage (and its tables setup) of previous tasks which used
+    the same storage arguments.
+    """
+    storages = {}
+
+    @functools.wraps(storage_factory)
+    def _storage_factory(*args, **kwargs):
+        try:
+            key = pickle.dumps((args, sorted(kwargs.iteritems())))
+        except BaseException:
+            return storage_factory(*args, **kwargs)
+        if key not in storages:
+            storages[key] = storage_factory(*args, **kwargs)
+        return storages[key]
+
+    return _storage_factory
+
+
+def _execute_task(arguments, channel, install_extensions, reuse_storage):
     task_id = arguments['task_id']
-    port = arguments['port']
-    messenger = _Messenger(task_id=task_id, port=port)
+    messenger = _Messenger(task_id=task_id, channel=channel)
 
     function = arguments['function']
     operation_arguments = arguments['operation_arguments']
     context_dict = arguments['context']
 
     try:
-        ctx = context_dict['context_cls'].instantiate_from_dict(**context_dict['context'])
+        # Workers reuse the storage (see _reuse_storage), along with its pooled connections
+        ctx = context_dict['context_cls'].instantiate_from_dict(reuse_storage=reuse_storage,
+                                                                **context_dict['context'])
     except BaseException as e:
         messenger.failed(e)
         return
@@ -336,7 +671,8 @@ def _main():
     try:
         messenger.started()
         task_func = imports.load_attribute(function)
-        aria.install_aria_extensions()
+        if install_extensions:
+            aria.install_aria_extensions()
         for decorate in process_executor.decorate():
             task_func = decorate(task_func)
         task_func(ctx=ctx, **operation_arguments)
@@ -347,4 +683,7 @@ def _main():
         messenger.failed(e)
 
 if __name__ == '__main__':
-    _main()
+    if sys.argv[1] == _WORKER_ARG:
+        _worker_main()
+    else:
+        _main()
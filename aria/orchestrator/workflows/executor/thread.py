@@ -27,53 +27,177 @@ from aria.utils import imports, exceptions
 from .base import BaseExecutor
 
 
+# Queued to wake up a thread and have it exit
+_STOP = object()
+
+
 class ThreadExecutor(BaseExecutor):
     """
     Thread task executor.
 
     It's easier writing tests using this executor rather than the full-blown sub-process executor.
 
+    The pool has ``pool_size`` threads. If ``max_pool_size`` is larger, the pool is elastic: a
+    thread is added whenever the number of queued tasks which no idle thread is about to take
+    exceeds ``backlog_threshold``, up to ``max_pool_size`` threads, and the added threads exit after
+    being idle for ``idle_timeout`` seconds.
+
     Note: This executor is incapable of running plugin operations.
+
+    :param pool_size: number of threads (the minimal number of threads of an elastic pool)
+    :param close_timeout: seconds to wait for each executing task when closing; ``None`` to wait
+     until they end
+    :param max_pool_size: maximal number of threads; ``None`` for a fixed pool of ``pool_size``
+     threads
+    :param backlog_threshold: number of waiting tasks above which an elastic pool adds a thread
+    :param idle_timeout: seconds after which idle threads above ``pool_size`` exit
     """
 
-    def __init__(self, pool_size=1, close_timeout=5, *args, **kwargs):
+    def __init__(self, pool_size=1, close_timeout=5, max_pool_size=None, backlog_threshold=0,
+                 idle_timeout=30, *args, **kwargs):
         super(ThreadExecutor, self).__init__(*args, **kwargs)
         self._stopped = False
         self._close_timeout = close_timeout
+        self._pool_size = pool_size
+        self._max_pool_size = max(max_pool_size or pool_size, pool_size)
+        self._backlog_threshold = backlog_threshold
+        self._idle_timeout = idle_timeout
         self._queue = Queue.Queue()
+        self._lock = threading.Lock()
+        self._thread_index = 0
         self._pool = []
-        for i in range(pool_size):
-            name = 'ThreadExecutor-{index}'.format(index=i+1)
-            thread = threading.Thread(target=self._processor, name=name)
-            thread.daemon = True
-            thread.start()
-            self._pool.append(thread)
+        self._idle_count = 0
+        self._executed_count = 0
+        # IDs of the tasks which were queued and haven't ended yet
+        self._pending = set()
+        # IDs of the pending tasks which were terminated
+        self._terminated = set()
+        with self._lock:
+            for _ in range(pool_size):
+                self._add_thread()
+
+    @property
+    def stats(self):
+        """
+        Statistics of the pool: ``threads``, ``busy_threads``, ``queue_depth`` (number of queued
+        tasks), ``utilization`` (fraction of the threads which are busy) and ``executed_tasks``.
+        """
+        with self._lock:
+            threads = len(self._pool)
+            busy_threads = threads - self._idle_count
+            return {
+                'threads': threads,
+                'busy_threads': busy_threads,
+                'queue_depth': self._queue.qsize(),
+                'utilization': float(busy_threads) / threads if threads else 0.0,
+                'executed_tasks': self._executed_count
+            }
 
     def _execute(self, ctx):
-        self._queue.put(ctx)
+        task_id = ctx.task.id
+        with self._lock:
+            self._pending.add(task_id)
+            self._queue.put((task_id, ctx))
+            if len(self._pool) < self._max_pool_size and not self._stopped and \
+                    self._queue.qsize() - self._idle_count > self._backlog_threshold:
+                self._add_thread()
+
+    def terminate(self, task_id):
+        """
+        Terminates a task. A queued task is dropped; an executing task can't be interrupted, so it
+        keeps executing, and its result is ignored. Terminated tasks end without a signal, as with
+        the other executors.
+        """
+        with self._lock:
+            if task_id in self._pending:
+                self._terminated.add(task_id)
 
     def close(self):
-        self._stopped = True
-        for thread in self._pool:
+        with self._lock:
+            self._stopped = True
+            pool = list(self._pool)
+        # Every thread wakes up on a sentinel (after its current task), rather than on a timeout
+        for _ in pool:
+            self._queue.put(_STOP)
+        for thread in pool:
             if self._close_timeout is None:
                 thread.join()
             else:
                 thread.join(self._close_timeout)
+        super(ThreadExecutor, self).close()
+
+    def _add_thread(self):
+        self._thread_index += 1
+        name = 'ThreadExecutor-{index}'.format(index=self._thread_index)
+        thread = threading.Thread(target=self._processor, name=name)
+        thread.daemon = True
+        self._pool.append(thread)
+        self._idle_count += 1
+        thread.start()
 
     def _processor(self):
-        while not self._stopped:
+        thread = threading.current_thread()
+        while True:
+            item = self._next_item(thread)
+            if item is _STOP:
+                return
+            task_id, ctx = item
             try:
-                ctx = self._queue.get(timeout=1)
-                self._task_started(ctx)
-                try:
-                    task_func = imports.load_attribute(ctx.task.function)
-                    arguments = dict(arg.unwrapped for arg in ctx.task.arguments.itervalues())
-                    task_func(ctx=ctx, **arguments)
-                    self._task_succeeded(ctx)
-                except BaseException as e:
-                    self._task_failed(ctx,
-                                      exception=e,
-                                      traceback=exceptions.get_exception_as_string(*sys.exc_info()))
+                self._process(task_id, ctx)
             # Daemon threads
-            except BaseException as e:
+            except BaseException:
                 pass
+            finally:
+                with self._lock:
+                    self._pending.discard(task_id)
+                    self._terminated.discard(task_id)
+                    self._executed_count += 1
+                    self._idle_count += 1
+
+    def _next_item(self, thread):
+        while True:
+            with self._lock:
+                elastic = len(self._pool) > self._pool_size
+            try:
+                item = self._queue.get(timeout=self._idle_timeout) if elastic \
+                    else self._queue.get()
+            except Queue.Empty:
+                with self._lock:
+                    if len(self._pool) > self._pool_size:
+                        self._remove_thread(thread)
+                        return _STOP
+                continue
+            with self._lock:
+                if item is _STOP or self._stopped:
+                    # Tasks which are still queued when the executor is closed are dropped
+                    self._remove_thread(thread)
+                    return _STOP
+                self._idle_count -= 1
+                return item
+
+    def _remove_thread(self, thread):
+        self._pool.remove(thread)
+        self._idle_count -= 1
+
+    def _process(self, task_id, ctx):
+        with self._lock:
+            if task_id in self._terminated:
+                return
+        self._task_started(ctx)
+
+        error = traceback = None
+        try:
+            task_func = imports.load_attribute(ctx.task.function)
+            arguments = dict(arg.unwrapped for arg in ctx.task.arguments.itervalues())
+            task_func(ctx=ctx, **arguments)
+        except BaseException as e:
+            error = e
+            traceback = exceptions.get_exception_as_string(*sys.exc_info())
+
+        with self._lock:
+            if task_id in self._terminated:
+                return
+        if error is None:
+            self._task_succeeded(ctx)
+        else:
+            self._task_failed(ctx, exception=error, traceback=traceback)
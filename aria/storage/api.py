@@ -18,6 +18,7 @@ Storage APIs.
 """
 
 import threading
+from contextlib import contextmanager
 
 
 class StorageAPI(object):
@@ -115,6 +116,34 @@ class ModelAPI(StorageAPI):
         """
         raise NotImplementedError('Subclass must implement abstract update method')
 
+    def put_many(self, entries, **kwargs):
+        """
+        Puts models in storage.
+
+        :param entries: models
+        :return: list of the models
+        """
+        with self.bulk():
+            return [self.put(entry, **kwargs) for entry in entries]
+
+    def update_many(self, entries, **kwargs):
+        """
+        Updates models in storage.
+
+        :param entries: models
+        :return: list of the models
+        """
+        with self.bulk():
+            return [self.update(entry, **kwargs) for entry in entries]
+
+    @contextmanager
+    def bulk(self):                                                                                 # pylint: disable=no-self-use
+        """
+        Context manager which groups the storage changes made within it, where the storage supports
+        it, e.g. into a single transaction.
+        """
+        yield
+
 
 class ResourceAPI(StorageAPI):
     """
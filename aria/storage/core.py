@@ -146,6 +146,18 @@ class ModelStorage(Storage):
         for mapi in self.registered.itervalues():
             mapi.drop()
 
+    def upgrade(self):
+        """
+        Upgrade the tables of a storage created by an earlier version (e.g. create indexes which
+        were added since).
+
+        :return: names of the created indexes
+        """
+        created = []
+        for mapi in self.registered.itervalues():
+            created.extend(mapi.upgrade())
+        return created
+
     @contextmanager
     def instrument(self, *instrumentation):
         original_instrumentation = {}
@@ -112,9 +112,13 @@ class _WrappedException(Exception):
         self.exception_str = exception_str
 
 
-def wrap_if_needed(exception):
+def wrap_if_needed(exception, serializer=jsonpickle):
+    """
+    Wraps the exception if it can't be serialized and deserialized by ``serializer`` (any object
+    with ``dumps`` and ``loads``, e.g. :mod:`pickle`).
+    """
     try:
-        jsonpickle.loads(jsonpickle.dumps(exception))
+        serializer.loads(serializer.dumps(exception))
         return exception
     except BaseException:
         return _WrappedException(type(exception).__name__, str(exception))
@@ -0,0 +1,47 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Generator utilities.
+"""
+
+import sys
+
+
+def delegate(generator, context_factory):
+    """
+    Delegates to a generator (e.g. a coroutine), with a context entered only while the generator
+    runs, so generators which are interleaved on the same thread (e.g. on an event loop) don't see
+    each other's context.
+
+    :param generator: generator to delegate to
+    :param context_factory: called to create the context manager entered during each step of the
+     generator
+    """
+    value, exc_info = None, ()
+    while True:
+        with context_factory():
+            # StopIteration (and the return value it might carry) propagates to the caller
+            if not exc_info:
+                yielded = generator.send(value)
+            else:
+                yielded = generator.throw(*exc_info)
+        try:
+            value, exc_info = (yield yielded), ()
+        except GeneratorExit:
+            generator.close()
+            raise
+        except BaseException:
+            value, exc_info = None, sys.exc_info()
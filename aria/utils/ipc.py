@@ -0,0 +1,131 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Inter-process communication over local sockets.
+
+Messages are pickled, and framed by their length, so several messages can be sent over the same
+connection.
+"""
+
+import io
+import os
+import socket
+import struct
+import tempfile
+import cPickle as pickle
+
+_INT_FMT = 'I'
+_INT_SIZE = struct.calcsize(_INT_FMT)
+
+
+def listen(prefix):
+    """
+    Creates a listening socket which processes of the same host can connect to.
+
+    A Unix domain socket in a new temporary directory is created where supported (so other users
+    can't connect to it), or else a TCP socket on ``localhost``.
+
+    :param prefix: prefix of the temporary directory's name
+    :return: the socket, its address (see :func:`connect`), and the temporary directory, which
+     should be deleted once the socket is closed (or ``None``)
+    """
+    directory = None
+    if hasattr(socket, 'AF_UNIX'):
+        directory = tempfile.mkdtemp(prefix=prefix)
+        address = os.path.join(directory, 'listener.sock')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(address)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(('localhost', 0))
+        address = sock.getsockname()
+    sock.listen(socket.SOMAXCONN)
+    return sock, address, directory
+
+
+def connect(address):
+    """
+    Connects to a socket created by :func:`listen`.
+
+    :param address: address of the socket
+    :raises socket.error: if the connection failed
+    """
+    if isinstance(address, basestring):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.connect(address)
+    except socket.error:
+        sock.close()
+        raise
+    return sock
+
+
+def send_message(connection, message):
+    """
+    Sends a message.
+
+    :param connection: socket, or an object with its ``sendall`` method
+    :param message: picklable object
+    """
+    data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    connection.sendall(struct.pack(_INT_FMT, len(data)) + data)
+
+
+def recv_message(connection):
+    """
+    Receives a message, blocking until it's fully received.
+
+    :param connection: socket, or an object with its ``recv`` method
+    :raises EOFError: if the connection was closed
+    """
+    size = struct.unpack(_INT_FMT, recv_bytes(connection, _INT_SIZE))[0]
+    return pickle.loads(recv_bytes(connection, size))
+
+
+def recv_bytes(connection, count):
+    """
+    Receives an exact number of bytes.
+
+    :param connection: socket, or an object with its ``recv`` method
+    :param count: number of bytes
+    :raises EOFError: if the connection was closed
+    """
+    result = io.BytesIO()
+    while count:
+        read = connection.recv(count)
+        if not read:
+            raise EOFError('Connection closed')
+        result.write(read)
+        count -= len(read)
+    return result.getvalue()
+
+
+def unpack_messages(data):
+    """
+    Splits received data into whole messages (e.g. when receiving without blocking).
+
+    :return: the messages, and the remaining data of a message which wasn't fully received yet
+    """
+    messages = []
+    while len(data) >= _INT_SIZE:
+        message_end = _INT_SIZE + struct.unpack(_INT_FMT, data[:_INT_SIZE])[0]
+        if len(data) < message_end:
+            break
+        messages.append(pickle.loads(data[_INT_SIZE:message_end]))
+        data = data[message_end:]
+    return messages, data
@@ -0,0 +1,43 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Time measurement utilities.
+"""
+
+
+def total_seconds(delta):
+    """
+    Total seconds of a :class:`~datetime.timedelta` (``timedelta.total_seconds`` is not available
+    on Python 2.6).
+    """
+    return (delta.microseconds + (delta.seconds + delta.days * 24 * 3600) * 10 ** 6) / 10.0 ** 6
+
+
+def percentile(durations, percent):
+    """
+    Percentile of durations (or any other measurements), interpolated between the closest ranks.
+
+    :param durations: durations, in any order
+    :param percent: percentile, between 0 and 100
+    :return: duration, or ``None`` if there are no durations
+    """
+    durations = sorted(durations)
+    if not durations:
+        return None
+    rank = (len(durations) - 1) * percent / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(durations) - 1)
+    return durations[lower] + (durations[upper] - durations[lower]) * (rank - lower)
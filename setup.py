@@ -53,8 +53,18 @@ win_ssh_requires = [
     'pypiwin32==219'
 ]
 
+asyncio_requires = [
+    'trollius>=2.1, <3.0',
+]
+
+postgresql_requires = [
+    'psycopg2>=2.7, <3.0',
+]
+
 extras_require = {
     'ssh': ssh_requires,
+    'asyncio': asyncio_requires,
+    'postgresql': postgresql_requires,
     'ssh:sys_platform=="win32"': win_ssh_requires
 }
 
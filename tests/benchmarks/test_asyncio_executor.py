@@ -0,0 +1,83 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput of the asyncio executor with many concurrent coroutine operations, each sleeping for a
+second.
+
+Run with ``pytest tests/benchmarks -s`` to see the throughput.
+"""
+
+import time
+
+import pytest
+import retrying
+
+try:
+    import trollius
+    from aria.orchestrator.workflows.executor import asyncio
+except ImportError:
+    trollius = None
+
+import aria
+from aria.orchestrator import events
+
+from tests import storage
+from tests.orchestrator.workflows.executor import MockContext
+
+pytestmark = pytest.mark.skipif(trollius is None, reason='requires trollius')
+
+TASKS = 1000
+
+
+def test_asyncio_executor_throughput(model_storage):
+    ended = []
+
+    def end_handler(*args, **kwargs):
+        ended.append(True)
+
+    events.on_success_task_signal.connect(end_handler)
+    executor = asyncio.AsyncioExecutor()
+    try:
+        start = time.time()
+        for _ in xrange(TASKS):
+            executor.execute(MockContext(model_storage, task_kwargs=dict(
+                function='{0}.{1}'.format(__name__, mock_coroutine.__name__))))
+
+        @retrying.retry(stop_max_delay=60000, wait_fixed=100)
+        def wait_for_end():
+            assert len(ended) == TASKS
+        wait_for_end()
+        duration = time.time() - start
+    finally:
+        executor.close()
+        events.on_success_task_signal.disconnect(end_handler)
+    print '\n{0} coroutines: {1:.0f} tasks/s'.format(TASKS, TASKS / duration)
+    # A thread per task would take 100 seconds with the default pool size
+    assert duration < 100
+
+
+if trollius is not None:
+    @trollius.coroutine
+    def mock_coroutine(**_):
+        yield trollius.From(trollius.sleep(1))
+
+
+@pytest.fixture
+def model_storage(tmpdir):
+    _storage = aria.application_model_storage(aria.storage.sql_mapi.SQLAlchemyModelAPI,
+                                              initiator_kwargs=dict(base_dir=str(tmpdir)))
+    yield _storage
+    storage.release_sqlite_storage(_storage)
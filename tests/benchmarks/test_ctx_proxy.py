@@ -0,0 +1,79 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput of the ctx proxy, with clients opening a connection per request (as the ``ctx`` client
+does) and with clients keeping their connection alive, one at a time and concurrently.
+
+Run with ``pytest tests/benchmarks -s`` to see the throughputs and latencies.
+"""
+
+import json
+import time
+import httplib
+import threading
+
+import pytest
+
+from aria.orchestrator.execution_plugin import ctx_proxy
+
+from tests import mock, storage
+
+REQUESTS = 500
+ARGS = ['service', 'name']
+
+
+def _connection_per_request(proxy):
+    for _ in xrange(REQUESTS):
+        ctx_proxy.client._client_request(proxy.socket_url, ARGS, timeout=5)
+
+
+def _kept_alive_connection(proxy):
+    connection = httplib.HTTPConnection('localhost', proxy.port, timeout=5)
+    body = json.dumps(dict(args=ARGS))
+    try:
+        for _ in xrange(REQUESTS):
+            connection.request('POST', '/', body)
+            connection.getresponse().read()
+    finally:
+        connection.close()
+
+
+def _run(ctx, client, clients):
+    with ctx_proxy.server.CtxProxy(ctx) as proxy:
+        threads = [threading.Thread(target=client, args=(proxy, )) for _ in xrange(clients)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.time() - start
+    assert proxy.metrics.count == REQUESTS * clients
+    return REQUESTS * clients / duration, proxy.metrics.percentile(50)
+
+
+@pytest.fixture
+def ctx(tmpdir):
+    context = mock.context.simple(str(tmpdir))
+    yield context
+    storage.release_sqlite_storage(context.model)
+
+
+@pytest.mark.parametrize('client', (_connection_per_request, _kept_alive_connection))
+def test_ctx_proxy_throughput(ctx, client):
+    for clients in (1, 4):
+        throughput, latency = _run(ctx, client, clients)
+        print '\n{0}, {1} clients: {2:.0f} requests/s, median latency {3:.2f} ms'.format(
+            client.__name__.strip('_'), clients, throughput, latency * 1000)
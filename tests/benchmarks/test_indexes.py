@@ -0,0 +1,165 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Latencies of the model storage's hot filtering queries on a large database, without and with the
+composite indexes of the log, task, node and plugin tables.
+
+The indexes are dropped, as in a database created before they were added, and then created by
+upgrading the storage.
+
+Run with ``pytest tests/benchmarks -s`` to see the latencies.
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from aria.modeling import models
+
+from tests import mock, storage
+
+EXECUTIONS = 20
+LOGS_PER_EXECUTION = 5000
+TASKS_PER_EXECUTION = 2000
+SERVICES = 200
+NODES_PER_SERVICE = 50
+PLUGINS = 2000
+REPEATS = 20
+
+INDEXES = (
+    (models.Log, 'ix_log_execution_fk_id'),
+    (models.Task, 'ix_task_execution_fk_status'),
+    (models.Node, 'ix_node_service_fk_name'),
+    (models.Plugin, 'ix_plugin_package_name_package_version'),
+)
+
+
+def _insert(ctx, model_cls, rows):
+    ctx.model.log._engine.execute(model_cls.__table__.insert(), rows)
+
+
+def _row(ctx, model_cls, entry_id):
+    row = ctx.model.log._engine.execute(
+        model_cls.__table__.select().where(model_cls.id == entry_id)).first()
+    row = dict(row)
+    del row['id']
+    return row
+
+
+def _populate(ctx):
+    service_row = _row(ctx, models.Service, ctx.service.id)
+    node_row = _row(ctx, models.Node,
+                    ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME).id)
+    execution_row = _row(ctx, models.Execution, ctx.execution.id)
+
+    _insert(ctx, models.Service, [dict(service_row, name='service_{0}'.format(i))
+                                  for i in xrange(SERVICES)])
+    service_ids = [service.id for service in ctx.model.service.list()]
+    _insert(ctx, models.Node, [dict(node_row, service_fk=service_id, name='node_{0}'.format(i))
+                               for service_id in service_ids
+                               for i in xrange(NODES_PER_SERVICE)])
+
+    _insert(ctx, models.Execution, [execution_row] * EXECUTIONS)
+    execution_ids = [execution.id for execution in ctx.model.execution.list()]
+    now = datetime.utcnow()
+    for execution_id in execution_ids:
+        _insert(ctx, models.Task, [dict(execution_fk=execution_id,
+                                        status=models.Task.SUCCESS if i % 100 else
+                                        models.Task.PENDING,
+                                        due_at=now,
+                                        max_attempts=1,
+                                        attempts_count=1,
+                                        retry_interval=0,
+                                        ignore_failure=False,
+                                        name='task_{0}'.format(i))
+                                   for i in xrange(TASKS_PER_EXECUTION)])
+        _insert(ctx, models.Log, [dict(execution_fk=execution_id, level='INFO', msg='message',
+                                       created_at=now)
+                                  for _ in xrange(LOGS_PER_EXECUTION)])
+
+    _insert(ctx, models.Plugin, [dict(package_name='package_{0}'.format(i % (PLUGINS / 10)),
+                                      package_version='{0}.0'.format(i),
+                                      archive_name='archive_{0}'.format(i),
+                                      supported_platform='any',
+                                      supported_py_versions=[],
+                                      distribution='any',
+                                      distribution_release='any',
+                                      distribution_version='any',
+                                      package_source='any',
+                                      wheels=[],
+                                      uploaded_at=now)
+                                 for i in xrange(PLUGINS)])
+    return execution_ids, service_ids
+
+
+def _queries(ctx, execution_ids, service_ids):
+    execution_id = execution_ids[len(execution_ids) / 2]
+    service_id = service_ids[len(service_ids) / 2]
+    return (
+        # ModelLogIterator following the logs of an execution
+        ('log', lambda: ctx.model.log.list(
+            filters=dict(execution_fk=execution_id, id=dict(gt=0)),
+            pagination=dict(size=100, cursor=None))),
+        ('task', lambda: ctx.model.task.list(
+            filters=dict(execution_fk=execution_id, status=models.Task.PENDING))),
+        ('node', lambda: ctx.model.node.list(
+            filters=dict(service_fk=service_id, name='node_{0}'.format(NODES_PER_SERVICE / 2)))),
+        ('plugin', lambda: ctx.model.plugin.list(
+            filters=dict(package_name='package_1',
+                         package_version='{0}.0'.format(PLUGINS / 2 + 1)))),
+    )
+
+
+def _measure(ctx, queries):
+    latencies = {}
+    results = {}
+    for name, query in queries:
+        durations = []
+        for _ in xrange(REPEATS):
+            start = time.time()
+            results[name] = [entry.id for entry in query()]
+            durations.append(time.time() - start)
+            ctx.model.log._session.expunge_all()
+        latencies[name] = sorted(durations)[len(durations) / 2]
+    return latencies, results
+
+
+@pytest.fixture
+def ctx(tmpdir):
+    context = mock.context.simple(str(tmpdir))
+    yield context
+    storage.release_sqlite_storage(context.model)
+
+
+def test_query_latencies(ctx):
+    execution_ids, service_ids = _populate(ctx)
+    queries = _queries(ctx, execution_ids, service_ids)
+    engine = ctx.model.log._engine
+
+    for _, index_name in INDEXES:
+        engine.execute('DROP INDEX {0}'.format(index_name))
+    latencies_before, results_before = _measure(ctx, queries)
+
+    assert set(ctx.model.upgrade()) == set(index_name for _, index_name in INDEXES)
+    latencies_after, results_after = _measure(ctx, queries)
+
+    assert results_after == results_before
+    assert all(results_after.itervalues())
+    print '\nmedian latencies (ms): {0}'.format(', '.join(
+        '{0} {1:.2f} -> {2:.2f}'.format(name, latencies_before[name] * 1000,
+                                        latencies_after[name] * 1000)
+        for name, _ in queries))
@@ -0,0 +1,124 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Flush and load throughputs of :class:`~aria.modeling.types.Dict` and
+:class:`~aria.modeling.types.List` columns with each codec, and the throughputs of the codecs
+themselves.
+
+Each model holds a parameter-like dict (as in the inputs, properties and arguments of a service
+with many parameters) and a list of strings (as in plugin wheels). The database is in memory, so
+the throughputs aren't bound by disk writes.
+
+Run with ``pytest tests/benchmarks -s`` to see the throughputs.
+"""
+
+import time
+
+import pytest
+from sqlalchemy import Column
+
+from aria import modeling
+from aria.modeling import types
+from aria.storage import ModelStorage, sql_mapi
+
+from tests import storage as tests_storage
+
+ENTRIES = 10000
+REPEATS = 3
+
+CODECS = (
+    ('json', types.JSON_CODEC),
+    ('json_compact', types.COMPACT_JSON_CODEC),
+)
+
+
+def _model_cls(codec_name, codec):
+    return type('{0}CodecModel'.format(codec_name.title().replace('_', '')),
+                (modeling.models.aria_declarative_base, modeling.mixins.ModelMixin),
+                {'__tablename__': '{0}_codec_model'.format(codec_name),
+                 'dict_value': Column(types.Dict(codec=codec)),
+                 'list_value': Column(types.List(codec=codec))})
+
+
+MODEL_CLASSES = dict((codec_name, _model_cls(codec_name, codec)) for codec_name, codec in CODECS)
+
+
+def _entry(model_cls, index):
+    return model_cls(
+        dict_value={'name': u'parameter_{0}'.format(index),
+                    'type_name': u'string',
+                    'value': u'value of parameter {0}'.format(index),
+                    'description': u'Description of parameter {0}.'.format(index)},
+        list_value=[u'plugin_{0}-1.0-py27-none-any.whl'.format(i) for i in xrange(10)])
+
+
+@pytest.fixture(scope='module', autouse=True)
+def module_cleanup():
+    yield
+    for model_cls in MODEL_CLASSES.itervalues():
+        modeling.models.aria_declarative_base.metadata.remove(model_cls.__table__)
+
+
+@pytest.fixture
+def model_storage():
+    result = ModelStorage(sql_mapi.SQLAlchemyModelAPI,
+                          initiator=tests_storage.init_inmemory_model_storage,
+                          items=MODEL_CLASSES.values())
+    yield result
+    tests_storage.release_sqlite_storage(result)
+
+
+@pytest.mark.parametrize('codec_name, codec', CODECS)
+def test_codec_throughput(codec_name, codec):
+    entry = _entry(MODEL_CLASSES[codec_name], 0)
+    values = [dict(entry.dict_value), list(entry.list_value)] * (ENTRIES / 2)
+
+    start = time.time()
+    encoded = [codec.encode(value) for value in values]
+    encode_duration = time.time() - start
+    start = time.time()
+    decoded = [codec.decode(value) for value in encoded]
+    decode_duration = time.time() - start
+
+    assert decoded == values
+    print '\n{0} codec: encode {1:.0f} values/s, decode {2:.0f} values/s, {3} bytes'.format(
+        codec_name, ENTRIES / encode_duration, ENTRIES / decode_duration, len(''.join(encoded)))
+
+
+@pytest.mark.parametrize('codec_name', [codec_name for codec_name, _ in CODECS])
+def test_storage_throughput(model_storage, codec_name):
+    model_cls = MODEL_CLASSES[codec_name]
+    mapi = getattr(model_storage, model_cls.__modelname__)
+    flush_durations, load_durations = [], []
+    for _ in xrange(REPEATS):
+        entries = [_entry(model_cls, index) for index in xrange(ENTRIES)]
+        start = time.time()
+        mapi.put_many(entries)
+        flush_durations.append(time.time() - start)
+
+        mapi._session.expunge_all()
+        start = time.time()
+        loaded = mapi.list()
+        assert all(entry.dict_value['type_name'] and entry.list_value for entry in loaded)
+        load_durations.append(time.time() - start)
+        assert len(loaded) == ENTRIES
+
+        mapi._session.query(model_cls).delete()
+        mapi._session.commit()
+        mapi._session.expunge_all()
+
+    print '\n{0} codec: flush {1:.0f} entries/s, load {2:.0f} entries/s'.format(
+        codec_name, ENTRIES / min(flush_durations), ENTRIES / min(load_durations))
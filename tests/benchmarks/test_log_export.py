@@ -0,0 +1,97 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput of exporting the logs of a large execution, compared with reading them as models, as
+``aria logs list`` does.
+
+Run with ``pytest tests/benchmarks -s`` to see the throughputs.
+"""
+
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from aria.cli.logger import ModelLogIterator
+from aria.modeling import models
+from aria.orchestrator import log_export
+
+from tests import mock, storage
+
+LOGS = 200000
+TASKS = 1000
+
+
+def _populate(ctx):
+    engine = ctx.model.log._engine
+    execution_id = ctx.execution.id
+    node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
+    now = datetime.now()
+    engine.execute(models.Task.__table__.insert(), [dict(execution_fk=execution_id,
+                                                         node_fk=node.id,
+                                                         status=models.Task.SUCCESS,
+                                                         due_at=now,
+                                                         max_attempts=1,
+                                                         attempts_count=1,
+                                                         retry_interval=0,
+                                                         ignore_failure=False,
+                                                         interface_name='Standard',
+                                                         operation_name='create',
+                                                         name='task_{0}'.format(i))
+                                                    for i in xrange(TASKS)])
+    task_ids = [task.id for task in ctx.model.task.list()]
+    engine.execute(models.Log.__table__.insert(), [dict(execution_fk=execution_id,
+                                                        task_fk=task_ids[i % TASKS],
+                                                        level='INFO',
+                                                        msg='message {0}'.format(i),
+                                                        created_at=now)
+                                                   for i in xrange(LOGS)])
+
+
+def _read_models(ctx, stream):
+    for log in ModelLogIterator(ctx.model, ctx.execution.id):
+        line = '{0} {1} {2} {3}\n'.format(log.created_at, log.level, log.task.node.name, log.msg)
+        stream.write(line)
+
+
+@pytest.fixture
+def ctx(tmpdir):
+    context = mock.context.simple(str(tmpdir))
+    yield context
+    storage.release_sqlite_storage(context.model)
+
+
+def test_export_throughput(ctx):
+    _populate(ctx)
+    execution_id = ctx.execution.id
+    actions = (
+        ('models', lambda stream: _read_models(ctx, stream)),
+        ('ndjson', lambda stream: log_export.export(ctx.model, execution_id, stream)),
+        ('columnar', lambda stream: log_export.export(
+            ctx.model, execution_id, stream, output_format=log_export.COLUMNAR)),
+    )
+
+    throughputs = []
+    for name, action in actions:
+        with open(os.devnull, 'w') as stream:
+            start = time.time()
+            action(stream)
+            throughputs.append((name, LOGS / (time.time() - start)))
+        ctx.model.log._session.expunge_all()
+
+    print '\n{0}'.format(', '.join('{0} {1:.0f} logs/s'.format(name, throughput)
+                                   for name, throughput in throughputs))
@@ -0,0 +1,122 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Concurrent throughput of the model storage with each SQLite profile.
+
+The engine (updating task states), an executor (writing operation logs) and a CLI log reader
+(following the logs with :class:`~aria.cli.logger.ModelLogIterator`) use the same database file,
+each with its own connection, as they do when running in different threads and processes.
+
+Run with ``pytest tests/benchmarks -s`` to see the throughputs.
+"""
+
+import time
+import threading
+from datetime import datetime
+
+import pytest
+
+import aria
+from aria.cli.logger import ModelLogIterator
+from aria.modeling import models
+from aria.storage import sql_mapi
+
+from tests import mock, storage
+
+DURATION = 3
+
+
+def _engine(model_storage, task_id, stop):
+    task = model_storage.task.get(task_id)
+    operations = 0
+    while not stop.is_set():
+        task.status = task.STARTED if task.status != task.STARTED else task.SENT
+        model_storage.task.update(task)
+        operations += 1
+    return operations
+
+
+def _executor(model_storage, task_id, stop):
+    task = model_storage.task.get(task_id)
+    operations = 0
+    while not stop.is_set():
+        model_storage.log.put(models.Log(execution_fk=task.execution.id,
+                                         task_fk=task.id,
+                                         level='INFO',
+                                         msg='message {0}'.format(operations),
+                                         created_at=datetime.utcnow()))
+        operations += 1
+    return operations
+
+
+def _log_reader(model_storage, task_id, stop):
+    task = model_storage.task.get(task_id)
+    logs = ModelLogIterator(model_storage, task.execution.id)
+    operations = 0
+    while not stop.is_set():
+        for _ in logs:
+            operations += 1
+    return operations
+
+
+def _run(base_dir, profile, task_id):
+    stop = threading.Event()
+    results = {}
+    errors = []
+
+    def run(actor):
+        model_storage = aria.application_model_storage(
+            sql_mapi.SQLAlchemyModelAPI, initiator_kwargs=dict(base_dir=base_dir),
+            profile=profile)
+        try:
+            results[actor.__name__.strip('_')] = actor(model_storage, task_id, stop)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            model_storage.task._session.remove()
+
+    threads = [threading.Thread(target=run, args=(actor, ))
+               for actor in (_engine, _executor, _log_reader)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+@pytest.fixture
+def ctx(tmpdir):
+    context = mock.context.simple(str(tmpdir))
+    yield context
+    storage.release_sqlite_storage(context.model)
+
+
+@pytest.mark.parametrize('profile', (sql_mapi.DEFAULT_PROFILE, sql_mapi.WAL_PROFILE))
+def test_concurrent_throughput(ctx, tmpdir, profile):
+    task = models.Task(execution=ctx.execution,
+                       node=ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME))
+    ctx.model.task.put(task)
+
+    results, errors = _run(str(tmpdir), profile, task.id)
+
+    assert not errors
+    print '\n{0} profile: {1}'.format(profile, ', '.join(
+        '{0} {1:.0f} ops/s'.format(actor, float(operations) / DURATION)
+        for actor, operations in sorted(results.iteritems())))
+    assert all(results.itervalues())
@@ -0,0 +1,61 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import datetime
+
+import pytest
+
+from aria.cli.logger import ModelLogIterator
+from aria.modeling import models
+from aria.orchestrator import log_archive
+
+from .. import mock, storage
+
+
+def test_model_log_iterator(context):
+    _put_logs(context, 0, 5)
+    log_iterator = ModelLogIterator(context.model, context.execution.id, batch_size=2)
+    assert [log.msg for log in log_iterator] == ['0', '1', '2', '3', '4']
+    assert [log.msg for log in log_iterator] == []
+
+    # Only the logs which were not iterated over yet
+    _put_logs(context, 5, 8)
+    assert [log.msg for log in log_iterator] == ['5', '6', '7']
+
+
+def test_model_log_iterator_with_archive(context):
+    _put_logs(context, 0, 5)
+    for status in (models.Execution.STARTED, models.Execution.SUCCEEDED):
+        context.execution.status = status
+        context.model.execution.update(context.execution)
+    log_archive.compact(context.model, context.resource, [log_archive.RetentionPolicy(max_count=2)])
+    log_iterator = ModelLogIterator(context.model, context.execution.id, batch_size=2,
+                                    resource_storage=context.resource)
+    assert [log.msg for log in log_iterator] == ['0', '1', '2', '3', '4']
+    assert [log.msg for log in log_iterator] == []
+
+
+def _put_logs(context, start, end):
+    context.model.log.put_many(
+        models.Log(execution_fk=context.execution.id, level='INFO', msg=str(i),
+                   created_at=datetime.utcnow())
+        for i in xrange(start, end))
+
+
+@pytest.fixture
+def context(tmpdir):
+    result = mock.context.simple(str(tmpdir))
+    yield result
+    storage.release_sqlite_storage(result.model)
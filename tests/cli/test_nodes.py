@@ -16,7 +16,9 @@
 import pytest
 import mock
 
+from aria.cli.commands import nodes
 from aria.cli.env import _Environment
+from aria.storage import sql_mapi
 
 from .base_test import (  # pylint: disable=unused-import
     TestCliBase,
@@ -73,7 +75,9 @@ class TestNodesList(TestCliBase):
 
         nodes_list = mock_storage.node.list
         nodes_list.assert_called_once_with(sort={sort_by_in_output: order_in_output},
-                                           filters={'service': mock.ANY})
+                                           filters={'service': mock.ANY},
+                                           pagination=None,
+                                           load=nodes.NODE_LOAD)
         assert 'Nodes:' in self.logger_output_string
         assert 'test_s' in self.logger_output_string
         assert 'test_n' in self.logger_output_string
@@ -95,7 +99,26 @@ class TestNodesList(TestCliBase):
 
         nodes_list = mock_storage.node.list
         nodes_list.assert_called_once_with(sort={sort_by_in_output: order_in_output},
-                                           filters={})
+                                           filters={},
+                                           pagination=None,
+                                           load=nodes.NODE_LOAD)
         assert 'Nodes:' in self.logger_output_string
         assert 'test_s' in self.logger_output_string
         assert 'test_n' in self.logger_output_string
+
+    @pytest.mark.parametrize('next_cursor', (None, 'next_cursor'))
+    def test_list_page(self, monkeypatch, mock_storage, next_cursor):
+
+        monkeypatch.setattr(_Environment, 'model_storage', mock_storage)
+        nodes_list = mock.MagicMock(return_value=sql_mapi.ListResult(
+            dict(size=1, cursor=next_cursor), [mock_models.create_node_with_dependencies()]))
+        monkeypatch.setattr(mock_storage.node, 'list', nodes_list)
+        self.invoke('nodes list --page-size 1 --cursor cursor')
+
+        nodes_list.assert_called_once_with(sort={'service_name': 'asc'},
+                                           filters={},
+                                           pagination={'size': 1, 'cursor': 'cursor'},
+                                           load=nodes.NODE_LOAD)
+        assert 'test_n' in self.logger_output_string
+        assert ('Next page: --cursor next_cursor' in self.logger_output_string) == \
+            bool(next_cursor)
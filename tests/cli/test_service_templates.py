@@ -114,7 +114,7 @@ class TestServiceTemplatesList(TestCliBase):
         self.invoke('service_templates list{sort_by}{order}'.format(sort_by=sort_by, order=order))
 
         mock_storage.service_template.list.assert_called_with(
-            sort={sort_by_in_output: order_in_output})
+            sort={sort_by_in_output: order_in_output}, pagination=None)
         assert mock_models.SERVICE_TEMPLATE_NAME in self.logger_output_string
 
 
@@ -16,6 +16,7 @@
 import pytest
 import mock
 
+from aria.cli.commands import services
 from aria.cli.env import _Environment
 from aria.core import Core
 from aria.exceptions import DependentActiveExecutionsError, DependentAvailableNodesError
@@ -48,7 +49,9 @@ class TestServicesList(TestCliBase):
         assert 'Listing services for service template' not in self.logger_output_string
 
         mock_storage.service.list.assert_called_once_with(sort={sort_by_in_output: order_in_output},
-                                                          filters={})
+                                                          filters={},
+                                                          pagination=None,
+                                                          load=services.SERVICE_LOAD)
         assert 'Services:' in self.logger_output_string
         assert mock_models.SERVICE_TEMPLATE_NAME in self.logger_output_string
         assert mock_models.SERVICE_NAME in self.logger_output_string
@@ -68,7 +71,9 @@ class TestServicesList(TestCliBase):
         assert 'Listing all services...' not in self.logger_output_string
 
         mock_storage.service.list.assert_called_once_with(sort={sort_by_in_output: order_in_output},
-                                                          filters={'service_template': mock.ANY})
+                                                          filters={'service_template': mock.ANY},
+                                                          pagination=None,
+                                                          load=services.SERVICE_LOAD)
         assert 'Services:' in self.logger_output_string
         assert mock_models.SERVICE_TEMPLATE_NAME in self.logger_output_string
         assert mock_models.SERVICE_NAME in self.logger_output_string
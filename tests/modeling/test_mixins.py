@@ -47,6 +47,7 @@ def storage():
 @pytest.fixture(scope='module', autouse=True)
 def module_cleanup():
     modeling.models.aria_declarative_base.metadata.remove(MockModel.__table__)                      # pylint: disable=no-member
+    modeling.models.aria_declarative_base.metadata.remove(CodecModel.__table__)                     # pylint: disable=no-member
 
 
 @pytest.fixture
@@ -213,3 +214,31 @@ def test_strict_list():
     assert_strict(strict_class)
     with pytest.raises(ValueFormatException):
         strict_class.strict_list[0] = 1
+
+
+class CodecModel(modeling.models.aria_declarative_base, modeling.mixins.ModelMixin):
+    __tablename__ = 'codec_model'
+
+    readable_list = sqlalchemy.Column(modeling.types.List)
+    compact_list = sqlalchemy.Column(
+        modeling.types.List(codec=modeling.types.COMPACT_JSON_CODEC))
+
+
+def test_codecs(storage):
+    storage.register(CodecModel)
+    codec_model = CodecModel(readable_list=[1, 2], compact_list=[1, 2])
+    storage.codec_model.put(codec_model)
+
+    stored = storage.codec_model._engine.execute(
+        'SELECT readable_list, compact_list FROM codec_model').first()
+    assert tuple(stored) == ('[1, 2]', '[1,2]')
+
+    codec_model_id = codec_model.id
+    storage.codec_model._session.expunge_all()
+    codec_model = storage.codec_model.get(codec_model_id)
+    assert codec_model.readable_list == codec_model.compact_list == [1, 2]
+
+    codec_model.compact_list.append(3)
+    storage.codec_model.update(codec_model)
+    storage.codec_model._session.expunge_all()
+    assert storage.codec_model.get(codec_model_id).compact_list == [1, 2, 3]
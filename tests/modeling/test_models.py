@@ -42,6 +42,7 @@ from aria.modeling.models import (
     Attribute,
     Configuration,
     Argument,
+    OperationStatistics,
     Type
 )
 
@@ -818,6 +819,29 @@ class TestTask(object):
             create_task(max_attempts=-2)
 
 
+class TestOperationStatistics(object):
+    def test_percentiles(self):
+        operation_statistics = OperationStatistics()
+        assert operation_statistics.percentile(50) is None
+
+        operation_statistics.add_durations([4, 1, 3, 2])
+        assert operation_statistics.count == 4
+        assert operation_statistics.durations == [4.0, 1.0, 3.0, 2.0]
+        assert operation_statistics.p50 == 2.5
+        assert operation_statistics.percentile(0) == 1
+        assert operation_statistics.percentile(100) == 4
+
+    def test_rolling_window(self):
+        operation_statistics = OperationStatistics()
+        operation_statistics.add_durations([100] * OperationStatistics.WINDOW_SIZE)
+        operation_statistics.add_durations([1] * (OperationStatistics.WINDOW_SIZE - 1))
+        assert operation_statistics.count == OperationStatistics.WINDOW_SIZE * 2 - 1
+        assert len(operation_statistics.durations) == OperationStatistics.WINDOW_SIZE
+        assert operation_statistics.p50 == 1
+        assert operation_statistics.p90 == 1
+        assert operation_statistics.percentile(100) == 100
+
+
 class TestType(object):
     def test_type_hierarchy(self):
         super_type = Type(variant='variant', name='super')
@@ -24,7 +24,8 @@ from aria import (
     workflow,
     operation,
 )
-from aria.orchestrator import context
+from aria.modeling import models
+from aria.orchestrator import context, log_bus
 from aria.orchestrator.workflows import api
 
 import tests
@@ -299,6 +300,93 @@ def test_node_operation_logging(ctx, executor):
     _assert_loggins(ctx, arguments)
 
 
+def test_buffered_operation_logging(tmpdir, executor):
+    # Flushed only when the operation contexts and the executor are closed
+    ctx = mock.context.simple(
+        str(tmpdir),
+        context_kwargs=dict(workdir=str(tmpdir.join('workdir')),
+                            log_buffer=dict(flush_interval=60)))
+    try:
+        interface_name, operation_name = mock.operations.NODE_OPERATIONS_INSTALL[0]
+        node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
+        arguments = {
+            'op_start': 'op_start',
+            'op_end': 'op_end',
+        }
+        interface = mock.models.create_interface(
+            node.service,
+            interface_name,
+            operation_name,
+            operation_kwargs=dict(
+                function=op_path(logged_operation, module_path=__name__),
+                arguments=arguments)
+        )
+        node.interfaces[interface.name] = interface
+        ctx.model.node.update(node)
+
+        @workflow
+        def basic_workflow(graph, **_):
+            graph.add_tasks(
+                api.task.OperationTask(
+                    node,
+                    interface_name=interface_name,
+                    operation_name=operation_name,
+                    arguments=arguments
+                )
+            )
+        execute(workflow_func=basic_workflow, workflow_context=ctx, executor=executor)
+        executor.close()
+        _assert_loggins(ctx, arguments)
+    finally:
+        storage.release_sqlite_storage(ctx.model)
+
+
+def test_published_operation_logging(ctx, executor):
+    # Logs of operations executed in subprocesses are forwarded through the served bus
+    bus = log_bus.LogBus(ctx.execution.id)
+    bus.open()
+    try:
+        bus.serve()
+        subscription = bus.subscribe()
+
+        interface_name, operation_name = mock.operations.NODE_OPERATIONS_INSTALL[0]
+        node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
+        arguments = {
+            'op_start': 'op_start',
+            'op_end': 'op_end',
+        }
+        interface = mock.models.create_interface(
+            node.service,
+            interface_name,
+            operation_name,
+            operation_kwargs=dict(
+                function=op_path(logged_operation, module_path=__name__),
+                arguments=arguments)
+        )
+        node.interfaces[interface.name] = interface
+        ctx.model.node.update(node)
+
+        @workflow
+        def basic_workflow(graph, **_):
+            graph.add_tasks(
+                api.task.OperationTask(
+                    node,
+                    interface_name=interface_name,
+                    operation_name=operation_name,
+                    arguments=arguments
+                )
+            )
+        execute(workflow_func=basic_workflow, workflow_context=ctx, executor=executor)
+    finally:
+        bus.close()
+
+    events = list(subscription)
+    assert sorted((event.task_fk, event.level, event.msg) for event in events) == \
+        sorted((log.task_fk, log.level, log.msg) for log in ctx.model.log.list())
+    assert len(events) == 6
+    assert all(event.execution_fk == ctx.execution.id for event in events)
+
+
 def test_relationship_operation_logging(ctx, executor):
     interface_name, operation_name = mock.operations.RELATIONSHIP_OPERATIONS_INSTALL[0]
 
@@ -332,6 +420,61 @@ def test_relationship_operation_logging(ctx, executor):
     _assert_loggins(ctx, arguments)
 
 
+@pytest.mark.parametrize('reuse_storage', (True, False))
+def test_close_instantiated_context(ctx, reuse_storage):
+    task = models.Task(execution=ctx.execution,
+                       node=ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME))
+    ctx.model.task.put(task)
+    op_ctx = context.operation.NodeOperationContext(
+        name='op_ctx',
+        model_storage=ctx.model,
+        resource_storage=ctx.resource,
+        service_id=ctx.service.id,
+        execution_id=ctx.execution.id,
+        task_id=task.id,
+        actor_id=task.node.id,
+        workdir=ctx._workdir)
+    op_ctx = op_ctx.instantiate_from_dict(reuse_storage=reuse_storage,
+                                          **op_ctx.serialization_dict['context'])
+    engine = op_ctx.model.log._engine
+    connection_pool = engine.pool
+    op_ctx.close()
+    # Disposing of the engine replaces its connection pool
+    assert (engine.pool is connection_pool) == reuse_storage
+
+
+def test_template_cache(ctx):
+    task = models.Task(execution=ctx.execution,
+                       node=ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME))
+    ctx.model.task.put(task)
+    # The engine shares the cache of the workflow context with the contexts of its operations
+    op_ctxs = [context.operation.NodeOperationContext(name='op_ctx',
+                                                      model_storage=ctx.model,
+                                                      resource_storage=ctx.resource,
+                                                      service_id=ctx.service.id,
+                                                      execution_id=ctx.execution.id,
+                                                      task_id=task.id,
+                                                      actor_id=task.node.id,
+                                                      template_cache=ctx.template_cache)
+               for _ in xrange(2)]
+
+    assert op_ctxs[0].node_template is op_ctxs[1].node_template
+    assert op_ctxs[0].node_template.name == mock.models.DEPENDENCY_NODE_TEMPLATE_NAME
+    assert op_ctxs[0].service_template is ctx.service_template
+    assert ctx.template_cache.cache_info() == (3, 2, None, 2)
+
+    # The cached templates are returned in the storage's session
+    node_template = op_ctxs[0].node_template
+    assert node_template is op_ctxs[0].node.node_template
+    node_template.description = 'changed'
+    ctx.model.node_template.update(node_template)
+    assert op_ctxs[1].node_template.description == 'changed'
+    # Relationships are loaded through the storage's session
+    service = mock.models.create_service(ctx.service_template, name='other_service')
+    ctx.model.service.put(service)
+    assert op_ctxs[0].service_template.services[service.name] is service
+
+
 def test_attribute_consumption(ctx, executor, dataholder):
     # region Updating node operation
     node_int_name, node_op_name = mock.operations.NODE_OPERATIONS_INSTALL[0]
@@ -14,8 +14,12 @@
 # limitations under the License.
 
 import os
+import json
 import time
 import sys
+import socket
+import httplib
+import threading
 import subprocess
 import StringIO
 
@@ -34,6 +38,26 @@ class TestCtxProxy(object):
         response = self.request(server, 'stub-attr', 'some-property')
         assert response == 'some_value'
 
+    def test_failing_attribute_access(self):
+        class FailingAttribute(dict):
+            @property
+            def failing(self):
+                raise ValueError('Not an attribute')
+        # As with ``hasattr``, failing to get an attribute falls back to getting an item
+        value, _ = ctx_proxy.server._process_next_operation(
+            FailingAttribute(failing='item_value'), ['failing'], modifying=False)
+        assert value == 'item_value'
+
+    def test_instrumented_by_each_worker(self, ctx):
+        instrument = ctx.model.instrument
+        with ctx_proxy.server.CtxProxy(ctx, workers=2) as proxy:
+            proxy._close_session = lambda *args, **kwargs: {}
+            for _ in xrange(5):
+                assert self.request(proxy, 'stub_attr', 'some_property') == 'some_value'
+        # Once by each worker thread (whose instrumentation is its own), rather than per request
+        assert instrument.call_count == 2
+        assert instrument.return_value.__exit__.call_count == 2
+
     def test_dict_prop_access_get_key(self, server):
         response = self.request(server, 'node', 'properties', 'prop1')
         assert response == 'value1'
@@ -105,6 +129,55 @@ class TestCtxProxy(object):
         response = self.request(server, 'stub_method', *args)
         assert response == args[1:-1]
 
+    def test_keep_alive(self, server):
+        connection = httplib.HTTPConnection('localhost', server.port, timeout=5)
+        try:
+            for value in ('value1', 'value2'):
+                body = json.dumps(dict(args=['stub_method', '[', value, ']']))
+                connection.request('POST', '/', body)
+                response = json.loads(connection.getresponse().read())
+                assert response == dict(type='result', payload=[value])
+        finally:
+            connection.close()
+
+    def test_pipelining(self, server):
+        requests = []
+        for value in ('value1', 'value2', 'value3'):
+            body = json.dumps(dict(args=['stub_method', '[', value, ']']))
+            requests.append('POST / HTTP/1.1\r\nHost: localhost\r\n'
+                            'Content-Length: {0}\r\n\r\n{1}'.format(len(body), body))
+        sock = socket.create_connection(('localhost', server.port), timeout=5)
+        try:
+            # All the requests are sent before any response is read
+            sock.sendall(''.join(requests))
+            payloads = []
+            for _ in requests:
+                response = httplib.HTTPResponse(sock)
+                response.begin()
+                payloads.append(json.loads(response.read())['payload'])
+            assert payloads == [['value1'], ['value2'], ['value3']]
+        finally:
+            sock.close()
+
+    def test_concurrent_requests(self, server):
+        args = (server, 'stub_sleep', '[', '0.5', ']')
+        threads = [threading.Thread(target=self.request, args=args) for _ in xrange(4)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.time() - start < 1.5
+
+    def test_metrics(self, server):
+        assert server.metrics.count == 0
+        assert server.metrics.percentile(50) is None
+        for _ in xrange(3):
+            self.request(server, 'stub_attr', 'some_property')
+        assert server.metrics.count == 3
+        assert 0 < server.metrics.percentile(50) <= server.metrics.max
+        assert server.metrics.mean == server.metrics.total / 3
+
     class StubAttribute(object):
         some_property = 'some_value'
 
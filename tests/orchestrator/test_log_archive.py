@@ -0,0 +1,181 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from aria.modeling import models
+from aria.orchestrator import log_archive
+
+from tests import mock, storage
+
+
+class TestLogArchive(object):
+
+    def test_max_age(self, context):
+        _put_log(context, 'old', age=timedelta(days=2))
+        _put_log(context, 'new')
+        assert _compact(context, log_archive.RetentionPolicy(max_age=timedelta(days=1))) == 1
+        assert _stored(context) == ['new']
+        assert _archived(context) == ['old']
+
+    def test_max_count(self, context):
+        for i in xrange(5):
+            _put_log(context, str(i))
+        assert _compact(context, log_archive.RetentionPolicy(max_count=2)) == 3
+        assert _stored(context) == ['3', '4']
+        assert _archived(context) == ['0', '1', '2']
+        # Nothing more expires
+        assert _compact(context, log_archive.RetentionPolicy(max_count=2)) == 0
+
+    def test_levels(self, context):
+        _put_log(context, 'debug', level='DEBUG')
+        _put_log(context, 'info')
+        assert _compact(context, log_archive.RetentionPolicy(levels=['debug'])) == 1
+        assert _stored(context) == ['info']
+        assert _archived(context) == ['debug']
+
+    def test_policies(self, context):
+        _put_log(context, 'old', age=timedelta(days=2))
+        _put_log(context, 'debug', level='DEBUG')
+        _put_log(context, 'new')
+        assert _compact(context,
+                        log_archive.RetentionPolicy(max_age=timedelta(days=1)),
+                        log_archive.RetentionPolicy(levels=['DEBUG'])) == 2
+        assert _stored(context) == ['new']
+        assert _archived(context) == ['old', 'debug']
+
+    def test_active_execution(self, context):
+        execution = mock.models.create_execution(context.service,
+                                                 status=models.Execution.STARTED)
+        context.model.execution.put(execution)
+        _put_log(context, 'message', execution=execution)
+        assert _compact(context, log_archive.RetentionPolicy(max_count=0)) == 0
+        assert _stored(context) == ['message']
+
+    def test_batches(self, context):
+        for i in xrange(5):
+            _put_log(context, str(i))
+        policy = log_archive.RetentionPolicy(max_count=0)
+        assert _compact(context, policy, batch_size=2, max_batches=1) == 2
+        assert _stored(context) == ['2', '3', '4']
+        assert _archived(context) == ['0', '1']
+        # Appended to the same archive
+        assert _compact(context, policy, batch_size=2) == 3
+        assert _stored(context) == []
+        assert _archived(context) == ['0', '1', '2', '3', '4']
+
+    def test_members_merged(self, context, monkeypatch):
+        # Chunks of the archive smaller than its logs
+        monkeypatch.setattr(log_archive, 'READ_SIZE', 16)
+        for i in xrange(6):
+            _put_log(context, str(i) * 100, level='DEBUG' if i % 2 else 'INFO')
+        # Logs which are older than the previous member's are archived in a later member
+        _compact(context, log_archive.RetentionPolicy(levels=['INFO'], max_count=0))
+        _compact(context, log_archive.RetentionPolicy(levels=['DEBUG'], max_count=0))
+        assert _archived(context) == [str(i) * 100 for i in xrange(6)]
+
+    def test_member_index(self, context, monkeypatch):
+        for i in xrange(4):
+            _put_log(context, str(i), level='DEBUG' if i % 2 else 'INFO')
+        _compact(context, log_archive.RetentionPolicy(levels=['INFO'], max_count=0))
+        _compact(context, log_archive.RetentionPolicy(levels=['DEBUG'], max_count=0))
+        assert len(_offsets(context)) == 2
+
+        def member_offsets(*args, **kwargs):
+            raise AssertionError('The members were found without the index')
+        monkeypatch.setattr(log_archive, '_member_offsets', member_offsets)
+        assert _archived(context) == ['0', '1', '2', '3']
+
+    def test_missing_member_index(self, context):
+        for i in xrange(4):
+            _put_log(context, str(i), level='DEBUG' if i % 2 else 'INFO')
+        _compact(context, log_archive.RetentionPolicy(levels=['INFO'], max_count=0))
+        _compact(context, log_archive.RetentionPolicy(levels=['DEBUG'], max_count=0))
+        context.resource.execution.delete(entry_id=str(context.execution.id),
+                                          path=log_archive.INDEX_PATH)
+        assert _archived(context) == ['0', '1', '2', '3']
+
+    def test_max_members(self, context, monkeypatch):
+        monkeypatch.setattr(log_archive, 'MAX_MEMBERS', 2)
+        for i in xrange(6):
+            _put_log(context, str(i), level=('INFO', 'DEBUG', 'ERROR')[i % 3])
+        for level in ('INFO', 'DEBUG'):
+            _compact(context, log_archive.RetentionPolicy(levels=[level], max_count=0))
+        assert len(_offsets(context)) == 2
+        # The third member is merged with the others
+        _compact(context, log_archive.RetentionPolicy(levels=['ERROR'], max_count=0))
+        assert _offsets(context) == [0]
+        assert _archived(context) == [str(i) for i in xrange(6)]
+
+    def test_archived_log(self, context):
+        log = _put_log(context, 'message', level='ERROR')
+        log_id, created_at = log.id, log.created_at
+        _compact(context, log_archive.RetentionPolicy(max_count=0))
+        archived_log, = log_archive.read(context.resource, context.execution.id)
+        assert archived_log == log_archive.ArchivedLog(id=log_id,
+                                                       execution_fk=context.execution.id,
+                                                       task_fk=None,
+                                                       level='ERROR',
+                                                       msg='message',
+                                                       created_at=created_at,
+                                                       traceback=None)
+
+    def test_delete(self, context):
+        _put_log(context, 'message')
+        _compact(context, log_archive.RetentionPolicy(max_count=0))
+        log_archive.delete(context.resource, context.execution.id)
+        assert _archived(context) == []
+
+
+def _put_log(context, msg, level='INFO', age=timedelta(), execution=None):
+    log = models.Log(execution_fk=(execution or context.execution).id, level=level, msg=msg,
+                     created_at=datetime.now() - age)
+    context.model.log.put(log)
+    return log
+
+
+def _compact(context, *policies, **kwargs):
+    return log_archive.compact(context.model, context.resource, policies, **kwargs)
+
+
+def _stored(context):
+    return [log.msg for log in context.model.log.list(sort=dict(id='asc'))]
+
+
+def _archived(context):
+    return [log.msg for log in log_archive.read(context.resource, context.execution.id)]
+
+
+def _offsets(context):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        _, offsets = log_archive._download(context.resource, context.execution.id, temp_dir)
+        return offsets
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def context(tmpdir):
+    result = mock.context.simple(str(tmpdir))
+    for status in (models.Execution.STARTED, models.Execution.SUCCEEDED):
+        result.execution.status = status
+        result.model.execution.update(result.execution)
+    yield result
+    storage.release_sqlite_storage(result.model)
@@ -0,0 +1,104 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import datetime
+
+import pytest
+
+from aria.modeling import models
+from aria.orchestrator import log_bus
+
+
+class TestLogBus(object):
+
+    def test_publish(self, bus):
+        subscription = bus.subscribe()
+        log_bus.publish(_log(bus, 'message'))
+        # Logs of executions without an open bus are not published
+        log_bus.publish(_log(bus, 'other', execution_id=bus.execution_id + 1))
+        events = list(subscription.available())
+        assert [event.msg for event in events] == ['message']
+        assert events[0].execution_fk == bus.execution_id
+        assert events[0].level == 'INFO'
+
+    def test_subscription_ends_on_close(self, bus):
+        subscription = bus.subscribe()
+        bus.publish(_event(bus, 'message'))
+        bus.close()
+        assert log_bus.get(bus.execution_id) is None
+        assert [event.msg for event in subscription] == ['message']
+        assert subscription.ended
+        assert list(subscription) == []
+
+    def test_full_subscription(self, bus):
+        bus = log_bus.LogBus(bus.execution_id, max_size=2)
+        subscription = bus.subscribe()
+        for i in xrange(3):
+            bus.publish(_event(bus, str(i)))
+        assert subscription.dropped_count == 1
+        # The end makes room for itself
+        bus.close()
+        assert [event.msg for event in subscription] == ['1']
+        assert subscription.dropped_count == 2
+
+    def test_already_open(self, bus):
+        with pytest.raises(RuntimeError):
+            log_bus.LogBus(bus.execution_id).open()
+
+    def test_served(self, bus, tmpdir):
+        address = bus.serve(str(tmpdir))
+        assert log_bus.find_address(str(tmpdir), bus.execution_id) == address
+        subscription = log_bus.subscribe(address)
+        local_subscription = bus.subscribe()
+
+        # e.g. an operation context in a subprocess
+        forwarding_bus = log_bus.LogBus(bus.execution_id, address=address)
+        forwarding_bus.publish(_event(bus, 'forwarded'))
+        forwarding_bus.close()
+        bus.publish(_event(bus, 'published'))
+        bus.close()
+
+        assert log_bus.find_address(str(tmpdir), bus.execution_id) is None
+        # Logs from different processes are not ordered
+        assert sorted(event.msg for event in local_subscription) == ['forwarded', 'published']
+        assert sorted(event.msg for event in subscription) == ['forwarded', 'published']
+
+    def test_not_served(self, bus, tmpdir):
+        assert bus.address is None
+        assert log_bus.find_address(str(tmpdir), bus.execution_id) is None
+        # The served bus is gone, so logs are no longer forwarded
+        address = bus.serve()
+        bus.close()
+        forwarding_bus = log_bus.LogBus(bus.execution_id, address=address)
+        forwarding_bus.publish(_event(bus, 'message'))
+        forwarding_bus.close()
+
+
+def _log(bus, msg, execution_id=None):
+    return models.Log(execution_fk=execution_id or bus.execution_id, level='INFO', msg=msg,
+                      created_at=datetime.utcnow())
+
+
+def _event(bus, msg):
+    return log_bus.LogEvent(execution_fk=bus.execution_id, task_fk=None, level='INFO', msg=msg,
+                            created_at=datetime.utcnow(), traceback=None)
+
+
+@pytest.fixture
+def bus():
+    result = log_bus.LogBus(execution_id=1)
+    result.open()
+    yield result
+    result.close()
@@ -0,0 +1,109 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from datetime import datetime
+from StringIO import StringIO
+
+import pytest
+
+from aria.modeling import models
+from aria.orchestrator import log_archive, log_export
+
+from tests import mock, storage
+
+
+class TestLogExport(object):
+
+    def test_ndjson(self, context):
+        task = _put_task(context)
+        log = _put_log(context, 'message', task=task)
+        created_at = log.created_at
+
+        exported_logs = _export(context)
+        assert exported_logs == [dict(id=log.id,
+                                      task=task.id,
+                                      node=mock.models.DEPENDENCY_NODE_NAME,
+                                      interface='Standard',
+                                      operation='create',
+                                      level='INFO',
+                                      timestamp=created_at.isoformat(),
+                                      msg='message',
+                                      traceback=None)]
+
+    def test_columnar(self, context):
+        task = _put_task(context)
+        for i in xrange(3):
+            _put_log(context, str(i), task=task if i else None)
+
+        batches = _export(context, output_format=log_export.COLUMNAR, batch_size=2)
+        assert len(batches) == 2
+        assert batches[0]['msg'] == ['0', '1']
+        assert batches[0]['node'] == [None, mock.models.DEPENDENCY_NODE_NAME]
+        assert batches[1]['msg'] == ['2']
+        assert all(set(batch) == set(log_export.FIELDS) for batch in batches)
+
+    def test_batches(self, context):
+        for i in xrange(5):
+            _put_log(context, str(i))
+        assert [log['msg'] for log in _export(context, batch_size=2)] == ['0', '1', '2', '3', '4']
+
+    def test_archived_logs(self, context):
+        for status in (models.Execution.STARTED, models.Execution.SUCCEEDED):
+            context.execution.status = status
+            context.model.execution.update(context.execution)
+        _put_log(context, 'debug', level='DEBUG')
+        _put_log(context, 'info')
+        _put_log(context, 'old debug', level='DEBUG')
+        log_archive.compact(context.model, context.resource,
+                            [log_archive.RetentionPolicy(levels=['DEBUG'])])
+
+        assert [log['msg'] for log in _export(context)] == ['info']
+        assert [log['msg'] for log in _export(context, batch_size=1,
+                                              resource_storage=context.resource)] == \
+            ['debug', 'info', 'old debug']
+
+    def test_unknown_format(self, context):
+        with pytest.raises(ValueError):
+            _export(context, output_format='xml')
+
+
+def _put_task(context):
+    task = models.Task(execution=context.execution,
+                       node=context.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME),
+                       interface_name='Standard',
+                       operation_name='create')
+    context.model.task.put(task)
+    return task
+
+
+def _put_log(context, msg, level='INFO', task=None):
+    log = models.Log(execution_fk=context.execution.id, task_fk=task.id if task else None,
+                     level=level, msg=msg, created_at=datetime.now())
+    context.model.log.put(log)
+    return log
+
+
+def _export(context, **kwargs):
+    stream = StringIO()
+    log_export.export(context.model, context.execution.id, stream, **kwargs)
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.fixture
+def context(tmpdir):
+    result = mock.context.simple(str(tmpdir))
+    yield result
+    storage.release_sqlite_storage(result.model)
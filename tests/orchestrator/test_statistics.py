@@ -0,0 +1,171 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from aria.modeling import models
+from aria.orchestrator import context, statistics
+from aria.orchestrator.workflows import api
+from aria.orchestrator.workflows.core import graph_compiler
+
+from tests import mock, storage
+
+
+class TestRecordExecution(object):
+
+    def test_record_execution(self, ctx):
+        node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
+        execution = _ended_execution(ctx, started_at=datetime.utcnow())
+        _ended_task(execution, node, 1)
+        _ended_task(execution, node, 3)
+        _ended_task(execution, node, 100, status=models.Task.FAILED)
+        _ended_task(execution, node, 100, operation_name=None, _stub_type=models.Task.STUB)
+        # Ended before the execution was (last) started, e.g. before it was resumed
+        _ended_task(execution, node, 100, ended_at=execution.started_at - timedelta(seconds=1))
+        ctx.model.execution.update(execution)
+
+        statistics.record_execution(ctx.model, execution)
+        operation_statistics = ctx.model.operation_statistics.list()
+        assert len(operation_statistics) == 1
+        operation_statistics = operation_statistics[0]
+        assert operation_statistics.function == 'operations.create'
+        assert operation_statistics.node_type_name == node.type.name
+        assert operation_statistics.interface_name == 'lifecycle'
+        assert operation_statistics.operation_name == 'create'
+        assert operation_statistics.count == 2
+        assert operation_statistics.p50 == 2
+
+        execution = _ended_execution(ctx, started_at=datetime.utcnow())
+        _ended_task(execution, node, 5)
+        ctx.model.execution.update(execution)
+        statistics.record_execution(ctx.model, execution)
+        operation_statistics = ctx.model.operation_statistics.get(operation_statistics.id)
+        assert operation_statistics.count == 3
+        assert operation_statistics.durations == [1, 3, 5]
+
+    def test_other_node_types_are_combined(self, ctx):
+        node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
+        ctx.model.operation_statistics.put(_operation_statistics('other_type', [1, 2]))
+        ctx.model.operation_statistics.put(_operation_statistics('another_type', [3, 4]))
+
+        task = _ended_task(ctx.execution, node, 1)
+        operation_statistics = statistics.get_statistics(ctx.model, [task])[task.id]
+        assert operation_statistics.count == 4
+        assert operation_statistics.percentile(50) == 2.5
+
+        ctx.model.operation_statistics.put(_operation_statistics(node.type.name, [10]))
+        operation_statistics = statistics.get_statistics(ctx.model, [task])[task.id]
+        assert operation_statistics.count == 1
+
+
+class TestEstimateMakespan(object):
+
+    def test_estimate_makespan(self, ctx):
+        node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
+        for operation_name, duration in (('short', 3), ('long', 2)):
+            ctx.model.operation_statistics.put(
+                _operation_statistics(node.type.name, [duration], operation_name=operation_name))
+
+        # start -> short -> end, start -> long -> long -> end, start -> never_executed -> end
+        start = _task(ctx.execution, _stub_type=models.Task.START_WORKFLOW)
+        short = _task(ctx.execution, node, 'short', dependencies=[start])
+        long1 = _task(ctx.execution, node, 'long', dependencies=[start])
+        long2 = _task(ctx.execution, node, 'long', dependencies=[long1])
+        never_executed = _task(ctx.execution, node, 'never_executed', dependencies=[start])
+        end = _task(ctx.execution, _stub_type=models.Task.END_WORKFLOW,
+                    dependencies=[short, long2, never_executed])
+        ctx.model.execution.update(ctx.execution)
+        tasks = [start, short, long1, long2, never_executed, end]
+
+        assert statistics.estimate_durations(ctx.model, tasks) == {
+            start.id: 0,
+            short.id: 3,
+            long1.id: 2,
+            long2.id: 2,
+            never_executed.id: statistics.DEFAULT_OPERATION_DURATION,
+            end.id: 0
+        }
+        assert statistics.estimate_makespan(ctx.model, tasks) == 4
+
+    def test_estimate_task_graph(self, ctx):
+        node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
+        interface = mock.models.create_interface(
+            node.service, 'lifecycle', 'short', operation_kwargs=dict(function='operations.create'))
+        interface.operations['long'] = mock.models.create_operation(                                # pylint: disable=unsubscriptable-object
+            'long', operation_kwargs=dict(function='operations.create'))
+        node.interfaces[interface.name] = interface
+        ctx.model.node.update(node)
+        for operation_name, duration in (('short', 3), ('long', 2)):
+            ctx.model.operation_statistics.put(
+                _operation_statistics(node.type.name, [duration], operation_name=operation_name))
+
+        # short, long -> long (in a sub-workflow)
+        with context.workflow.current.push(ctx):
+            task_graph = api.task_graph.TaskGraph('test_estimate_task_graph')
+            sub_workflow = api.task.WorkflowTask(
+                lambda name, **_: api.task_graph.TaskGraph(name), name='sub_workflow')
+            long1 = api.task.OperationTask(node, 'lifecycle', 'long')
+            long2 = api.task.OperationTask(node, 'lifecycle', 'long')
+            sub_workflow.add_tasks(long1, long2)
+            sub_workflow.add_dependency(long2, long1)
+            task_graph.add_tasks(api.task.OperationTask(node, 'lifecycle', 'short'), sub_workflow)
+        tasks_count = len(ctx.model.task.list())
+
+        tasks = graph_compiler.plan_tasks(task_graph)
+        # start and end of the workflow and of the sub-workflow
+        assert len([task for task in tasks if task._stub_type]) == 4
+        assert len([task for task in tasks if not task._stub_type]) == 3
+        assert statistics.estimate_makespan(ctx.model, tasks) == 4
+        assert len(ctx.model.task.list()) == tasks_count
+
+
+def _ended_execution(ctx, started_at):
+    execution = mock.models.create_execution(ctx.service, status=models.Execution.SUCCEEDED)
+    execution.started_at = started_at
+    ctx.model.execution.put(execution)
+    return execution
+
+
+def _ended_task(execution, node, seconds, status=models.Task.SUCCESS, ended_at=None, **kwargs):
+    ended_at = ended_at or datetime.utcnow()
+    return _task(execution, node, status=status, started_at=ended_at - timedelta(seconds=seconds),
+                 ended_at=ended_at, **kwargs)
+
+
+def _task(execution, node=None, operation_name='create', **kwargs):
+    return models.Task(execution=execution,
+                       node=node,
+                       function='operations.create' if node else None,
+                       interface_name='lifecycle' if node else None,
+                       operation_name=operation_name if node else None,
+                       **kwargs)
+
+
+def _operation_statistics(node_type_name, durations, operation_name='create'):
+    operation_statistics = models.OperationStatistics(function='operations.create',
+                                                      node_type_name=node_type_name,
+                                                      interface_name='lifecycle',
+                                                      operation_name=operation_name)
+    operation_statistics.add_durations(durations)
+    return operation_statistics
+
+
+@pytest.fixture
+def ctx(tmpdir):
+    context = mock.context.simple(str(tmpdir))
+    yield context
+    storage.release_sqlite_storage(context.model)
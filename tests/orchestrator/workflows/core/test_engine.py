@@ -14,9 +14,11 @@
 # limitations under the License.
 import time
 import threading
+from contextlib import contextmanager
 from datetime import datetime
 
 import pytest
+import sqlalchemy
 
 from aria.orchestrator import (
     events,
@@ -28,7 +30,7 @@ from aria.orchestrator.workflows import (
     api,
     exceptions,
 )
-from aria.orchestrator.workflows.core import engine, graph_compiler
+from aria.orchestrator.workflows.core import engine, graph_compiler, scheduling
 from aria.orchestrator.workflows.executor import thread
 
 from tests import mock, storage
@@ -40,19 +42,20 @@ global_test_holder = {}
 class BaseTest(object):
 
     @classmethod
-    def _execute(cls, workflow_func, workflow_context, executor):
+    def _execute(cls, workflow_func, workflow_context, executor, **engine_kwargs):
         eng = cls._engine(workflow_func=workflow_func,
                           workflow_context=workflow_context,
-                          executor=executor)
+                          executor=executor,
+                          **engine_kwargs)
         eng.execute(ctx=workflow_context)
         return eng
 
     @staticmethod
-    def _engine(workflow_func, workflow_context, executor):
+    def _engine(workflow_func, workflow_context, executor, **engine_kwargs):
         graph = workflow_func(ctx=workflow_context)
         graph_compiler.GraphCompiler(workflow_context, executor.__class__).compile(graph)
 
-        return engine.Engine(executors={executor.__class__: executor})
+        return engine.Engine(executors={executor.__class__: executor}, **engine_kwargs)
 
     @staticmethod
     def _create_interface(ctx, func, arguments=None):
@@ -178,6 +181,22 @@ class TestEngine(BaseTest):
         assert workflow_context.exception is None
         assert global_test_holder.get('sent_task_signal_calls') == 1
 
+    def test_failing_statistics_do_not_fail_the_execution(self, workflow_context, executor,
+                                                          mocker):
+        node, _, operation_name = self._create_interface(workflow_context, mock_success_task)
+
+        @workflow
+        def mock_workflow(ctx, graph):
+            graph.add_tasks(self._op(node, operation_name))
+        mocker.patch('aria.orchestrator.statistics.record_execution',
+                     side_effect=sqlalchemy.exc.OperationalError(None, None, None))
+        self._execute(
+            workflow_func=mock_workflow,
+            workflow_context=workflow_context,
+            executor=executor)
+        assert workflow_context.states == ['start', 'success']
+        assert workflow_context.execution.status == models.Execution.SUCCEEDED
+
     def test_single_task_failed_execution(self, workflow_context, executor):
         node, _, operation_name = self._create_interface(workflow_context, mock_failed_task)
 
@@ -238,6 +257,131 @@ class TestEngine(BaseTest):
         assert global_test_holder.get('sent_task_signal_calls') == 2
 
 
+class TestScheduling(BaseTest):
+
+    def test_polling_execution(self, workflow_context, executor):
+        node, _, operation_name = self._create_interface(
+            workflow_context, mock_ordered_task, {'counter': 1})
+
+        @workflow
+        def mock_workflow(ctx, graph):
+            op1 = self._op(node, operation_name, arguments={'counter': 1})
+            op2 = self._op(node, operation_name, arguments={'counter': 2})
+            graph.sequence(op1, op2)
+        self._execute(
+            workflow_func=mock_workflow,
+            workflow_context=workflow_context,
+            executor=executor,
+            event_driven=False)
+        assert workflow_context.states == ['start', 'success']
+        assert workflow_context.exception is None
+        assert global_test_holder.get('invocations') == [1, 2]
+
+    def test_event_driven_execution_does_not_poll(self, workflow_context, executor, mocker):
+        node, _, operation_name = self._create_interface(
+            workflow_context, mock_sleep_task, {'seconds': 1})
+
+        @workflow
+        def mock_workflow(ctx, graph):
+            graph.add_tasks(self._op(node, operation_name, arguments={'seconds': 1}))
+        refresh = mocker.spy(workflow_context.model.task, 'refresh')
+        self._execute(
+            workflow_func=mock_workflow,
+            workflow_context=workflow_context,
+            executor=executor)
+        assert workflow_context.states == ['start', 'success']
+        # Polling every 100ms would have refreshed the tasks dozens of times during the second
+        # the operation sleeps
+        assert refresh.call_count < 5
+
+    @pytest.mark.parametrize('max_tasks', (1, 2))
+    def test_concurrency_limits(self, workflow_context, max_tasks):
+        node, _, operation_name = self._create_interface(workflow_context, mock_concurrent_task)
+        executor = thread.ThreadExecutor(pool_size=4)
+
+        @workflow
+        def mock_workflow(ctx, graph):
+            graph.add_tasks(*(self._op(node, operation_name) for _ in range(4)))
+        try:
+            self._execute(
+                workflow_func=mock_workflow,
+                workflow_context=workflow_context,
+                executor=executor,
+                concurrency_limits=scheduling.ConcurrencyLimits(max_tasks=max_tasks))
+        finally:
+            executor.close()
+        assert workflow_context.states == ['start', 'success']
+        assert global_test_holder['max_concurrent_tasks'] == max_tasks
+
+    def test_critical_path_scheduling(self, workflow_context, executor):
+        node, _, operation_name = self._create_interface(
+            workflow_context, mock_ordered_task, {'counter': 1})
+
+        @workflow
+        def mock_workflow(ctx, graph):
+            graph.add_tasks(self._op(node, operation_name, arguments={'counter': 1}))
+            graph.sequence(*(self._op(node, operation_name, arguments={'counter': counter})
+                             for counter in (2, 3, 4)))
+        self._execute(
+            workflow_func=mock_workflow,
+            workflow_context=workflow_context,
+            executor=executor,
+            concurrency_limits=scheduling.ConcurrencyLimits(max_tasks=1),
+            scheduling_policy=scheduling.CriticalPathPolicy())
+        assert workflow_context.states == ['start', 'success']
+        # The first task of the longest path is executed first
+        assert global_test_holder.get('invocations')[0] == 2
+
+
+class TestQueryCount(BaseTest):
+    """
+    Pins the number of SELECTs of the storage accesses made on each task transition.
+    """
+
+    def test_task_transition(self, workflow_context, executor):
+        node, _, operation_name = self._create_interface(
+            workflow_context, mock_ordered_task, {'counter': 1})
+
+        @workflow
+        def mock_workflow(ctx, graph):
+            graph.add_tasks(self._op(node, operation_name, arguments={'counter': 1}))
+        graph = mock_workflow(ctx=workflow_context)                                                # pylint: disable=no-value-for-parameter,assignment-from-no-return
+        graph_compiler.GraphCompiler(workflow_context, executor.__class__).compile(graph)
+        task = workflow_context.model.task.list(filters=dict(_stub_type=None))[0]
+        workflow_context.model.log.put_many(
+            models.Log(execution_fk=workflow_context.execution.id, task_fk=task.id, level='INFO',
+                       msg='message', created_at=datetime.utcnow())
+            for _ in xrange(10))
+        tracker = engine._TasksTracker(workflow_context)
+
+        # Neither the logs nor the other relationships of the task are reloaded
+        with _count_selects(workflow_context) as selects:
+            tracker._refresh(task)
+        assert len(selects) == 1
+
+        # Getting the execution from the context, and reloading it
+        with _count_selects(workflow_context) as selects:
+            engine.Engine._is_cancel(workflow_context)
+        assert len(selects) == 2
+
+        context_cls = task._context_cls
+        context_kwargs = dict(model_storage=workflow_context.model,
+                              resource_storage=workflow_context.resource,
+                              workdir=workflow_context._workdir,
+                              task_id=task.id,
+                              actor_id=node.id,
+                              service_id=workflow_context.service.id,
+                              execution_id=workflow_context.execution.id,
+                              name=workflow_context.name)
+        # As in a new session, e.g. of the thread the operation is executed in
+        workflow_context.model.task._session.expire_all()
+        with _count_selects(workflow_context) as selects:
+            op_ctx = context_cls(**context_kwargs)
+            assert op_ctx.task.arguments['counter'].value == 1
+            assert op_ctx.task.plugin is None
+        assert len(selects) == 1
+
+
 class TestCancel(BaseTest):
 
     def test_cancel_started_execution(self, workflow_context, executor):
@@ -272,6 +416,38 @@ class TestCancel(BaseTest):
         assert execution.error is None
         assert execution.status == models.Execution.CANCELLED
 
+    def test_cancel_requested_by_another_process(self, workflow_context, executor):
+        number_of_tasks = 100
+        node, _, operation_name = self._create_interface(
+            workflow_context, mock_sleep_task, {'seconds': 0.1})
+
+        @workflow
+        def mock_workflow(ctx, graph):
+            operations = (
+                self._op(node, operation_name, arguments=dict(seconds=0.1))
+                for _ in range(number_of_tasks)
+            )
+            return graph.sequence(*operations)
+
+        eng = self._engine(workflow_func=mock_workflow,
+                           workflow_context=workflow_context,
+                           executor=executor)
+        t = threading.Thread(target=eng.execute, kwargs=dict(ctx=workflow_context))
+        t.daemon = True
+        t.start()
+        time.sleep(1)
+        # Without sending the cancelling signal in this process
+        executions = models.Execution.__table__
+        workflow_context.model.execution.engine.execute(
+            executions.update()
+            .where(executions.c.id == workflow_context.execution.id)
+            .values(status=models.Execution.CANCELLING))
+        t.join(timeout=60)
+        assert not t.is_alive()
+        assert workflow_context.states == ['start', 'cancel']
+        assert 0 < len(global_test_holder.get('invocations', [])) < number_of_tasks
+        assert workflow_context.execution.status == models.Execution.CANCELLED
+
     def test_cancel_pending_execution(self, workflow_context, executor):
         @workflow
         def mock_workflow(graph, **_):
@@ -512,6 +688,20 @@ class TestTaskRetryAndAbort(BaseTest):
         assert global_test_holder.get('sent_task_signal_calls') == 1
 
 
+@contextmanager
+def _count_selects(ctx):
+    selects = []
+
+    def count(conn, cursor, statement, *args, **kwargs):
+        if statement.lstrip().upper().startswith('SELECT'):
+            selects.append(statement)
+    sqlalchemy.event.listen(ctx.model.task._engine, 'before_cursor_execute', count)
+    try:
+        yield selects
+    finally:
+        sqlalchemy.event.remove(ctx.model.task._engine, 'before_cursor_execute', count)
+
+
 @operation
 def mock_success_task(**_):
     pass
@@ -544,6 +734,21 @@ def mock_sleep_task(seconds, **_):
     time.sleep(seconds)
 
 
+_concurrent_tasks_lock = threading.Lock()
+
+
+@operation
+def mock_concurrent_task(**_):
+    with _concurrent_tasks_lock:
+        concurrent_tasks = global_test_holder.get('concurrent_tasks', 0) + 1
+        global_test_holder['concurrent_tasks'] = concurrent_tasks
+        global_test_holder['max_concurrent_tasks'] = max(
+            concurrent_tasks, global_test_holder.get('max_concurrent_tasks', 0))
+    time.sleep(0.2)
+    with _concurrent_tasks_lock:
+        global_test_holder['concurrent_tasks'] -= 1
+
+
 @operation
 def mock_task_retry(ctx, message, retry_interval=None, **_):
     _add_invocation_timestamp()
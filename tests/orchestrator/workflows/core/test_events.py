@@ -120,6 +120,16 @@ def test_node_state_doesnt_change_as_a_result_of_an_operation_that_is_not_standa
     assert node.state == node.INITIAL
 
 
+def test_operation_statistics_are_recorded_when_workflow_ends(ctx, executor):
+    node = run_operation_on_node(
+        ctx, interface_name='interface_name', op_name='op_name', executor=executor)
+    operation_statistics = ctx.model.operation_statistics.list()
+    assert len(operation_statistics) == 1
+    assert operation_statistics[0].node_type_name == node.type.name
+    assert operation_statistics[0].operation_name == 'op_name'
+    assert operation_statistics[0].count == 1
+
+
 def run_operation_on_node(ctx, op_name, interface_name, executor):
     node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
     interface = mock.models.create_interface(
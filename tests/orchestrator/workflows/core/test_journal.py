@@ -0,0 +1,178 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import retrying
+
+from aria.modeling import models
+from aria.orchestrator import workflow, operation
+from aria.orchestrator.workflows import api
+from aria.orchestrator.workflows.core import engine, graph_compiler, journal
+from aria.orchestrator.workflows.executor import thread
+
+from tests import mock, storage
+
+
+class TestTaskStateJournal(object):
+
+    def test_changes_are_coalesced(self, ctx):
+        task = _task(ctx)
+        task_journal = _journal(ctx, journal.BATCHED)
+        task_journal.record(task, status=task.SENT)
+        task_journal.record(task, status=task.STARTED, attempts_count=2)
+        assert task.status == task.STARTED
+        assert task_journal.pending_count == 1
+        assert _stored(ctx, task, models.Task.status) == task.PENDING
+
+        task_journal.flush()
+        assert task_journal.pending_count == 0
+        assert _stored(ctx, task, models.Task.status) == task.STARTED
+        assert _stored(ctx, task, models.Task.attempts_count) == 2
+
+    @pytest.mark.parametrize('durability, flushed', [
+        (journal.IMMEDIATE, True),
+        (journal.ENDED, False),
+        (journal.BATCHED, False),
+    ])
+    def test_durability_of_intermediate_changes(self, ctx, durability, flushed):
+        task = _task(ctx)
+        task_journal = _journal(ctx, durability)
+        task_journal.record(task, status=task.STARTED)
+        assert (_stored(ctx, task, models.Task.status) == task.STARTED) == flushed
+
+    @pytest.mark.parametrize('durability, flushed', [
+        (journal.IMMEDIATE, True),
+        (journal.ENDED, True),
+        (journal.BATCHED, False),
+    ])
+    def test_durability_of_ended_tasks(self, ctx, durability, flushed):
+        started, ended = _task(ctx), _task(ctx)
+        task_journal = _journal(ctx, durability)
+        task_journal.record(started, status=started.STARTED)
+        task_journal.record(ended, status=ended.SUCCESS)
+        # Ending a task flushes all the pending changes
+        assert (_stored(ctx, started, models.Task.status) == started.STARTED) == flushed
+        assert (_stored(ctx, ended, models.Task.status) == ended.SUCCESS) == flushed
+
+    def test_apply(self, ctx):
+        task = _task(ctx)
+        task_journal = _journal(ctx, journal.BATCHED)
+        task_journal.record(task, status=task.RETRYING, attempts_count=2)
+        task = ctx.model.task.refresh(task)
+        assert task.status == task.PENDING
+        task_journal.apply(task)
+        assert task.status == task.RETRYING
+        assert task.attempts_count == 2
+        # Applied changes don't make the task dirty
+        assert task not in ctx.model.task._session.dirty
+
+    def test_ended_tasks_are_not_overridden(self, ctx):
+        task = _task(ctx)
+        task_journal = _journal(ctx, journal.BATCHED)
+        task_journal.record(task, status=task.SENT)
+        # e.g. the dry executor commits task changes directly
+        task.status = task.SUCCESS
+        ctx.model.task.update(task)
+
+        assert task_journal.apply(task).status == task.SUCCESS
+        task_journal.flush()
+        assert _stored(ctx, task, models.Task.status) == task.SUCCESS
+
+    def test_periodic_flush(self, ctx):
+        task = _task(ctx)
+        task_journal = journal.TaskStateJournal(ctx.model, ctx.execution.id,
+                                                durability=journal.BATCHED, flush_interval=0.1)
+        task_journal.open()
+        try:
+            assert journal.get(ctx.execution.id) is task_journal
+            task_journal.record(task, status=task.STARTED)
+
+            @retrying.retry(stop_max_delay=10000, wait_fixed=50)
+            def assertion():
+                assert task_journal.pending_count == 0
+            assertion()
+        finally:
+            task_journal.close()
+        assert journal.get(ctx.execution.id) is None
+
+    def test_invalid_durability(self, ctx):
+        with pytest.raises(ValueError):
+            journal.TaskStateJournal(ctx.model, ctx.execution.id, durability='eventually')
+
+
+@pytest.mark.parametrize('durability', journal.DURABILITY_LEVELS)
+def test_engine(ctx, durability):
+    node = ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME)
+    interface = mock.models.create_interface(
+        node.service, 'aria.interfaces.lifecycle', 'create',
+        operation_kwargs=dict(function='{0}.{1}'.format(__name__, mock_operation.__name__)))
+    node.interfaces[interface.name] = interface
+    ctx.model.node.update(node)
+
+    @workflow
+    def mock_workflow(graph, **_):
+        graph.sequence(*(api.task.OperationTask(node, 'aria.interfaces.lifecycle', 'create')
+                         for _ in xrange(5)))
+
+    executor = thread.ThreadExecutor(pool_size=2)
+    try:
+        graph = mock_workflow(ctx=ctx)                                                              # pylint: disable=no-value-for-parameter,assignment-from-no-return
+        graph_compiler.GraphCompiler(ctx, executor.__class__).compile(graph)
+        eng = engine.Engine(executors={executor.__class__: executor},
+                            task_state_durability=durability)
+        eng.execute(ctx)
+    finally:
+        executor.close()
+
+    assert journal.get(ctx.execution.id) is None
+    tasks = ctx.model.task.list(filters=dict(_stub_type=None))
+    assert len(tasks) == 5
+    for task in tasks:
+        assert _stored(ctx, task, models.Task.status) == task.SUCCESS
+        assert _stored(ctx, task, models.Task.attempts_count) == 2
+        assert _stored(ctx, task, models.Task.started_at) is not None
+
+
+@operation
+def mock_operation(ctx, **_):
+    # The task's own object reflects the journaled changes
+    assert ctx.task.status == ctx.task.STARTED
+
+
+def _journal(ctx, durability):
+    # Not opened, so no flushing thread is started
+    return journal.TaskStateJournal(ctx.model, ctx.execution.id, durability=durability)
+
+
+def _task(ctx):
+    task = models.Task(execution=ctx.execution,
+                       node=ctx.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME),
+                       function='operations.create',
+                       interface_name='lifecycle',
+                       operation_name='create')
+    ctx.model.task.put(task)
+    return task
+
+
+def _stored(ctx, task, column):
+    # Bypasses the identity map
+    return ctx.model.task._session.query(column).filter(models.Task.id == task.id).scalar()
+
+
+@pytest.fixture
+def ctx(tmpdir):
+    context = mock.context.simple(str(tmpdir))
+    yield context
+    storage.release_sqlite_storage(context.model)
@@ -0,0 +1,209 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+from aria.modeling import models
+from aria.orchestrator import statistics
+from aria.orchestrator.workflows.core import scheduling
+
+from tests import mock, storage
+
+
+class TestReadyTasksQueue(object):
+
+    def test_no_limits(self):
+        queue = scheduling.ReadyTasksQueue()
+        tasks = [_Task() for _ in range(3)]
+        for task in tasks:
+            queue.put(task)
+        assert list(queue.pop_admitted()) == tasks
+        assert len(queue) == 0
+
+    def test_max_tasks(self):
+        queue = scheduling.ReadyTasksQueue(scheduling.ConcurrencyLimits(max_tasks=2))
+        tasks = [_Task() for _ in range(3)]
+        for task in tasks:
+            queue.put(task)
+        assert list(queue.pop_admitted()) == tasks[:2]
+        assert list(queue.pop_admitted()) == []
+
+        queue.release(tasks[0])
+        assert list(queue.pop_admitted()) == tasks[2:]
+
+    def test_stub_tasks_are_not_limited(self):
+        queue = scheduling.ReadyTasksQueue(scheduling.ConcurrencyLimits(max_tasks=1))
+        task, stub_task = _Task(), _Task(stub_type=models.Task.STUB)
+        queue.put(task)
+        queue.put(stub_task)
+        assert list(queue.pop_admitted()) == [task, stub_task]
+
+        queue.put(_Task(stub_type=models.Task.END_WORKFLOW))
+        assert len(list(queue.pop_admitted())) == 1
+
+    def test_max_tasks_per_executor(self):
+        queue = scheduling.ReadyTasksQueue(scheduling.ConcurrencyLimits(
+            max_tasks_per_executor={'limited-executor': 1}))
+        limited_tasks = [_Task(executor='limited-executor') for _ in range(2)]
+        other_task = _Task(executor='other-executor')
+        for task in limited_tasks + [other_task]:
+            queue.put(task)
+        # The task of the other executor is not held back by the limited executor
+        assert list(queue.pop_admitted()) == [limited_tasks[0], other_task]
+
+        queue.release(limited_tasks[0])
+        assert list(queue.pop_admitted()) == [limited_tasks[1]]
+
+    def test_max_tasks_per_host(self):
+        queue = scheduling.ReadyTasksQueue(scheduling.ConcurrencyLimits(max_tasks_per_host=1))
+        host1_tasks = [_Task(host_id=1) for _ in range(2)]
+        host2_task = _Task(host_id=2, relationship=True)
+        for task in host1_tasks + [host2_task]:
+            queue.put(task)
+        assert list(queue.pop_admitted()) == [host1_tasks[0], host2_task]
+
+        queue.release(host2_task)
+        assert list(queue.pop_admitted()) == []
+        queue.release(host1_tasks[0])
+        assert list(queue.pop_admitted()) == [host1_tasks[1]]
+
+    def test_hosts_take_turns(self):
+        queue = scheduling.ReadyTasksQueue(scheduling.ConcurrencyLimits(max_tasks_per_host=10))
+        host1_tasks = [_Task(host_id=1) for _ in range(3)]
+        host2_tasks = [_Task(host_id=2) for _ in range(3)]
+        for task in host1_tasks + host2_tasks:
+            queue.put(task)
+        assert list(queue.pop_admitted()) == \
+            [host1_tasks[0], host2_tasks[0], host1_tasks[1], host2_tasks[1], host1_tasks[2],
+             host2_tasks[2]]
+
+    def test_release_of_task_without_slot(self):
+        queue = scheduling.ReadyTasksQueue(scheduling.ConcurrencyLimits(max_tasks=1))
+        task = _Task()
+        queue.release(task)
+        queue.put(task)
+        assert list(queue.pop_admitted()) == [task]
+
+    def test_priority(self):
+        queue = scheduling.ReadyTasksQueue(
+            scheduling.ConcurrencyLimits(max_tasks_per_host=10), _AttributePolicy())
+        tasks = [_Task(host_id=1, priority=2), _Task(host_id=1, priority=1),
+                 _Task(host_id=2, priority=3), _Task(host_id=2, priority=1)]
+        for task in tasks:
+            queue.put(task)
+        assert list(queue.pop_admitted()) == [tasks[1], tasks[3], tasks[0], tasks[2]]
+
+
+class TestPolicies(object):
+
+    def test_shortest_job_first(self, mocker):
+        tasks = [_Task(), _Task(), _Task()]
+        mocker.patch.object(scheduling, 'estimate_durations',
+                            return_value={tasks[0].id: 3, tasks[1].id: 1, tasks[2].id: 2})
+        policy = scheduling.ShortestJobFirstPolicy()
+        policy.prepare(None, tasks, {})
+        assert sorted(tasks, key=policy.priority) == [tasks[1], tasks[2], tasks[0]]
+
+    def test_critical_path(self, mocker):
+        # short -> end, long1 -> long2 -> end, where the short task takes longer than each of the
+        # long path's tasks
+        short, long1, long2, end = _Task(), _Task(), _Task(), _Task(stub_type=models.Task.STUB)
+        mocker.patch.object(scheduling, 'estimate_durations',
+                            return_value={short.id: 3, long1.id: 2, long2.id: 2, end.id: 0})
+        policy = scheduling.CriticalPathPolicy()
+        policy.prepare(None,
+                       [short, long1, long2, end],
+                       {short.id: [end], long1.id: [long2], long2.id: [end]})
+        assert policy.priority(long1) == -4
+        assert policy.priority(short) == -3
+        assert policy.priority(long2) == -2
+        assert policy.priority(end) == 0
+
+
+class TestEstimateDurations(object):
+
+    def test_estimate_durations(self, ctx):
+        node = ctx.model.node.list()[0]
+        past_execution = mock.models.create_execution(ctx.service)
+        ctx.model.execution.put(past_execution)
+        started_at = datetime.utcnow()
+        for seconds, status in ((1, models.Task.SUCCESS), (3, models.Task.SUCCESS),
+                                (100, models.Task.FAILED)):
+            ctx.model.task.put(_operation_task(
+                past_execution, node, status=status, started_at=started_at,
+                ended_at=started_at + timedelta(seconds=seconds)))
+        statistics.record_execution(ctx.model, past_execution)
+
+        task = _operation_task(ctx.execution, node)
+        new_operation_task = _operation_task(ctx.execution, node, operation_name='other')
+        stub_task = models.Task(execution=ctx.execution, _stub_type=models.Task.STUB)
+        for model_task in (task, new_operation_task, stub_task):
+            ctx.model.task.put(model_task)
+
+        durations = scheduling.estimate_durations(ctx, [task, new_operation_task, stub_task])
+        assert durations == {
+            task.id: 2,
+            new_operation_task.id: statistics.DEFAULT_OPERATION_DURATION,
+            stub_task.id: 0
+        }
+
+
+def _operation_task(execution, node, operation_name='create', **kwargs):
+    return models.Task(execution=execution,
+                       node=node,
+                       function='operations.create',
+                       interface_name='lifecycle',
+                       operation_name=operation_name,
+                       **kwargs)
+
+
+@pytest.fixture
+def ctx(tmpdir):
+    context = mock.context.simple(str(tmpdir))
+    yield context
+    storage.release_sqlite_storage(context.model)
+
+
+class _AttributePolicy(scheduling.SchedulingPolicy):
+    def priority(self, task):
+        return task.priority
+
+
+_ids = itertools.count()
+
+
+class _Task(object):
+    def __init__(self, stub_type=None, executor='executor', host_id=None, relationship=False,
+                 priority=0):
+        self.id = next(_ids)
+        self.priority = priority
+        self._stub_type = stub_type
+        self._executor = executor
+        node = _Node(host_id)
+        self.node = None if relationship else node
+        self.relationship = _Relationship(node) if relationship else None
+
+
+class _Node(object):
+    def __init__(self, host_id):
+        self.host_fk = host_id
+
+
+class _Relationship(object):
+    def __init__(self, source_node):
+        self.source_node = source_node
@@ -53,8 +53,12 @@ class MockContext(object):
     def model(self):
         return self._storage
 
+    @property
+    def _task_id(self):
+        return self.task.id
+
     @classmethod
-    def instantiate_from_dict(cls, storage_kwargs=None, task_kwargs=None):
+    def instantiate_from_dict(cls, storage_kwargs=None, task_kwargs=None, **_):
         return cls(storage=aria.application_model_storage(**(storage_kwargs or {})),
                    task_kwargs=(task_kwargs or {}))
 
@@ -0,0 +1,223 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import threading
+
+import pytest
+import retrying
+
+try:
+    import trollius
+    from aria.orchestrator.workflows.executor import asyncio
+except ImportError:
+    trollius = None
+
+import aria
+from aria import operation
+from aria.orchestrator import events
+
+import tests.storage
+from . import MockContext
+
+
+pytestmark = pytest.mark.skipif(trollius is None, reason='requires trollius')
+
+
+class TestAsyncioExecutor(object):
+
+    def test_coroutine_operations(self, executor, storage):
+        succeeding = _context(storage, mock_coroutine, arguments={'seconds': 0})
+        failing = _context(storage, mock_failing_coroutine)
+        for ctx in (succeeding, failing):
+            executor.execute(ctx)
+
+        @retrying.retry(stop_max_delay=10000, wait_fixed=100)
+        def assertion():
+            assert succeeding.states == ['start', 'success']
+            assert failing.states == ['start', 'failure']
+            assert isinstance(failing.exception, MockException)
+            assert 'mock_failing_coroutine' in failing.traceback
+        assertion()
+
+    def test_coroutines_share_the_event_loop(self, executor, storage):
+        del _coroutine_threads[:]
+        contexts = [_context(storage, mock_coroutine, arguments={'seconds': 1})
+                    for _ in xrange(50)]
+        start = time.time()
+        for ctx in contexts:
+            executor.execute(ctx)
+
+        @retrying.retry(stop_max_delay=20000, wait_fixed=100)
+        def assertion():
+            assert all(ctx.states == ['start', 'success'] for ctx in contexts)
+        assertion()
+        # The coroutines sleep concurrently (see tests/benchmarks for the throughput)
+        assert time.time() - start < 20
+        assert set(_coroutine_threads) == set([executor._thread.ident])
+
+    def test_coroutines_have_sessions_of_their_own(self, executor, storage):
+        contexts = [_context(storage, mock_session_coroutine) for _ in xrange(2)]
+        for ctx in contexts:
+            executor.execute(ctx)
+
+        @retrying.retry(stop_max_delay=10000, wait_fixed=100)
+        def assertion():
+            assert all(ctx.states == ['start', 'success'] for ctx in contexts)
+        assertion()
+        assert len(_coroutine_sessions) == 2
+        assert _coroutine_sessions[0] is not _coroutine_sessions[1]
+        assert storage.task._session() not in _coroutine_sessions
+
+    def test_signals_are_sent_in_the_thread_pool(self, executor, storage):
+        signal_threads = []
+
+        def handler(*args, **kwargs):
+            signal_threads.append(threading.current_thread().ident)
+
+        events.start_task_signal.connect(handler)
+        events.on_success_task_signal.connect(handler)
+        try:
+            ctx = _context(storage, mock_coroutine, arguments={'seconds': 0})
+            executor.execute(ctx)
+
+            @retrying.retry(stop_max_delay=10000, wait_fixed=100)
+            def assertion():
+                assert ctx.states == ['start', 'success']
+            assertion()
+        finally:
+            events.start_task_signal.disconnect(handler)
+            events.on_success_task_signal.disconnect(handler)
+        assert len(signal_threads) == 2
+        assert executor._thread.ident not in signal_threads
+
+    def test_other_operations_are_executed_in_the_thread_pool(self, executor, storage):
+        ctx = _context(storage, mock_blocking_operation)
+        executor.execute(ctx)
+
+        @retrying.retry(stop_max_delay=10000, wait_fixed=100)
+        def assertion():
+            assert ctx.states == ['start', 'success']
+        assertion()
+        assert _blocking_threads and executor._thread.ident not in _blocking_threads
+
+    def test_operation_decorator(self, executor, storage):
+        ctx = _context(storage, mock_decorated_coroutine)
+        executor.execute(ctx)
+
+        @retrying.retry(stop_max_delay=10000, wait_fixed=100)
+        def assertion():
+            assert ctx.states == ['start', 'success']
+        assertion()
+
+    def test_terminate(self, executor, storage):
+        ctx = _context(storage, mock_coroutine, arguments={'seconds': 60})
+        executor.execute(ctx)
+
+        @retrying.retry(stop_max_delay=10000, wait_fixed=100)
+        def wait_for_start():
+            assert ctx.states == ['start']
+        wait_for_start()
+
+        executor.terminate(ctx.task.id)
+        start = time.time()
+        executor.close()
+        assert time.time() - start < 5
+        # Terminated tasks end without a signal
+        assert ctx.states == ['start']
+
+
+_coroutine_threads = []
+_coroutine_sessions = []
+_blocking_threads = []
+
+
+def _context(storage, func, arguments=None):
+    return MockContext(storage, task_kwargs=dict(
+        function='{0}.{1}'.format(__name__, func.__name__),
+        arguments=dict((name, aria.modeling.models.Argument.wrap(name, value))
+                       for name, value in (arguments or {}).iteritems())))
+
+
+if trollius is not None:
+    @trollius.coroutine
+    def mock_coroutine(seconds, **_):
+        _coroutine_threads.append(threading.current_thread().ident)
+        yield trollius.From(trollius.sleep(seconds))
+
+    @trollius.coroutine
+    def mock_session_coroutine(ctx, **_):
+        session = ctx.model.task._session()
+        yield trollius.From(trollius.sleep(0.1))
+        # Interleaved coroutines don't change the session of the coroutine
+        assert ctx.model.task._session() is session
+        _coroutine_sessions.append(session)
+
+    @trollius.coroutine
+    def mock_failing_coroutine(**_):
+        yield trollius.From(trollius.sleep(0))
+        raise MockException()
+
+    @operation
+    @trollius.coroutine
+    def mock_decorated_coroutine(ctx, **_):
+        yield trollius.From(trollius.sleep(0))
+        assert ctx.model.task._instrumentation
+
+
+def mock_blocking_operation(**_):
+    _blocking_threads.append(threading.current_thread().ident)
+    time.sleep(0.1)
+
+
+class MockException(Exception):
+    pass
+
+
+@pytest.fixture
+def executor():
+    result = asyncio.AsyncioExecutor()
+    yield result
+    result.close()
+
+
+@pytest.fixture
+def storage(tmpdir):
+    _storage = aria.application_model_storage(aria.storage.sql_mapi.SQLAlchemyModelAPI,
+                                              initiator_kwargs=dict(base_dir=str(tmpdir)))
+    yield _storage
+    tests.storage.release_sqlite_storage(_storage)
+
+
+@pytest.fixture(autouse=True)
+def register_signals():
+    def start_handler(task, *args, **kwargs):
+        task.states.append('start')
+
+    def success_handler(task, *args, **kwargs):
+        task.states.append('success')
+
+    def failure_handler(task, exception, traceback=None, *args, **kwargs):
+        task.exception = exception
+        task.traceback = traceback
+        task.states.append('failure')
+
+    events.start_task_signal.connect(start_handler)
+    events.on_success_task_signal.connect(success_handler)
+    events.on_failure_task_signal.connect(failure_handler)
+    yield
+    events.start_task_signal.disconnect(start_handler)
+    events.on_success_task_signal.disconnect(success_handler)
+    events.on_failure_task_signal.disconnect(failure_handler)
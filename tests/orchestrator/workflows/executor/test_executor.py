@@ -25,6 +25,11 @@ except ImportError:
     _celery = None
     app = None
 
+try:
+    from aria.orchestrator.workflows.executor import asyncio
+except ImportError:
+    asyncio = None
+
 import aria
 from aria.modeling import models
 from aria.orchestrator import events
@@ -78,6 +83,11 @@ def test_process_execute(process_executor, storage):
     execute_and_assert(process_executor, storage)
 
 
+@pytest.mark.skipif(asyncio is None, reason='requires trollius')
+def test_asyncio_execute(asyncio_executor):
+    execute_and_assert(asyncio_executor)
+
+
 def mock_successful_task(**_):
     pass
 
@@ -121,6 +131,13 @@ def thread_executor(request):
     result.close()
 
 
+@pytest.fixture
+def asyncio_executor():
+    result = asyncio.AsyncioExecutor()
+    yield result
+    result.close()
+
+
 @pytest.fixture
 def process_executor():
     result = process.ProcessExecutor(python_path=tests.ROOT_DIR)
@@ -17,6 +17,7 @@ import os
 import sys
 import time
 import Queue
+import struct
 import subprocess
 
 import pytest
@@ -28,11 +29,13 @@ import aria
 from aria import operation
 from aria.modeling import models
 from aria.orchestrator import events
+from aria.utils import ipc
 from aria.utils.plugin import create as create_plugin
 from aria.orchestrator.workflows.executor import process
 
 import tests.storage
 import tests.resources
+import tests.mock.models
 from tests.helpers import FilesystemDataHolder
 from tests.fixtures import (  # pylint: disable=unused-import
     plugins_dir,
@@ -117,6 +120,154 @@ while True:
                 assert pid not in psutil.pids()
 
 
+class TestProcessExecutorChannels(object):
+
+    def test_listener_serves_channels_concurrently(self, executor):
+        # A subprocess which stalls in the middle of a message doesn't hold back other subprocesses
+        stalled_channel = ipc.connect(executor._server_address)
+        try:
+            # The size of a message which is never sent
+            stalled_channel.sendall(struct.pack(ipc._INT_FMT, 100))
+            channel = process._Channel(executor._server_address)
+            try:
+                messenger = process._Messenger(task_id='unknown-task', channel=channel)
+                # The same channel is used for the subsequent messages
+                for _ in range(2):
+                    with pytest.raises(KeyError):
+                        messenger.started()
+            finally:
+                channel.close()
+        finally:
+            stalled_channel.close()
+
+
+class TestProcessExecutorPool(object):
+
+    def test_workers_are_reused(self, model, queue, fs_test_holder, plugin_manager):
+        executor = process.ProcessExecutor(
+            plugin_manager=plugin_manager, python_path=[tests.ROOT_DIR], pool_size=1)
+        try:
+            pids = self._execute_pid_tasks(executor, model, queue, fs_test_holder, count=3)
+        finally:
+            executor.close()
+        assert len(set(pids)) == 1
+        assert pids[0] != os.getpid()
+
+    def test_workers_are_replaced_after_max_tasks(self, model, queue, fs_test_holder,
+                                                  plugin_manager):
+        executor = process.ProcessExecutor(plugin_manager=plugin_manager,
+                                           python_path=[tests.ROOT_DIR],
+                                           pool_size=1,
+                                           max_tasks_per_worker=2)
+        try:
+            pids = self._execute_pid_tasks(executor, model, queue, fs_test_holder, count=3)
+        finally:
+            executor.close()
+        assert pids[0] == pids[1]
+        assert pids[1] != pids[2]
+
+    def test_workers_have_plugin_affinity(self, model, queue, fs_test_holder, plugin_manager):
+        plugin = tests.mock.models.create_plugin()
+        model.plugin.put(plugin)
+        executor = process.ProcessExecutor(
+            plugin_manager=plugin_manager, python_path=[tests.ROOT_DIR], pool_size=2)
+        try:
+            pids = []
+            for plugin_fk in (None, plugin.id, None, plugin.id):
+                pids.extend(self._execute_pid_tasks(
+                    executor, model, queue, fs_test_holder, count=1, plugin_fk=plugin_fk))
+        finally:
+            executor.close()
+        assert pids[0] == pids[2]
+        assert pids[1] == pids[3]
+        assert pids[0] != pids[1]
+
+    @staticmethod
+    def _execute_pid_tasks(executor, model, queue, fs_test_holder, count, plugin_fk=None):
+        pids = []
+        for _ in range(count):
+            holder_path_argument = models.Argument.wrap('holder_path', fs_test_holder.path)
+            model.argument.put(holder_path_argument)
+            executor.execute(MockContext(
+                model,
+                task_kwargs=dict(function='{0}.{1}'.format(__name__, pid_task.__name__),
+                                 arguments=dict(holder_path=holder_path_argument),
+                                 plugin_fk=plugin_fk)))
+            assert queue.get(timeout=60) is None
+            pids.append(fs_test_holder['pid'])
+        return pids
+
+
+class TestWorkerPool(object):
+
+    def test_plugin_pool_size(self, pool, dispatched):
+        pool.submit(_PoolContext('1'), arguments={}, key='plugin')
+        pool.submit(_PoolContext('2'), arguments={}, key='plugin')
+        # Waiting for the plugin's single worker doesn't hold back tasks of other plugins
+        pool.submit(_PoolContext('3'), arguments={}, key='other-plugin')
+        assert [task_id for task_id, _ in dispatched] == ['1', '3']
+
+        pool.release('1')
+        assert [task_id for task_id, _ in dispatched] == ['1', '3', '2']
+        assert dispatched[0][1] is dispatched[2][1]
+
+    def test_least_recently_used_worker_is_stopped_on_memory_limit(self, pool, dispatched,
+                                                                   mocker):
+        mocker.patch.object(process._Worker, 'memory', new_callable=mocker.PropertyMock,
+                            return_value=100)
+        pool._max_memory = 250
+        for task_id, key in (('1', 'a'), ('2', 'b')):
+            pool.submit(_PoolContext(task_id), arguments={}, key=key)
+            pool.release(task_id)
+        # The pool is still under the memory limit
+        pool.submit(_PoolContext('3'), arguments={}, key='c')
+        assert len(pool._workers) == 3
+
+        pool.release('3')
+        pool.submit(_PoolContext('4'), arguments={}, key='d')
+        assert sorted(worker.key for worker in pool._workers) == ['b', 'c', 'd']
+        assert dispatched[0][1].proc.stdin.closed
+
+
+class _PoolContext(object):
+    def __init__(self, task_id):
+        self._task_id = task_id
+
+
+class _PoolWorkerProcess(object):
+    """
+    Stands for a worker subprocess, which exits once its stdin is closed.
+    """
+    pid = os.getpid()
+
+    def __init__(self):
+        self.stdin = open(os.devnull, 'w')
+
+    def poll(self):
+        return 0 if self.stdin.closed else None
+
+    def wait(self):
+        pass
+
+
+@pytest.fixture
+def dispatched():
+    return []
+
+
+@pytest.fixture
+def pool(dispatched):
+    _pool = process._WorkerPool(
+        size=3,
+        max_tasks_per_worker=None,
+        max_memory=None,
+        key_size=lambda key: 1 if key == 'plugin' else 3,
+        spawn=lambda key: _PoolWorkerProcess(),
+        on_dispatch=lambda ctx, worker: dispatched.append((ctx._task_id, worker)))
+    yield _pool
+    _pool.close()
+
+
 @pytest.fixture
 def queue():
     _queue = Queue.Queue()
@@ -140,9 +291,10 @@ def fs_test_holder(tmpdir):
     return holder
 
 
-@pytest.fixture
-def executor(plugin_manager):
-    result = process.ProcessExecutor(plugin_manager=plugin_manager, python_path=[tests.ROOT_DIR])
+@pytest.fixture(params=[0, 2], ids=['no-pool', 'pool'])
+def executor(request, plugin_manager):
+    result = process.ProcessExecutor(
+        plugin_manager=plugin_manager, python_path=[tests.ROOT_DIR], pool_size=request.param)
     try:
         yield result
     finally:
@@ -164,6 +316,11 @@ def model(tmpdir):
     tests.storage.release_sqlite_storage(_storage)
 
 
+@operation
+def pid_task(holder_path, **_):
+    FilesystemDataHolder(holder_path)['pid'] = os.getpid()
+
+
 @operation
 def freezing_task(holder_path, freezing_script_path, **_):
     holder = FilesystemDataHolder(holder_path)
@@ -0,0 +1,160 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import threading
+
+import pytest
+import retrying
+
+from aria.orchestrator import events
+from aria.orchestrator.workflows.executor import thread
+
+from . import MockContext
+
+
+class TestThreadExecutor(object):
+
+    def test_close_wakes_up_idle_threads(self):
+        executor = thread.ThreadExecutor(pool_size=3)
+        start = time.time()
+        executor.close()
+        assert time.time() - start < 0.5
+        assert executor.stats['threads'] == 0
+
+    def test_fixed_pool(self, blocking_tasks):
+        executor = thread.ThreadExecutor(pool_size=2)
+        try:
+            contexts = blocking_tasks(executor, 3)
+            _wait_for(lambda: executor.stats['busy_threads'] == 2)
+            assert executor.stats == {'threads': 2,
+                                      'busy_threads': 2,
+                                      'queue_depth': 1,
+                                      'utilization': 1.0,
+                                      'executed_tasks': 0}
+            _release.set()
+            _wait_for(lambda: all(ctx.states == ['start', 'success'] for ctx in contexts))
+            _wait_for(lambda: executor.stats['executed_tasks'] == 3)
+            assert executor.stats['utilization'] == 0
+        finally:
+            executor.close()
+
+    def test_elastic_pool(self, blocking_tasks):
+        executor = thread.ThreadExecutor(pool_size=1, max_pool_size=3, idle_timeout=0.5)
+        try:
+            contexts = blocking_tasks(executor, 4)
+            _wait_for(lambda: executor.stats['busy_threads'] == 3)
+            assert executor.stats['threads'] == 3
+            assert executor.stats['queue_depth'] == 1
+
+            _release.set()
+            _wait_for(lambda: all(ctx.states == ['start', 'success'] for ctx in contexts))
+            # The added threads exit once they are idle
+            _wait_for(lambda: executor.stats['threads'] == 1)
+        finally:
+            executor.close()
+
+    def test_backlog_threshold(self, blocking_tasks):
+        executor = thread.ThreadExecutor(pool_size=1, max_pool_size=3, backlog_threshold=1)
+        try:
+            blocking_tasks(executor, 2)
+            _wait_for(lambda: executor.stats['busy_threads'] == 1)
+            assert executor.stats['threads'] == 1
+            blocking_tasks(executor, 1)
+            _wait_for(lambda: executor.stats['busy_threads'] == 2)
+        finally:
+            _release.set()
+            executor.close()
+
+    def test_terminate_queued_task(self, blocking_tasks):
+        executor = thread.ThreadExecutor(pool_size=1)
+        try:
+            executing, queued = blocking_tasks(executor, 2)
+            _wait_for(lambda: executing.states == ['start'])
+            executor.terminate(queued.task.id)
+            _release.set()
+            _wait_for(lambda: executor.stats['executed_tasks'] == 2)
+            assert executing.states == ['start', 'success']
+            assert queued.states == []
+        finally:
+            executor.close()
+
+    def test_terminate_executing_task(self, blocking_tasks):
+        executor = thread.ThreadExecutor(pool_size=1)
+        try:
+            executing, = blocking_tasks(executor, 1)
+            _wait_for(lambda: executing.states == ['start'])
+            executor.terminate(executing.task.id)
+            # The task isn't interrupted, but its result is ignored
+            _release.set()
+            _wait_for(lambda: executor.stats['executed_tasks'] == 1)
+            assert executing.states == ['start']
+
+            # The thread executes the next task
+            next_task = _context(mock_blocking_task)
+            executor.execute(next_task)
+            _wait_for(lambda: next_task.states == ['start', 'success'])
+        finally:
+            executor.close()
+
+
+_release = threading.Event()
+
+
+def _context(func):
+    return MockContext(None, task_kwargs=dict(
+        function='{0}.{1}'.format(__name__, func.__name__)))
+
+
+@retrying.retry(stop_max_delay=10000, wait_fixed=50)
+def _wait_for(condition):
+    assert condition()
+
+
+def mock_blocking_task(**_):
+    _release.wait()
+
+
+@pytest.fixture
+def blocking_tasks():
+    _release.clear()
+
+    def execute(executor, count):
+        contexts = [_context(mock_blocking_task) for _ in range(count)]
+        for ctx in contexts:
+            executor.execute(ctx)
+        return contexts
+    yield execute
+    _release.set()
+
+
+@pytest.fixture(autouse=True)
+def register_signals():
+    def start_handler(task, *args, **kwargs):
+        task.states.append('start')
+
+    def success_handler(task, *args, **kwargs):
+        task.states.append('success')
+
+    def failure_handler(task, exception, *args, **kwargs):
+        task.states.append('failure')
+
+    events.start_task_signal.connect(start_handler)
+    events.on_success_task_signal.connect(success_handler)
+    events.on_failure_task_signal.connect(failure_handler)
+    yield
+    events.start_task_signal.disconnect(start_handler)
+    events.on_success_task_signal.disconnect(success_handler)
+    events.on_failure_task_signal.disconnect(failure_handler)
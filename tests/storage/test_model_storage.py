@@ -13,8 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from datetime import datetime
+
 import pytest
 
+import sqlalchemy
 from sqlalchemy import (
     Column,
     Integer,
@@ -131,6 +134,91 @@ def test_cascade_deletion(context):
     assert len(context.model.node.list()) == 0
 
 
+def test_upgrade_creates_missing_indexes(tmpdir):
+    def index_names(storage):
+        return set(index['name'] for index in
+                   sqlalchemy.inspect(storage.log.engine).get_indexes('log'))
+
+    storage = application_model_storage(sql_mapi.SQLAlchemyModelAPI,
+                                        initiator_kwargs=dict(base_dir=str(tmpdir)))
+    try:
+        assert 'ix_log_execution_fk_id' in index_names(storage)
+        assert storage.upgrade() == []
+        # As in a database created before the index was added
+        storage.log.engine.execute('DROP INDEX ix_log_execution_fk_id')
+        assert storage.upgrade() == ['ix_log_execution_fk_id']
+        assert 'ix_log_execution_fk_id' in index_names(storage)
+    finally:
+        tests_storage.release_sqlite_storage(storage)
+
+
+class TestSQLiteProfiles(object):
+
+    @pytest.mark.parametrize('profile, journal_mode, synchronous', [
+        (sql_mapi.DEFAULT_PROFILE, 'delete', 2),
+        (sql_mapi.WAL_PROFILE, 'wal', 1),
+        (dict(pragmas=[('synchronous', 'OFF')]), 'delete', 0),
+    ])
+    def test_pragmas(self, tmpdir, profile, journal_mode, synchronous):
+        storage = application_model_storage(sql_mapi.SQLAlchemyModelAPI,
+                                            initiator_kwargs=dict(base_dir=str(tmpdir)),
+                                            profile=profile)
+        try:
+            session = storage._all_api_kwargs['session']
+            assert session.execute('PRAGMA journal_mode').scalar() == journal_mode
+            assert session.execute('PRAGMA synchronous').scalar() == synchronous
+            # The profile is kept for storages created from the serialization dict
+            assert storage.serialization_dict['initiator_kwargs']['profile'] == profile
+        finally:
+            tests_storage.release_sqlite_storage(storage)
+
+    def test_unknown_profile(self, tmpdir):
+        with pytest.raises(exceptions.StorageError):
+            sql_mapi.init_storage(str(tmpdir), profile='unknown')
+
+
+class TestServerStorage(object):
+
+    @pytest.fixture
+    def storage(self, tmpdir):
+        # A database file stands in for a database server
+        model_storage = application_model_storage(
+            sql_mapi.SQLAlchemyModelAPI,
+            initiator=sql_mapi.init_server_storage,
+            initiator_kwargs=dict(url='sqlite:///{0}'.format(tmpdir.join('db.sqlite')),
+                                  pool_size=2))
+        model_storage.register(MockModel)
+        yield model_storage
+        tests_storage.release_sqlite_storage(model_storage)
+
+    def test_connections_are_pooled(self, storage):
+        connections = []
+        sqlalchemy.event.listen(storage.op_mock_model._engine, 'connect',
+                                lambda *args: connections.append(args))
+        for value in xrange(5):
+            storage.op_mock_model.put(MockModel(value=value))
+            storage.op_mock_model._session.remove()
+        assert len(storage.op_mock_model.list()) == 5
+        # The connection opened to create the tables is reused
+        assert not connections
+
+    def test_pre_ping_reconnects(self, storage):
+        storage.op_mock_model.put(MockModel(value=1))
+        storage.op_mock_model._session.remove()
+        # The pooled connection is closed, as if the database server was restarted
+        connection = storage.op_mock_model._engine.raw_connection()
+        dbapi_connection = connection.connection
+        connection.close()
+        dbapi_connection.close()
+
+        assert len(storage.op_mock_model.list()) == 1
+
+    def test_statement_cache(self, storage):
+        cache = storage.op_mock_model._engine._execution_options['compiled_cache']
+        storage.op_mock_model.put(MockModel(value=1))
+        assert len(cache) > 0
+
+
 @pytest.fixture
 def context(tmpdir):
     result = mock.context.simple(str(tmpdir))
@@ -162,6 +250,195 @@ def test_mapi_include(context):
     assert_include(service2)
 
 
+@pytest.fixture
+def selects(context):
+    statements = []
+    engine = context.model.node._engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    sqlalchemy.event.listen(engine, 'before_cursor_execute', listener)
+    yield statements
+    sqlalchemy.event.remove(engine, 'before_cursor_execute', listener)
+
+
+class TestLoad(object):
+
+    def test_get(self, context, selects):
+        node_id = context.model.node.get_by_name(mock.models.DEPENDENCY_NODE_NAME).id
+        context.model.node._session.expunge_all()
+        del selects[:]
+        node = context.model.node.get(node_id, load=['node_template.type', 'interfaces'])
+        assert len(selects) == 1
+        assert node.node_template.type.name
+        assert node.interfaces is not None
+        assert len(selects) == 1
+
+    def test_list(self, context, selects):
+        context.model.node._session.expunge_all()
+        del selects[:]
+        nodes = context.model.node.list(load=['service', 'outbound_relationships'])
+        # A query for the nodes and their services, and one for their relationships
+        assert len(selects) == 2
+        assert all(node.service and node.outbound_relationships is not None for node in nodes)
+        assert len(selects) == 2
+
+    def test_refresh(self, context, selects):
+        execution = context.execution
+        del selects[:]
+        context.model.execution.refresh(execution, load=())
+        assert len(selects) == 1
+
+    def test_unknown_relationship(self, context):
+        with pytest.raises(exceptions.StorageError):
+            context.model.node.list(load=['node_template.nonexistent'])
+
+
+class TestIdentityMapCache(object):
+
+    @pytest.fixture
+    def cache(self, context):
+        result = sql_mapi.IdentityMapCache(context.model.node_template.engine,
+                                           (modeling.models.NodeTemplate, ))
+        yield result
+        result.close()
+
+    def test_read_through(self, context, cache, selects):
+        node_template_id = context.model.node_template.get_by_name(
+            mock.models.DEPENDENCY_NODE_TEMPLATE_NAME).id
+        del selects[:]
+        node_template = cache.get(modeling.models.NodeTemplate, node_template_id)
+        assert node_template.id == node_template_id
+        assert node_template.properties is not None
+        assert cache.cache_info() == (0, 1, None, 1)
+
+        # Commits of the storage don't expire cached models
+        context.model.execution.update(context.execution)
+        del selects[:]
+        assert cache.get(modeling.models.NodeTemplate, node_template_id) is node_template
+        assert node_template.properties is not None
+        assert not selects
+        assert cache.cache_info() == (1, 1, None, 1)
+
+        cache.reset_cache_info()
+        assert cache.cache_info() == (0, 0, None, 0)
+
+    def test_invalidated_by_writes(self, context, cache):
+        node_template = context.model.node_template.get_by_name(
+            mock.models.DEPENDENCY_NODE_TEMPLATE_NAME)
+        assert cache.get(modeling.models.NodeTemplate, node_template.id).description is None
+
+        node_template.description = 'changed'
+        context.model.node_template.update(node_template)
+        assert cache.get(modeling.models.NodeTemplate, node_template.id).description == 'changed'
+        assert cache.cache_info() == (0, 2, None, 2)
+
+        # Writing other models doesn't invalidate the cache
+        context.model.execution.update(context.execution)
+        cache.get(modeling.models.NodeTemplate, node_template.id)
+        assert cache.cache_info() == (1, 2, None, 2)
+
+    def test_invalidated_by_bulk_writes(self, context, cache):
+        node_template_id = context.model.node_template.get_by_name(
+            mock.models.DEPENDENCY_NODE_TEMPLATE_NAME).id
+        assert cache.get(modeling.models.NodeTemplate, node_template_id).description is None
+
+        session = context.model.node_template._session
+        session.query(modeling.models.NodeTemplate) \
+            .filter_by(id=node_template_id) \
+            .update({'description': 'changed'}, synchronize_session=False)
+        session.commit()
+        assert cache.get(modeling.models.NodeTemplate, node_template_id).description == 'changed'
+        assert cache.cache_info() == (0, 2, None, 2)
+
+    def test_ttl(self, context):
+        cache = sql_mapi.IdentityMapCache(context.model.node_template.engine,
+                                          (modeling.models.NodeTemplate, ), ttl=0)
+        node_template_id = context.model.node_template.list()[0].id
+        try:
+            cache.get(modeling.models.NodeTemplate, node_template_id)
+            cache.get(modeling.models.NodeTemplate, node_template_id)
+            # Writes of other processes can't be observed, so models are always loaded again
+            assert cache.cache_info() == (0, 2, None, 2)
+        finally:
+            cache.close()
+
+    def test_not_found(self, cache):
+        with pytest.raises(exceptions.NotFoundError):
+            cache.get(modeling.models.NodeTemplate, 1000)
+
+    def test_uncached_model(self, context, cache):
+        with pytest.raises(exceptions.StorageError):
+            cache.get(modeling.models.Node, context.model.node.list()[0].id)
+
+
+class TestBulk(object):
+
+    @pytest.fixture
+    def commits(self, context):
+        counter = []
+        session = context.model.log._session
+        listener = lambda *args: counter.append(True)
+        sqlalchemy.event.listen(session, 'after_commit', listener)
+        yield counter
+        sqlalchemy.event.remove(session, 'after_commit', listener)
+
+    def test_put_many_without_relationships(self, context, commits):
+        logs = context.model.log.put_many(
+            modeling.models.Log(execution_fk=context.execution.id, level='INFO',
+                                msg=str(i), created_at=datetime.utcnow())
+            for i in xrange(10))
+        assert len(logs) == 10
+        assert len(commits) == 1
+        assert sorted(log.msg for log in context.model.log.list()) == \
+            sorted(str(i) for i in xrange(10))
+
+    def test_put_many_with_relationships(self, context, commits):
+        logs = context.model.log.put_many(
+            modeling.models.Log(execution=context.execution, level='INFO',
+                                msg=str(i), created_at=datetime.utcnow())
+            for i in xrange(10))
+        assert len(commits) == 1
+        assert all(log.id is not None for log in logs)
+        assert len(context.model.log.list()) == 10
+
+    def test_update_many(self, context, commits):
+        nodes = context.model.node.list()
+        for node in nodes:
+            node.description = 'updated'
+        context.model.node.update_many(nodes)
+        assert len(commits) == 1
+        context.model.node._session.expire_all()
+        assert all(node.description == 'updated' for node in context.model.node.list())
+
+    def test_bulk(self, context, commits):
+        with context.model.log.bulk():
+            with context.model.node.bulk():
+                node = context.model.node.list()[0]
+                node.description = 'updated'
+                context.model.node.update(node)
+            log = modeling.models.Log(execution=context.execution, level='INFO', msg='message',
+                                      created_at=datetime.utcnow())
+            context.model.log.put(log)
+            # Changes are flushed, but not committed
+            assert log.id is not None
+            assert not commits
+        assert len(commits) == 1
+
+    def test_bulk_rollback(self, context, commits):
+        with pytest.raises(RuntimeError):
+            with context.model.log.bulk():
+                context.model.log.put(modeling.models.Log(
+                    execution=context.execution, level='INFO', msg='message',
+                    created_at=datetime.utcnow()))
+                raise RuntimeError()
+        assert not commits
+        assert len(context.model.log.list()) == 0
+        # Commits are no longer deferred
+        context.model.log.put(modeling.models.Log(
+            execution=context.execution, level='INFO', msg='message',
+            created_at=datetime.utcnow()))
+        assert len(commits) == 1
+
+
 class MockModel(modeling.models.aria_declarative_base, modeling.mixins.ModelMixin): #pylint: disable=abstract-method
     __tablename__ = 'op_mock_model'
 
@@ -211,3 +488,89 @@ class TestFilterOperands(object):
     def test_eq_and_ne(self, storage):
         assert len(storage.op_mock_model.list(filters=dict(value=dict(eq=1, ne=3)))) == 1
         assert len(storage.op_mock_model.list(filters=dict(value=dict(eq=1, ne=1)))) == 0
+
+
+class TestKeysetPagination(object):
+
+    @pytest.fixture()
+    def storage(self):
+        model_storage = application_model_storage(
+            sql_mapi.SQLAlchemyModelAPI, initiator=tests_storage.init_inmemory_model_storage)
+        model_storage.register(MockModel)
+        for value in (3, 1, None, 2, 2, None, 3):
+            model_storage.op_mock_model.put(MockModel(value=value))
+        yield model_storage
+        tests_storage.release_sqlite_storage(model_storage)
+
+    @staticmethod
+    def _pages(mapi, size, **kwargs):
+        pages = []
+        cursor = None
+        while True:
+            page = mapi.list(pagination=dict(size=size, cursor=cursor), **kwargs)
+            pages.append([(model.value, model.id) for model in page])
+            cursor = page.metadata['cursor']
+            if cursor is None:
+                return pages
+
+    def test_default_sort(self, storage):
+        assert self._pages(storage.op_mock_model, 3) == [
+            [(3, 1), (1, 2), (None, 3)],
+            [(2, 4), (2, 5), (None, 6)],
+            [(3, 7)]
+        ]
+
+    @pytest.mark.parametrize('order, expected', [
+        ('asc', [1, 2, 2, 3, 3, None, None]),
+        ('desc', [3, 3, 2, 2, 1, None, None]),
+    ])
+    def test_sort(self, storage, order, expected):
+        for size in (1, 2, 3, 7):
+            pages = self._pages(storage.op_mock_model, size, sort=dict(value=order))
+            results = sum(pages, [])
+            assert [value for value, _ in results] == expected
+            # Ties are sorted by ID
+            assert results == sorted(results, key=lambda (value, id_): (
+                value is None, -value if order == 'desc' and value else value, id_))
+            assert all(len(page) == size for page in pages[:-1])
+
+    def test_filters(self, storage):
+        pages = self._pages(storage.op_mock_model, 2, filters=dict(value=dict(ge=2)))
+        assert [[value for value, _ in page] for page in pages] == [[3, 2], [2, 3]]
+
+    def test_datetime_sort(self, context):
+        for second in (2, 1, 2, 0):
+            context.model.log.put(modeling.models.Log(
+                execution=context.execution, level='INFO', msg=str(second),
+                created_at=datetime(2017, 1, 1, 0, 0, second, 500)))
+        logs = []
+        cursor = None
+        while True:
+            page = context.model.log.list(sort=dict(created_at='desc'),
+                                          pagination=dict(size=1, cursor=cursor))
+            logs.extend(log.msg for log in page)
+            cursor = page.metadata['cursor']
+            if cursor is None:
+                break
+        assert logs == ['2', '2', '1', '0']
+
+    def test_invalid_cursor(self, storage):
+        with pytest.raises(exceptions.StorageError):
+            storage.op_mock_model.list(pagination=dict(size=1, cursor='invalid'))
+
+        cursor = storage.op_mock_model.list(pagination=dict(size=1, cursor=None)).metadata['cursor']
+        with pytest.raises(exceptions.StorageError):
+            storage.op_mock_model.list(sort=dict(value='asc'),
+                                       pagination=dict(size=1, cursor=cursor))
+
+
+def test_iter_batches(context):
+    context.model.log.put_many(
+        modeling.models.Log(execution_fk=context.execution.id, level='INFO', msg=str(i),
+                            created_at=datetime.utcnow())
+        for i in xrange(10))
+    logs = context.model.log.iter(batch_size=3, sort=dict(id='asc'), load=['execution'])
+    assert [log.msg for log in logs] == [str(i) for i in xrange(10)]
+
+    with pytest.raises(exceptions.StorageError):
+        list(context.model.log.iter(batch_size=3, load=['execution.inputs']))
@@ -15,12 +15,20 @@
 
 import logging
 
+import pytest
+import retrying
+
 from aria.logger import (create_logger,
                          create_console_log_handler,
                          create_file_log_handler,
+                         create_sqla_log_handler,
                          _default_file_formatter,
                          LoggerMixin,
-                         _DefaultConsoleFormat)
+                         _DefaultConsoleFormat,
+                         DROP_WHEN_FULL)
+from aria.modeling import models
+
+from tests import mock, storage
 
 
 def test_create_logger():
@@ -127,3 +135,76 @@ def test_loggermixin(capsys):
     # class_unpickled = pickle.loads(class_pickled)
     #
     # assert vars(class_unpickled) == vars(custom_class)
+
+
+class TestBufferedSQLAlchemyHandler(object):
+
+    @pytest.fixture
+    def ctx(self, tmpdir):
+        context = mock.context.simple(str(tmpdir))
+        yield context
+        storage.release_sqlite_storage(context.model)
+
+    @staticmethod
+    def _logger(ctx, **buffer_options):
+        handler = create_sqla_log_handler(model=ctx.model, log_cls=models.Log,
+                                          execution_id=ctx.execution.id, buffer=buffer_options)
+        logger = logging.getLogger('buffered_sqla_handler')
+        logger.handlers = [handler]
+        logger.setLevel(logging.DEBUG)
+        return logger, handler
+
+    @staticmethod
+    def _stored_messages(ctx):
+        return [log.msg for log in ctx.model.log.list(sort=dict(id='asc'))]
+
+    def test_flush(self, ctx):
+        logger, handler = self._logger(ctx, flush_interval=60)
+        try:
+            for i in xrange(3):
+                msg = 'message {0}'.format(i)
+                logger.info(msg, extra=dict(task_id=None))
+            assert self._stored_messages(ctx) == []
+            handler.flush()
+            assert self._stored_messages(ctx) == ['message 0', 'message 1', 'message 2']
+        finally:
+            handler.close()
+
+    def test_batch_size(self, ctx):
+        logger, handler = self._logger(ctx, batch_size=2, flush_interval=60)
+        try:
+            for i in xrange(2):
+                msg = 'message {0}'.format(i)
+                logger.info(msg, extra=dict(task_id=None))
+
+            @retrying.retry(stop_max_delay=10000, wait_fixed=50)
+            def assertion():
+                assert self._stored_messages(ctx) == ['message 0', 'message 1']
+            assertion()
+        finally:
+            handler.close()
+
+    def test_drop_when_full(self, ctx):
+        logger, handler = self._logger(ctx, max_size=1, flush_interval=60,
+                                       when_full=DROP_WHEN_FULL)
+        try:
+            for i in xrange(3):
+                msg = 'message {0}'.format(i)
+                logger.info(msg, extra=dict(task_id=None))
+            assert handler.dropped_count == 2
+        finally:
+            handler.close()
+        messages = self._stored_messages(ctx)
+        assert messages[0] == 'message 0'
+        assert messages[1].startswith('2 log records were dropped')
+        assert handler.dropped_count == 0
+
+    def test_close(self, ctx):
+        logger, handler = self._logger(ctx, flush_interval=60)
+        logger.info('message', extra=dict(task_id=None))
+        handler.close()
+        assert self._stored_messages(ctx) == ['message']
+
+    def test_invalid_policy(self, ctx):
+        with pytest.raises(ValueError):
+            self._logger(ctx, when_full='ignore')
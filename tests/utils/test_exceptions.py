@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import cPickle as pickle
+
 import jsonpickle
 
 from aria.utils import exceptions
@@ -51,6 +53,17 @@ class TestWrapIfNeeded(object):
         assert wrapped_e.exception_type == type(e).__name__
         assert wrapped_e.exception_str == str(e)
 
+    def test_no_wrapping_required_with_serializer(self):
+        e = JsonPickleableException1(_ARG1, _ARG2)
+        assert exceptions.wrap_if_needed(e, serializer=pickle) is e
+
+    def test_wrapping_required_with_serializer(self):
+        e = NonJsonPickleableException(_ARG1, _ARG2)
+        wrapped_e = exceptions.wrap_if_needed(e, serializer=pickle)
+        wrapped_e = pickle.loads(pickle.dumps(wrapped_e))
+        assert isinstance(wrapped_e, exceptions._WrappedException)
+        assert wrapped_e.exception_type == type(e).__name__
+
 
 class JsonPickleableException1(Exception):
     def __init__(self, arg1, arg2):
@@ -0,0 +1,79 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from contextlib import contextmanager
+
+import pytest
+
+from aria.utils import generators
+
+
+class TestDelegate(object):
+
+    def test_context_during_steps(self):
+        entered = []
+
+        @contextmanager
+        def context():
+            entered.append(True)
+            yield
+            entered.append(False)
+
+        def generator():
+            value = yield entered[-1]
+            assert value == 'value'
+            yield entered[-1]
+
+        delegating = generators.delegate(generator(), context)
+        assert next(delegating) is True
+        assert entered == [True, False]
+        assert delegating.send('value') is True
+        assert entered == [True, False, True, False]
+        with pytest.raises(StopIteration):
+            next(delegating)
+
+    def test_thrown_exceptions(self):
+        def generator():
+            try:
+                yield
+            except MockException:
+                yield 'caught'
+
+        delegating = generators.delegate(generator(), _null_context)
+        next(delegating)
+        assert delegating.throw(MockException) == 'caught'
+
+    def test_close(self):
+        closed = []
+
+        def generator():
+            try:
+                yield
+            finally:
+                closed.append(True)
+
+        delegating = generators.delegate(generator(), _null_context)
+        next(delegating)
+        delegating.close()
+        assert closed == [True]
+
+
+@contextmanager
+def _null_context():
+    yield
+
+
+class MockException(Exception):
+    pass
@@ -0,0 +1,64 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import shutil
+
+import pytest
+
+from aria.utils import ipc
+
+
+def test_messages(connections):
+    client, server = connections
+    for message in ({'type': 'started'}, None, 'x' * 100000):
+        ipc.send_message(client, message)
+        assert ipc.recv_message(server) == message
+
+
+def test_closed_connection(connections):
+    client, server = connections
+    client.close()
+    with pytest.raises(EOFError):
+        ipc.recv_message(server)
+
+
+def test_unpack_messages():
+    connection = _BufferConnection()
+    for message in ({'type': 'started'}, {'type': 'succeeded'}):
+        ipc.send_message(connection, message)
+    data = connection.data
+    messages, remaining_data = ipc.unpack_messages(data + data[:3])
+    assert messages == [{'type': 'started'}, {'type': 'succeeded'}]
+    assert remaining_data == data[:3]
+
+
+class _BufferConnection(object):
+    def __init__(self):
+        self.data = ''
+
+    def sendall(self, data):
+        self.data += data
+
+
+@pytest.fixture
+def connections():
+    listener, address, directory = ipc.listen(prefix='test-ipc-')
+    client = ipc.connect(address)
+    server = listener.accept()[0]
+    yield client, server
+    server.close()
+    client.close()
+    listener.close()
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)